@@ -0,0 +1,15 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from modern_office.presets import OUTPUT_ROOT, make_pipeline
+from modern_office.quality_benchmark import QualityBenchmark
+
+if __name__ == '__main__':
+    # Run in the editor: renders one scene of the preset (MODERN_OFFICE_BENCHMARK_PRESET, random_camera
+    # by default) with every pass at full quality and at its quality profile, and writes the time per
+    # frame of each pass and how much its labels changed to <OUTPUT_ROOT>/benchmarks/quality/
+    preset = os.environ.get('MODERN_OFFICE_BENCHMARK_PRESET', 'random_camera')
+    pipeline = make_pipeline(preset, output_root=os.path.join(OUTPUT_ROOT, 'benchmarks', 'quality'), sink=None,
+                             warmup=False, telemetry=False, metrics_path=None, metrics_port=None)
+    QualityBenchmark(pipeline).run()
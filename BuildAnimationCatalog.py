@@ -0,0 +1,13 @@
+import os
+import sys
+import unreal
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from modern_office.animation_catalog import build_catalog, save_catalog, default_catalog_path
+
+if __name__ == '__main__':
+    # Run inside the editor: catalogs every baked character animation once
+    catalog_entries = build_catalog()
+    catalog_path = default_catalog_path()
+    save_catalog(catalog_entries, catalog_path)
+    unreal.log(f"Wrote {len(catalog_entries)} animations to {catalog_path}")
@@ -0,0 +1,15 @@
+import os
+import sys
+import unreal
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from modern_office.assets import find_relevant_assets
+from modern_office.materials import build_material_pool, save_pool_catalog, default_catalog_path
+
+if __name__ == '__main__':
+    # Run inside the editor with the office level open: creates material instance variants of the
+    # desk, wall and floor materials once
+    pool_catalog = build_material_pool(find_relevant_assets().surfaces)
+    catalog_path = default_catalog_path()
+    save_pool_catalog(pool_catalog, catalog_path)
+    unreal.log(f"Wrote {len(pool_catalog)} material variants to {catalog_path}")
@@ -0,0 +1,16 @@
+import os
+import sys
+import unreal
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from modern_office.assets import find_relevant_assets
+from modern_office.rail_paths import build_rail_library, save_rail_library, default_library_path
+
+if __name__ == '__main__':
+    # Run inside the editor with the office level open: generates and collision checks rail shapes
+    # around every target point once
+    rail_library = build_rail_library(find_relevant_assets())
+    library_path = default_library_path()
+    save_rail_library(rail_library, library_path)
+    num_paths = sum(len(paths) for paths in rail_library['targets'].values())
+    unreal.log(f"Wrote {num_paths} rails for {len(rail_library['targets'])} target points to {library_path}")
@@ -0,0 +1,32 @@
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from modern_office.encoders import Frame, encode_png
+from modern_office.video import VideoFrames
+
+if __name__ == '__main__':
+    # Runs outside the editor: unpacks a pass written with video_passes back into PNG frames named
+    # like the Movie Render Queue names them, e.g.
+    #   python DecodeVideoPass.py D:\SyntheticData\...\2025-06-09_12-00-00\rgb\rgb.mkv --frames 0 24 48
+    parser = argparse.ArgumentParser()
+    parser.add_argument('video')
+    parser.add_argument('--output-dir', help="defaults to the video's folder")
+    parser.add_argument('--frames', type=int, nargs='*', help="sequencer frame numbers, all by default")
+    parser.add_argument('--compress-level', type=int, default=1)
+    args = parser.parse_args()
+
+    video = VideoFrames(args.video)
+    output_dir = args.output_dir or os.path.dirname(os.path.abspath(args.video))
+    os.makedirs(output_dir, exist_ok=True)
+    width, height = video.index['width'], video.index['height']
+    if args.frames:
+        frames = ((number, video.read(number)) for number in args.frames)
+    else:
+        frames = iter(video)
+    for number, image in frames:
+        pixels = image.tobytes() if hasattr(image, 'tobytes') else image
+        encode_png(Frame(width, height, 3, pixels), os.path.join(output_dir, f"Image.FinalImage.{number:04d}.png"),
+                   compress_level=args.compress_level)
+    print(f"Decoded {len(args.frames) if args.frames else len(video)} frames to {output_dir}")
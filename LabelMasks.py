@@ -0,0 +1,38 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from modern_office.labels import MASK_PASSES, label_scenes
+from modern_office.layout import labels_path, pass_dir
+
+if __name__ == '__main__':
+    # Runs outside the editor: labels the mask pass of every scene under the given batch folders
+    # (or scene folders) in a process pool, one scene per task, e.g.
+    #   python LabelMasks.py D:\SyntheticData\MordenOffice\RandomCamera --workers 8
+    parser = argparse.ArgumentParser()
+    parser.add_argument('roots', nargs='+', help="batch or scene folders")
+    parser.add_argument('--pass-name', help=f"mask pass, the first of {list(MASK_PASSES)} found by default")
+    parser.add_argument('--workers', type=int, help="processes, one per CPU by default")
+    parser.add_argument('--overwrite', action='store_true', help="relabel scenes that already have a table")
+    args = parser.parse_args()
+
+    pass_names = [args.pass_name] if args.pass_name else list(MASK_PASSES)
+    scenes = {}
+    for root in args.roots:
+        candidates = [root] + [os.path.join(root, name) for name in sorted(os.listdir(root))]
+        for scene in candidates:
+            pass_name = next((p for p in pass_names if os.path.isdir(pass_dir(scene, p))), None)
+            if pass_name is not None and (args.overwrite or not os.path.exists(labels_path(scene, pass_name))):
+                scenes.setdefault(pass_name, []).append(scene)
+
+    started_at = time.monotonic()
+    failed = 0
+    for pass_name, scene_paths in scenes.items():
+        for scene, result in label_scenes(scene_paths, pass_name, workers=args.workers).items():
+            if isinstance(result, Exception):
+                failed += 1
+                print(f"{scene}: {result!r}")
+    labeled = sum(len(s) for s in scenes.values()) - failed
+    print(f"Labeled {labeled} scenes in {time.monotonic() - started_at:.1f}s, {failed} failed")
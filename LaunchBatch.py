@@ -0,0 +1,53 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from modern_office.layout import RESTART_FILE
+from modern_office.presets import PRESETS
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+# entry script the editor runs for each preset
+PRESET_SCRIPTS = {
+    'random_camera': 'RandomCameraPipeline.py',
+    'camera_rail': 'RandomPositionCameraRailPipeline.py',
+    'rgb_alpha': 'RGB_Alpha_Render.py',
+}
+
+if __name__ == '__main__':
+    # Runs outside the editor: launches the editor on a preset's entry script and waits for it to exit.
+    # A batch that hits the memory thresholds (telemetry.py) leaves <output_root>/restart.json and
+    # quits the editor; the editor is then launched again and the pipeline resumes the remaining
+    # rounds from that file, e.g.
+    #   python LaunchBatch.py random_camera --editor "C:\UE_5.3\Engine\Binaries\Win64\UnrealEditor.exe"
+    #       --project D:\Projects\ModernOffice\ModernOffice.uproject
+    parser = argparse.ArgumentParser()
+    parser.add_argument('preset', choices=sorted(PRESET_SCRIPTS))
+    parser.add_argument('--editor', required=True, help="UnrealEditor executable")
+    parser.add_argument('--project', required=True, help=".uproject file")
+    parser.add_argument('--max-restarts', type=int, default=20)
+    parser.add_argument('editor_args', nargs='*', help="passed on to the editor, after --")
+    args = parser.parse_args()
+
+    restart_path = os.path.join(PRESETS[args.preset]['output_root'], RESTART_FILE)
+    script = os.path.join(REPO_DIR, PRESET_SCRIPTS[args.preset])
+    # the pipeline quits the editor when the batch is done, so this doesn't wait on an idle editor
+    env = dict(os.environ, MODERN_OFFICE_QUIT_ON_FINISH='1')
+    restarts = 0
+    while True:
+        returncode = subprocess.run([args.editor, args.project, f'-ExecutePythonScript={script}', *args.editor_args],
+                                    env=env).returncode
+        if not os.path.exists(restart_path):
+            # done, or the editor crashed: either way there is nothing to resume
+            break
+        with open(restart_path) as f:
+            state = json.load(f)
+        restarts += 1
+        if restarts > args.max_restarts:
+            sys.exit(f"Giving up after {args.max_restarts} restarts, {state['remaining_rounds']} rounds left")
+        print(f"Editor quit for a restart ({state['reason']}), relaunching for {state['remaining_rounds']} rounds")
+    if returncode != 0:
+        sys.exit(f"Editor exited with code {returncode}")
+    print(f"Batch done after {restarts} restarts")
@@ -0,0 +1,24 @@
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from modern_office.dataset_stats import find_stats_files, merge_stats_files, write_stats
+
+if __name__ == '__main__':
+    # Runs outside the editor: combines the dataset stats of batches rendered on different nodes
+    # (their dataset_stats.json, or with --scenes the stats.json of every scene) into one file, e.g.
+    #   python MergeDatasetStats.py \\node1\SyntheticData\MordenOffice\RandomCamera \\node2\... -o stats.json
+    parser = argparse.ArgumentParser()
+    parser.add_argument('roots', nargs='+', help="batch or scene folders")
+    parser.add_argument('-o', '--output', required=True)
+    parser.add_argument('--scenes', action='store_true',
+                        help="merge the scenes' own stats rather than the batch totals, e.g. after deleting scenes")
+    args = parser.parse_args()
+
+    paths = [path for root in args.roots for path in find_stats_files(root, scenes=args.scenes)]
+    stats = merge_stats_files(paths)
+    write_stats(stats, args.output)
+    print(f"Merged {len(paths)} files into {args.output}")
+    print(json.dumps(stats.summary(), indent=2))
@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import BENCHMARK_DIR
+
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+
+# what a planner, validator or dataset tool imports on a worker without the editor
+CORE_MODULES = ['layout', 'coverage', 'manifest', 'scene_metadata', 'orchestrator', 'metrics', 'storage']
+# everything, the engine adapter included: importing must not need the editor either
+ALL_MODULES = CORE_MODULES + ['trajectory', 'encoders', 'video', 'aux_outputs', 'labels', 'plates', 'dataset_stats',
+                              'assets', 'sequencer', 'stages', 'render', 'warmup', 'pipeline']
+
+IMPORT_SCRIPT = """
+import json, sys, time
+started_at = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(f'modern_office.{name}')
+print(json.dumps({'seconds': time.perf_counter() - started_at, 'engine_loaded': 'unreal' in sys.modules}))
+"""
+
+
+def import_in_fresh_interpreter(modules):
+    # no benchmarks/ on the path, so there is no unreal module to find
+    output = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT, *modules], cwd=REPO_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output)
+
+@pytest.mark.parametrize('modules', [CORE_MODULES, ALL_MODULES], ids=['core', 'all'])
+def bench_import_without_engine(benchmark, modules):
+    result = benchmark.pedantic(import_in_fresh_interpreter, args=(modules,), rounds=3, iterations=1)
+    assert not result['engine_loaded']
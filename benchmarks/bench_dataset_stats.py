@@ -0,0 +1,20 @@
+import pytest
+
+from modern_office.dataset_stats import DatasetStats
+
+np = pytest.importorskip('numpy')
+
+WIDTH, HEIGHT = 1920, 1080
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return np.random.default_rng(0).integers(0, 256, (HEIGHT, WIDTH, 3), np.uint8)
+
+def bench_add_frame(benchmark, frame):
+    # channel moments and value histograms of one rgb frame, what each scene adds per frame
+    stats = DatasetStats()
+    benchmark(stats.add_frame, 'rgb', frame)
+    pixels = frame.reshape(-1, 3) / 255.0
+    assert np.allclose(stats.moments['rgb'].mean, pixels.mean(axis=0))
+    assert np.allclose(stats.moments['rgb'].variance, pixels.var(axis=0))
@@ -0,0 +1,80 @@
+import os
+import random
+
+import pytest
+
+from modern_office.encoders import ENCODERS, Frame, FrameWriterPool, encode_bmp
+
+WIDTH, HEIGHT = 1920, 1080
+POOL_FRAMES = 16
+
+# (encoder, options) as they would be passed to Pipeline(encoder=..., encoder_options=...)
+ENCODER_OPTIONS = [
+    ('bmp', {}),
+    ('png_zlib', {'compress_level': 1}),
+    ('png_zlib', {'compress_level': 6}),
+    ('png_zlib', {'compress_level': 9}),
+    ('qoi', {}),
+    ('webp', {'method': 0}),
+    ('webp', {'method': 4}),
+    ('exr', {'compression': 'ZIP'}),
+    ('exr', {'compression': 'PIZ'}),
+]
+
+
+@pytest.fixture(scope='module')
+def frame():
+    # smooth gradients plus a few bits of noise, about as compressible as a rendered office
+    rng = random.Random(0)
+    pixels = bytearray()
+    for y in range(HEIGHT):
+        noise = rng.randbytes(WIDTH * 3)
+        base = y * 96 // HEIGHT
+        pixels += bytes((base + (i // 3) * 128 // WIDTH + (i % 3) * 40 + (noise[i] & 7)) & 255 for i in range(WIDTH * 3))
+    return Frame(WIDTH, HEIGHT, 3, pixels)
+
+def options_id(value):
+    return '-'.join(str(v) for v in value.values()) if isinstance(value, dict) else value
+
+@pytest.mark.parametrize('encoder, options', ENCODER_OPTIONS, ids=options_id)
+def bench_encode_frame(benchmark, frame, frame_sizes, tmp_path, encoder, options):
+    # one 1080p frame on one thread; ops is frames per second
+    path = str(tmp_path / f"Image.FinalImage.0000.{ENCODERS[encoder]['extension']}")
+    try:
+        ENCODERS[encoder]['encode'](frame, path, **options)
+    except ImportError as e:
+        pytest.skip(str(e))
+    benchmark.pedantic(ENCODERS[encoder]['encode'], args=(frame, path), kwargs=options, rounds=5, iterations=1)
+    size = os.path.getsize(path)
+    benchmark.extra_info['bytes_per_frame'] = size
+    frame_sizes[f"encode_frame[{encoder}-{options_id(options)}]"] = size
+
+@pytest.mark.parametrize('encoder, options', [('png_zlib', {'compress_level': 1}), ('qoi', {}), ('webp', {'method': 0})],
+                         ids=options_id)
+def bench_frame_writer_pool(benchmark, frame, tmp_path, encoder, options):
+    # BMP intermediates of one pass transcoded on 4 writer threads; frames per second is ops * POOL_FRAMES
+    pass_dir = tmp_path / 'rgb'
+    pass_dir.mkdir()
+    intermediate = str(pass_dir / 'Image.FinalImage.0000.bmp')
+    encode_bmp(frame, intermediate)
+    with open(intermediate, 'rb') as f:
+        data = f.read()
+
+    def write_intermediates():
+        for name in os.listdir(pass_dir):
+            os.remove(pass_dir / name)
+        for i in range(POOL_FRAMES):
+            with open(pass_dir / f"Image.FinalImage.{i:04d}.bmp", 'wb') as f:
+                f.write(data)
+        return (str(pass_dir), encoder, options), {}
+
+    pool = FrameWriterPool(max_workers=4)
+    try:
+        failed = pool.transcode_pass(*write_intermediates()[0])
+        if failed:
+            pytest.skip(pool.failed[0][1])
+        benchmark.pedantic(pool.transcode_pass, setup=write_intermediates, rounds=3, iterations=1)
+    finally:
+        pool.close()
+    benchmark.extra_info['frames'] = POOL_FRAMES
+    assert len(os.listdir(pass_dir)) == POOL_FRAMES
@@ -0,0 +1,22 @@
+import pytest
+
+from modern_office.labels import BATCH_FRAMES, label_batch
+
+np = pytest.importorskip('numpy')
+
+WIDTH, HEIGHT = 1920, 1080
+
+
+@pytest.fixture(scope='module')
+def masks():
+    # a character-sized blob walking across the frame, out of it in the last frames
+    masks = np.zeros((BATCH_FRAMES, HEIGHT, WIDTH), bool)
+    for i in range(BATCH_FRAMES - 2):
+        x = i * (WIDTH - 300) // BATCH_FRAMES
+        masks[i, 200:1000, x:x + 300] = True
+    return masks
+
+def bench_label_batch(benchmark, masks):
+    # one batch of frames; a 300 frame scene is about ten of these plus decoding
+    table = benchmark(label_batch, masks)
+    assert table['area'][0] == 800 * 300 and table['area'][-1] == 0
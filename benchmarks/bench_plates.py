@@ -0,0 +1,29 @@
+import pytest
+
+from modern_office.plates import composite_frame, shadow_shade
+
+np = pytest.importorskip('numpy')
+
+WIDTH, HEIGHT = 1920, 1080
+
+
+@pytest.fixture(scope='module')
+def layers():
+    rng = np.random.default_rng(0)
+    plate = rng.integers(0, 256, (HEIGHT, WIDTH, 3), np.uint8)
+    character = np.zeros((HEIGHT, WIDTH, 4), np.uint8)
+    character[200:1000, 800:1100] = (90, 60, 40, 255)
+    reference = rng.integers(100, 200, (HEIGHT // 2, WIDTH // 2, 3), np.uint8)
+    shadow = reference.copy()
+    shadow[480:520, 350:600] //= 2
+    return plate, character, shadow, reference
+
+def bench_composite_frame(benchmark, layers):
+    # one rgb frame over its plate, shadow catcher included: the per-frame cost of a plate scene
+    plate, character, shadow, reference = layers
+
+    def composite():
+        alpha = character[..., 3].astype(np.float32) / 255.0
+        return composite_frame(plate, character, alpha, shadow_shade(shadow, reference, alpha.shape))
+    pixels = benchmark(composite)
+    assert pixels.shape == plate.shape and (pixels[500, 900] == (90, 60, 40)).all()
@@ -0,0 +1,57 @@
+import random
+
+from modern_office.assets import select_random_asset, find_relevant_assets, clear_asset_list_cache
+from modern_office.sequencer import (bind_camera_to_level_sequence, add_random_camera_keys, add_smooth_camera_keys,
+                                     clean_sequencer)
+
+
+def bench_select_random_asset_cold(benchmark, engine, registry_size, call_latency_us):
+    engine.configure(num_assets=registry_size, call_latency_us=call_latency_us)
+    random.seed(0)
+    # first draw of a batch: the class filter queries the registry for every asset
+    benchmark.pedantic(select_random_asset, args=(engine.CHARACTER_ROOT, 'SkeletalMesh'),
+                       setup=clear_asset_list_cache, rounds=3, iterations=1)
+
+def bench_select_random_asset_warm(benchmark, engine, registry_size, call_latency_us):
+    engine.configure(num_assets=registry_size, call_latency_us=call_latency_us)
+    clear_asset_list_cache()
+    random.seed(0)
+    select_random_asset(engine.CHARACTER_ROOT, 'SkeletalMesh')
+    benchmark(select_random_asset, engine.CHARACTER_ROOT, 'SkeletalMesh')
+
+def bench_find_relevant_assets(benchmark, engine, level_size, call_latency_us):
+    engine.configure(num_actors=level_size, call_latency_us=call_latency_us)
+    level_actors = benchmark(find_relevant_assets)
+    assert level_actors.skylight is not None
+
+def bench_bind_camera_to_level_sequence(benchmark, engine):
+    camera = engine.Actor("SuperCineCameraActor_0")
+    center = engine.Vector(0.0, 0.0, 100.0)
+
+    def bind_and_key():
+        level_sequence = engine.LevelSequence()
+        binding = bind_camera_to_level_sequence(level_sequence, camera)
+        return add_random_camera_keys(binding, center, start_frame=0, num_frames=300, move_radius=800)
+
+    camera_keys = benchmark(bind_and_key)
+    assert len(camera_keys) == 2
+
+def bench_smooth_camera_keys(benchmark, engine):
+    # 301 frames of location, look-at rotation and focal length, reduced before writing
+    camera = engine.Actor("SuperCineCameraActor_0")
+    center = engine.Vector(0.0, 0.0, 100.0)
+    subject = engine.Vector(0.0, 0.0, 0.0)
+    random.seed(0)
+
+    def bind_and_key():
+        level_sequence = engine.LevelSequence()
+        binding = bind_camera_to_level_sequence(level_sequence, camera)
+        return add_smooth_camera_keys(level_sequence, binding, camera, center, start_frame=0, num_frames=300,
+                                      move_radius=800, look_at=subject, focal_length_range=(18.0, 50.0))
+
+    camera_keys = benchmark(bind_and_key)
+    assert len(camera_keys) < 301
+
+def bench_clean_sequencer(benchmark, engine):
+    benchmark.pedantic(clean_sequencer, setup=lambda: ((engine.LevelSequence(num_bindings=200),), {}),
+                       rounds=50, iterations=1)
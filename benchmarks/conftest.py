@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+# The stub has to be importable as `unreal` before any modern_office module is imported
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+import stub_unreal
+sys.modules['unreal'] = stub_unreal
+
+# benchmark name -> bytes per encoded frame, listed after the timings
+frame_sizes_key = pytest.StashKey[dict]()
+
+
+def pytest_addoption(parser):
+    parser.addoption('--registry-sizes', default='10000,100000',
+                     help="comma separated asset registry sizes, e.g. 10000,100000,1000000")
+    parser.addoption('--level-sizes', default='1000,10000',
+                     help="comma separated numbers of actors in the level")
+    parser.addoption('--call-latency-us', type=float, default=2.0,
+                     help="simulated cost of every Python/engine call in microseconds")
+
+def pytest_configure(config):
+    config.stash[frame_sizes_key] = {}
+
+def pytest_terminal_summary(terminalreporter, config):
+    frame_sizes = config.stash[frame_sizes_key]
+    if frame_sizes:
+        terminalreporter.section('bytes per frame')
+        for name, size in sorted(frame_sizes.items()):
+            terminalreporter.write_line(f"{name:<50} {size:>12,}")
+
+def pytest_generate_tests(metafunc):
+    if 'registry_size' in metafunc.fixturenames:
+        sizes = [int(s) for s in metafunc.config.getoption('registry_sizes').split(',')]
+        metafunc.parametrize('registry_size', sizes)
+    if 'level_size' in metafunc.fixturenames:
+        sizes = [int(s) for s in metafunc.config.getoption('level_sizes').split(',')]
+        metafunc.parametrize('level_size', sizes)
+
+@pytest.fixture
+def call_latency_us(request):
+    return request.config.getoption('call_latency_us')
+
+@pytest.fixture
+def engine(call_latency_us):
+    stub_unreal.configure(call_latency_us=call_latency_us)
+    return stub_unreal
+
+@pytest.fixture
+def frame_sizes(request):
+    return request.config.stash[frame_sizes_key]
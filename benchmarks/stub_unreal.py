@@ -0,0 +1,418 @@
+# Stand-in for the unreal module so scene-construction code runs on a plain Linux box.
+# Only the API surface used by modern_office is modelled. Every call that would cross into the
+# engine goes through _cross(), which counts it and, with configure(call_latency_us=...),
+# busy-waits to mimic the cost of the Python/engine boundary.
+import time
+from collections import Counter
+
+_config = {'call_latency_us': 0.0}
+call_counts = Counter()
+
+# registry and level are rebuilt by configure()
+_registry = {}
+_registry_by_folder = {}
+_level_actors = []
+
+CHARACTER_ROOT = '/Game/ActorcoreCharacterBaked'
+ANIMATIONS_PER_CHARACTER = 12
+
+
+def _cross(name):
+    call_counts[name] += 1
+    latency = _config['call_latency_us']
+    if latency:
+        end = time.perf_counter() + latency * 1e-6
+        while time.perf_counter() < end:
+            pass
+
+def configure(num_assets=10000, num_actors=1000, num_cameras=20, call_latency_us=0.0):
+    _config['call_latency_us'] = call_latency_us
+    call_counts.clear()
+    _build_registry(num_assets)
+    _build_level(num_actors, num_cameras)
+    _subsystems.clear()
+
+
+# math types
+
+class Vector:
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x, self.y, self.z = x, y, z
+
+    def __add__(self, other):
+        return Vector(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+class Rotator:
+    def __init__(self, roll=0.0, pitch=0.0, yaw=0.0):
+        self.roll, self.pitch, self.yaw = roll, pitch, yaw
+
+class Quat:
+    def __init__(self, x=0.0, y=0.0, z=0.0, w=1.0):
+        self.x, self.y, self.z, self.w = x, y, z, w
+
+class Transform:
+    def __init__(self, translation=None, rotation=None):
+        self.translation = translation or Vector()
+        self.rotation = rotation or Quat()
+
+class FrameNumber:
+    def __init__(self, value=0):
+        self.value = value
+
+class FrameRate:
+    def __init__(self, numerator=30, denominator=1):
+        self.numerator, self.denominator = numerator, denominator
+
+class IntPoint:
+    def __init__(self, x=0, y=0):
+        self.x, self.y = x, y
+
+
+# asset registry
+
+class TopLevelAssetPath:
+    def __init__(self, package_name, asset_name):
+        self.package_name, self.asset_name = package_name, asset_name
+
+class AssetData:
+    def __init__(self, package_path, asset_name, asset_class):
+        self.package_path = package_path
+        self.package_name = f"{package_path}/{asset_name}"
+        self.asset_name = asset_name
+        self.asset_class_path = TopLevelAssetPath('/Script/Engine', asset_class)
+
+    def object_path(self):
+        return f"{self.package_name}.{self.asset_name}"
+
+def _build_registry(num_assets):
+    _registry.clear()
+    _registry_by_folder.clear()
+    num_characters = max(1, num_assets // (ANIMATIONS_PER_CHARACTER + 2))
+    count = 0
+    for c in range(num_characters):
+        folder = f"{CHARACTER_ROOT}/Character_{c:06d}"
+        names = [(f"Character_{c:06d}", 'SkeletalMesh'), (f"Character_{c:06d}_Anim", 'AnimSequence')]
+        names += [(f"Motion_{a:02d}", 'AnimSequence') for a in range(ANIMATIONS_PER_CHARACTER)]
+        for asset_name, asset_class in names:
+            if count >= num_assets:
+                break
+            data = AssetData(folder, asset_name, asset_class)
+            _registry[data.package_name] = data
+            _registry_by_folder.setdefault(folder, []).append(data)
+            count += 1
+    for c in range(8):
+        data = AssetData('/Game/HDRI', f"Cubemap_{c}", 'TextureCube')
+        _registry[data.package_name] = data
+        _registry_by_folder.setdefault('/Game/HDRI', []).append(data)
+
+class EditorAssetLibrary:
+    @staticmethod
+    def list_assets(directory_path, recursive=True, include_folder=False):
+        _cross('EditorAssetLibrary.list_assets')
+        directory_path = directory_path.rstrip('/')
+        return [data.object_path() for folder, datas in _registry_by_folder.items()
+                if folder == directory_path or (recursive and folder.startswith(directory_path + '/'))
+                for data in datas]
+
+    @staticmethod
+    def find_asset_data(asset_path):
+        _cross('EditorAssetLibrary.find_asset_data')
+        return _registry[asset_path.split('.')[0]]
+
+    @staticmethod
+    def load_asset(asset_path):
+        return load_asset(asset_path)
+
+class AssetRegistry:
+    def get_assets_by_path(self, package_path, recursive=False):
+        _cross('AssetRegistry.get_assets_by_path')
+        package_path = package_path.rstrip('/')
+        return [data for folder, datas in _registry_by_folder.items()
+                if folder == package_path or (recursive and folder.startswith(package_path + '/'))
+                for data in datas]
+
+class AssetRegistryHelpers:
+    @staticmethod
+    def get_asset_registry():
+        return AssetRegistry()
+
+class Asset:
+    def __init__(self, path):
+        self.path = path
+        self.properties = {'sequence_length': 10.0}
+
+    def get_editor_property(self, name):
+        _cross('Object.get_editor_property')
+        return self.properties.get(name)
+
+    def set_editor_property(self, name, value):
+        _cross('Object.set_editor_property')
+        self.properties[name] = value
+
+    def get_name(self):
+        return self.path.split('.')[-1]
+
+def load_asset(asset_path):
+    _cross('load_asset')
+    return Asset(asset_path)
+
+class Paths:
+    @staticmethod
+    def project_saved_dir():
+        return '/tmp/stub_unreal/Saved/'
+
+
+# level
+
+class Component:
+    def __init__(self):
+        self.properties = {}
+
+    def set_editor_property(self, name, value):
+        _cross('Object.set_editor_property')
+        self.properties[name] = value
+
+    def get_editor_property(self, name):
+        _cross('Object.get_editor_property')
+        return self.properties.get(name)
+
+    def recapture_sky(self):
+        _cross('SkyLightComponent.recapture_sky')
+
+class Actor:
+    def __init__(self, label, name=None, location=None):
+        self.label = label
+        self.name = name or label
+        self.location = location or Vector()
+        self.attached = []
+        self.components = {'light_component': Component()}
+        self.destroyed = False
+
+    def get_actor_label(self):
+        _cross('Actor.get_actor_label')
+        return self.label
+
+    def get_name(self):
+        _cross('Object.get_name')
+        return self.name
+
+    def get_actor_location(self):
+        _cross('Actor.get_actor_location')
+        return self.location
+
+    def set_actor_location(self, location, sweep=False, teleport=False):
+        _cross('Actor.set_actor_location')
+        self.location = location
+
+    def set_actor_scale3d(self, scale):
+        _cross('Actor.set_actor_scale3d')
+
+    def get_cine_camera_component(self):
+        _cross('CineCameraActor.get_cine_camera_component')
+        return self.components.setdefault('cine_camera_component', Component())
+
+    def get_attached_actors(self):
+        _cross('Actor.get_attached_actors')
+        return self.attached
+
+    def get_editor_property(self, name):
+        _cross('Object.get_editor_property')
+        return self.components.get(name)
+
+    def is_actor_being_destroyed(self):
+        return self.destroyed
+
+def _build_level(num_actors, num_cameras):
+    _level_actors.clear()
+    for i in range(num_cameras):
+        _level_actors.append(Actor(f"SuperCineCameraActor_{i}"))
+        _level_actors.append(Actor(f"TargetPoint_{i}", location=Vector(100.0 * i, 50.0 * i, 0.0)))
+    _level_actors.append(Actor("SkyLight", name="SkyLight_1"))
+    rail = Actor("CineCameraRigRail")
+    rail.attached.append(Actor("RailCamera", name="CineCameraActor_Rail"))
+    _level_actors.append(rail)
+    for i in range(max(0, num_actors - len(_level_actors))):
+        _level_actors.append(Actor(f"StaticMeshActor_{i}"))
+
+class EditorActorSubsystem:
+    def get_all_level_actors(self):
+        _cross('EditorActorSubsystem.get_all_level_actors')
+        return list(_level_actors)
+
+    def destroy_actor(self, actor):
+        _cross('EditorActorSubsystem.destroy_actor')
+        actor.destroyed = True
+
+class LayersSubsystem:
+    def add_actor_to_layer(self, actor, layer_name):
+        _cross('LayersSubsystem.add_actor_to_layer')
+
+class EditorLevelLibrary:
+    @staticmethod
+    def spawn_actor_from_object(object_to_use, location, rotation):
+        _cross('EditorLevelLibrary.spawn_actor_from_object')
+        return Actor(object_to_use.get_name(), location=location)
+
+_subsystems = {}
+
+def get_editor_subsystem(cls):
+    _cross('get_editor_subsystem')
+    if cls not in _subsystems:
+        _subsystems[cls] = cls()
+    return _subsystems[cls]
+
+class SystemLibrary:
+    @staticmethod
+    def collect_garbage():
+        _cross('SystemLibrary.collect_garbage')
+
+
+# sequencer
+
+class StaticClass:
+    def __init__(self, name):
+        self.name = name
+
+class MovieSceneTrack:
+    _static_class = None
+
+    @classmethod
+    def static_class(cls):
+        if cls.__dict__.get('_static_class') is None:
+            cls._static_class = StaticClass(cls.__name__)
+        return cls._static_class
+
+    def __init__(self):
+        self.sections = []
+
+    def get_class(self):
+        _cross('Object.get_class')
+        return type(self).static_class()
+
+    def add_section(self):
+        _cross('MovieSceneTrack.add_section')
+        section = self.section_class()
+        self.sections.append(section)
+        return section
+
+    def get_sections(self):
+        _cross('MovieSceneTrack.get_sections')
+        return list(self.sections)
+
+    def set_property_name_and_path(self, name, path):
+        _cross('MovieScenePropertyTrack.set_property_name_and_path')
+        self.property_path = path
+
+class MovieSceneScriptingChannel:
+    def __init__(self):
+        self.keys = []
+
+    def add_key(self, time, new_value, sub_frame=0.0, time_unit=None, interpolation=None):
+        _cross('MovieSceneScriptingChannel.add_key')
+        self.keys.append((time.value, new_value))
+
+    def get_keys(self):
+        _cross('MovieSceneScriptingChannel.get_keys')
+        return list(self.keys)
+
+class AnimationParams:
+    def __init__(self):
+        self.animation = None
+
+class MovieSceneSection:
+    num_channels = 9
+
+    def __init__(self):
+        self.range = None
+        self.channels = [MovieSceneScriptingChannel() for _ in range(self.num_channels)]
+        self.params = AnimationParams()
+
+    def set_range(self, start_frame, end_frame):
+        _cross('MovieSceneSection.set_range')
+        self.range = (start_frame, end_frame)
+
+    def get_all_channels(self):
+        _cross('MovieSceneSection.get_all_channels')
+        return self.channels
+
+class MovieSceneCameraCutSection(MovieSceneSection):
+    num_channels = 0
+
+    def set_camera_binding_id(self, binding_id):
+        _cross('MovieSceneCameraCutSection.set_camera_binding_id')
+        self.binding_id = binding_id
+
+class MovieSceneCameraCutTrack(MovieSceneTrack):
+    section_class = MovieSceneCameraCutSection
+
+class MovieScene3DTransformTrack(MovieSceneTrack):
+    section_class = MovieSceneSection
+
+class MovieSceneSkeletalAnimationTrack(MovieSceneTrack):
+    section_class = MovieSceneSection
+
+class MovieSceneFloatTrack(MovieSceneTrack):
+    section_class = MovieSceneSection
+
+class MovieSceneBindingProxy:
+    def __init__(self, sequence, bound_object):
+        self.sequence = sequence
+        self.bound_object = bound_object
+        self.tracks = []
+
+    def add_track(self, track_class):
+        _cross('MovieSceneBindingProxy.add_track')
+        track = track_class()
+        self.tracks.append(track)
+        return track
+
+    def remove(self):
+        _cross('MovieSceneBindingProxy.remove')
+        self.sequence.bindings.remove(self)
+
+class LevelSequence:
+    def __init__(self, num_bindings=0):
+        camera_cut_track = MovieSceneCameraCutTrack()
+        camera_cut_track.sections.append(MovieSceneCameraCutSection())
+        self.tracks = [camera_cut_track]
+        self.bindings = [MovieSceneBindingProxy(self, None) for _ in range(num_bindings)]
+
+    def get_tracks(self):
+        _cross('MovieSceneSequence.get_tracks')
+        return list(self.tracks)
+
+    def get_bindings(self):
+        _cross('MovieSceneSequence.get_bindings')
+        return list(self.bindings)
+
+    def add_possessable(self, obj):
+        _cross('MovieSceneSequence.add_possessable')
+        binding = MovieSceneBindingProxy(self, obj)
+        self.bindings.append(binding)
+        return binding
+
+    def add_spawnable_from_instance(self, obj):
+        _cross('MovieSceneSequence.add_spawnable_from_instance')
+        return self.add_possessable(obj)
+
+    def get_binding_id(self, binding):
+        _cross('MovieSceneSequence.get_binding_id')
+        return id(binding)
+
+    def get_display_rate(self):
+        _cross('MovieSceneSequence.get_display_rate')
+        return FrameRate(30, 1)
+
+    def get_playback_start(self):
+        _cross('MovieSceneSequence.get_playback_start')
+        return 0
+
+    def get_playback_end(self):
+        _cross('MovieSceneSequence.get_playback_end')
+        return 300
+
+
+configure()
@@ -0,0 +1,160 @@
+import csv
+import math
+import os
+import random
+
+from .engine import unreal
+from .motion_sampling import sample_bone_rotations, pose_change_per_frame
+
+ANIMATION_CATALOG_FILE = "animation_catalog.csv"
+BAKED_CHARACTER_ROOT = '/Game/ActorcoreCharacterBaked'
+
+# Histogram edges for the per-frame pose change (radians), see motion_sampling.pose_change_per_frame
+ENERGY_BIN_EDGES = [0.0, 0.005, 0.01, 0.02, 0.04, 0.08, 0.16]
+
+# First matching keyword (in the animation name) wins
+CATEGORY_KEYWORDS = [
+    ('sit', ('sit', 'chair', 'seat')),
+    ('dance', ('dance', 'catwalk')),
+    ('run', ('run', 'jog', 'sprint')),
+    ('walk', ('walk', 'stroll')),
+    ('talk', ('talk', 'phone', 'chat', 'wave', 'gesture')),
+    ('idle', ('idle', 'stand', 'wait', 'pose')),
+]
+
+CATALOG_COLUMNS = ['animation', 'skeletal_mesh', 'character', 'category', 'length', 'num_frames',
+                   'root_displacement', 'mean_change'] + [f'energy_{i}' for i in range(len(ENERGY_BIN_EDGES))]
+
+
+def default_catalog_path():
+    return os.path.join(unreal.Paths.project_saved_dir(), ANIMATION_CATALOG_FILE)
+
+def energy_histogram(changes):
+    counts = [0] * len(ENERGY_BIN_EDGES)
+    for change in changes:
+        bin_index = 0
+        while bin_index + 1 < len(ENERGY_BIN_EDGES) and change >= ENERGY_BIN_EDGES[bin_index + 1]:
+            bin_index += 1
+        counts[bin_index] += 1
+    total = max(len(changes), 1)
+    return [round(c / total, 4) for c in counts]
+
+def categorize(animation_name, mean_change, root_displacement):
+    lowered = animation_name.lower()
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(k in lowered for k in keywords):
+            return category
+    # no keyword, fall back to how much the character moves
+    if root_displacement > 100.0:
+        return 'locomotion'
+    if mean_change < ENERGY_BIN_EDGES[2]:
+        return 'idle'
+    return 'gesture'
+
+def asset_path(asset_data):
+    return f"{asset_data.package_name}.{asset_data.asset_name}"
+
+def build_catalog(root=BAKED_CHARACTER_ROOT):
+    # Needs the editor: loads every animation once
+    registry = unreal.AssetRegistryHelpers.get_asset_registry()
+    asset_datas = registry.get_assets_by_path(root, recursive=True)
+
+    skeletal_meshes = {}
+    animations = []
+    for asset_data in asset_datas:
+        asset_class = asset_data.asset_class_path.asset_name
+        if asset_class == 'SkeletalMesh':
+            skeletal_meshes[str(asset_data.package_path)] = asset_data
+        elif asset_class == 'AnimSequence':
+            animations.append(asset_data)
+
+    entries = []
+    for asset_data in animations:
+        character = str(asset_data.package_path)
+        mesh_data = skeletal_meshes.get(character)
+        if mesh_data is None:
+            continue
+        # skip the A-pose animation baked alongside every character
+        if str(asset_data.asset_name) == f"{mesh_data.asset_name}_Anim":
+            continue
+
+        animation_asset = unreal.load_asset(asset_path(asset_data))
+        rotations, root_translations = sample_bone_rotations(animation_asset)
+        changes = pose_change_per_frame(rotations, root_translations)
+        mean_change = sum(changes) / max(len(changes), 1)
+        root_displacement = math.dist(root_translations[0], root_translations[-1]) if root_translations else 0.0
+
+        entries.append({
+            'animation': asset_path(asset_data),
+            'skeletal_mesh': asset_path(mesh_data),
+            'character': character,
+            'category': categorize(str(asset_data.asset_name), mean_change, root_displacement),
+            'length': animation_asset.get_editor_property('sequence_length'),
+            'num_frames': len(rotations),
+            'root_displacement': root_displacement,
+            'mean_change': mean_change,
+            'energy_histogram': energy_histogram(changes),
+        })
+        unreal.log(f"Catalogued {entries[-1]['animation']} ({entries[-1]['category']})")
+
+    return entries
+
+def save_catalog(entries, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CATALOG_COLUMNS)
+        for e in entries:
+            writer.writerow([e['animation'], e['skeletal_mesh'], e['character'], e['category'],
+                             round(e['length'], 4), e['num_frames'], round(e['root_displacement'], 2),
+                             round(e['mean_change'], 5)] + e['energy_histogram'])
+
+def load_catalog(path):
+    entries = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            entries.append({
+                'animation': row['animation'],
+                'skeletal_mesh': row['skeletal_mesh'],
+                'character': row['character'],
+                'category': row['category'],
+                'length': float(row['length']),
+                'num_frames': int(row['num_frames']),
+                'root_displacement': float(row['root_displacement']),
+                'mean_change': float(row['mean_change']),
+                'energy_histogram': [float(row[f'energy_{i}']) for i in range(len(ENERGY_BIN_EDGES))],
+            })
+    return entries
+
+def filter_catalog(entries, character=None, categories=None, min_length=None, max_length=None):
+    filtered = []
+    for e in entries:
+        if character is not None and e['character'] != character:
+            continue
+        if categories is not None and e['category'] not in categories:
+            continue
+        if min_length is not None and e['length'] < min_length:
+            continue
+        if max_length is not None and e['length'] > max_length:
+            continue
+        filtered.append(e)
+    return filtered
+
+def sample_animation(entries, category_weights=None, stratify=True):
+    # Stratified draw: pick a category first (uniformly, or by category_weights),
+    # then an animation within it, so rare motion types are not drowned out.
+    if not entries:
+        raise ValueError("No catalogued animations match the filters")
+    if not stratify:
+        return random.choice(entries)
+
+    by_category = {}
+    for e in entries:
+        by_category.setdefault(e['category'], []).append(e)
+    categories = sorted(by_category)
+    weights = [1.0 if category_weights is None else category_weights.get(c, 0.0) for c in categories]
+    if sum(weights) <= 0:
+        raise ValueError(f"No positive category weight among {categories}")
+    category = random.choices(categories, weights=weights)[0]
+    return random.choice(by_category[category])
+
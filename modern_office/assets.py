@@ -0,0 +1,156 @@
+import random
+import re
+import os
+from typing import Optional, Callable
+
+from .engine import unreal
+
+# asset classes whose loaded instances are counted by the memory telemetry
+LOADED_ASSET_CLASSES = ('SkeletalMesh', 'AnimSequence', 'TextureCube', 'StaticMesh', 'MaterialInstanceConstant')
+
+# label of the skylight copies kept by lighting.SkyLightPool, not the level's own skylight
+POOLED_SKYLIGHT_PREFIX = 'PooledSkyLight'
+# interior lights, grouped by their outliner folder
+INTERIOR_LIGHT_CLASSES = ('PointLight', 'SpotLight', 'RectLight')
+# static mesh actors whose materials are randomized, by keyword in the actor label
+SURFACE_KEYWORDS = {
+    'desk': ('desk', 'table'),
+    'wall': ('wall',),
+    'floor': ('floor',),
+}
+
+# (assets_path, asset_class) -> asset paths, so the class filter only queries the registry once per batch
+_asset_list_cache = {}
+
+
+def list_assets(assets_path, asset_class=None):
+    key = (assets_path, asset_class)
+    if key in _asset_list_cache:
+        return _asset_list_cache[key]
+
+    eal = unreal.EditorAssetLibrary()
+    assets = eal.list_assets(assets_path)
+
+    if asset_class is not None:
+        filtered_assets = []
+        for asset in assets:
+            try:
+                asset_name = os.path.splitext(asset)[0]
+                if eal.find_asset_data(asset_name).asset_class_path.asset_name == asset_class:
+                    filtered_assets.append(asset)
+            except:
+                continue
+
+        assets = filtered_assets
+
+    _asset_list_cache[key] = list(assets)
+    return _asset_list_cache[key]
+
+def clear_asset_list_cache():
+    _asset_list_cache.clear()
+
+def select_random_asset(assets_path, asset_class=None, predicate:Optional[Callable]=None):
+    assets = list_assets(assets_path, asset_class)
+
+    if predicate is not None:
+        assets = [asset for asset in assets if predicate(asset)]
+
+    return random.choice(assets)
+
+def spawn_actor(asset_path, location=None, resources=None):
+    # spawn actor into level, at the origin by default; with resources (a SceneResources) the asset and actor are released on scene teardown
+    if location is None:
+        location = unreal.Vector(0.0, 0.0, 0.0)
+    obj = resources.load_asset(asset_path) if resources is not None else unreal.load_asset(asset_path)
+    rotation = unreal.Rotator(0, 0, 0)
+    actor = unreal.EditorLevelLibrary.spawn_actor_from_object(object_to_use=obj,
+                                                              location=location,
+                                                              rotation=rotation)
+
+    actor.set_actor_scale3d(unreal.Vector(1.0, 1.0, 1.0))
+    if resources is not None:
+        resources.track_actor(actor)
+
+    return actor
+
+def count_loaded_assets(class_names=LOADED_ASSET_CLASSES):
+    return {name: sum(1 for _ in unreal.ObjectIterator(getattr(unreal, name))) for name in class_names}
+
+def add_actor_to_layer(actor, layer_name="character"):
+    layer_subsystem = unreal.get_editor_subsystem(unreal.LayersSubsystem)
+    # Add the actor to the specified layer， if it doesn't exist, add_actor_to_layer will create it
+    layer_subsystem.add_actor_to_layer(actor, layer_name)
+
+class LevelActors:
+    def __init__(self):
+        # keyed by the number in the actor label, e.g. SuperCineCameraActor_3 / TargetPoint_3
+        self.cameras = {}
+        self.target_points = {}
+        self.skylight = None
+        self.camera_rig_rail = None
+        self.rail_camera = None
+        self.sun = None
+        # outliner folder -> lights
+        self.light_groups = {}
+        # surface name (SURFACE_KEYWORDS) -> static mesh actors
+        self.surfaces = {}
+        # every static mesh actor, the office the character layer passes hide
+        self.static_meshes = []
+
+def find_relevant_assets():
+    camera_re = re.compile("SuperCineCameraActor_([0-9]+)")
+    target_point_re = re.compile("TargetPoint_([0-9]+)")
+
+    level_actors = LevelActors()
+    all_actors = unreal.get_editor_subsystem(unreal.EditorActorSubsystem).get_all_level_actors()
+    for actor in all_actors:
+        label = actor.get_actor_label()
+        name  = actor.get_name()
+        camera_matches = camera_re.search(label)
+        target_point_matches = target_point_re.search(label)
+
+        if camera_matches is not None:
+            level_actors.cameras[camera_matches.group(1)] = actor
+        if target_point_matches is not None:
+            level_actors.target_points[target_point_matches.group(1)] = actor
+        if 'SkyLight' in name and not label.startswith(POOLED_SKYLIGHT_PREFIX):
+            level_actors.skylight = actor
+        if 'DirectionalLight' in name:
+            level_actors.sun = actor
+        if name.startswith(INTERIOR_LIGHT_CLASSES):
+            level_actors.light_groups.setdefault(str(actor.get_folder_path()), []).append(actor)
+        if name.startswith('StaticMeshActor'):
+            level_actors.static_meshes.append(actor)
+            lowered = label.lower()
+            for surface, keywords in SURFACE_KEYWORDS.items():
+                if any(k in lowered for k in keywords):
+                    level_actors.surfaces.setdefault(surface, []).append(actor)
+                    break
+        if 'CineCameraRigRail' in label:
+            level_actors.camera_rig_rail = actor
+            for child in actor.get_attached_actors():
+                if "Camera" in child.get_name():
+                    level_actors.rail_camera = child
+
+    return level_actors
+
+def random_hdri(hdri_backdrop):
+    selected_hdri_path = select_random_asset('/HDRIBackdrop/Textures')
+    hdri_texture = unreal.load_asset(selected_hdri_path)
+    hdri_backdrop.set_editor_property('cubemap', hdri_texture)
+    return selected_hdri_path
+
+def random_cubemap(skylight, resources=None, cubemap_path=None):
+    cubemap_path = cubemap_path or select_random_asset('/Game/HDRI/', asset_class='TextureCube')
+    cubemap_asset = resources.load_asset(cubemap_path) if resources is not None else unreal.load_asset(cubemap_path)
+
+    if cubemap_asset is not None:
+        # Access the skylight component
+        skylight_comp = skylight.get_editor_property('light_component')
+        # Assign the new cubemap
+        skylight_comp.set_editor_property('cubemap', cubemap_asset)
+
+        # Update the skylight to apply the new cubemap
+        skylight_comp.recapture_sky()
+
+    return cubemap_path
@@ -0,0 +1,89 @@
+import os
+
+try:
+    import numpy as np
+except ImportError:  # only the float16 conversion needs it
+    np = None
+
+from .layout import IMAGE_NAME_RE
+
+# Engine-free: depth and motion vectors exported from the same playback as a pass. The deferred
+# renderer computes both anyway; the Movie Render Queue writes them through its post-process
+# materials (render.enable_aux_outputs) as EXRs next to the pass's frames, which are moved to
+# <scene>/<name>/ and packed into float16 .npz arrays here.
+AUX_OUTPUTS = {
+    # scene depth in centimetres (world units), from R
+    'depth': {'material': '/MovieRenderPipeline/Materials/MovieRenderQueue_WorldDepth.MovieRenderQueue_WorldDepth',
+              'channels': 'R', 'offset': 0.0},
+    # screen-space velocity as the material encodes it, re-centred so zero is no motion
+    'motion': {'material': '/MovieRenderPipeline/Materials/MovieRenderQueue_MotionVectors.MovieRenderQueue_MotionVectors',
+               'channels': 'RG', 'offset': -0.5},
+}
+
+
+
+def render_pass_name(name):
+    # the MRQ names the images of a post-process material after the material
+    return AUX_OUTPUTS[name]['material'].rsplit('.', 1)[-1]
+
+def read_exr(path, channels):
+    # (height, width, len(channels)) float16
+    try:
+        import OpenEXR
+        import Imath
+    except ImportError as e:
+        raise ImportError("packing depth and motion needs OpenEXR (pip install OpenEXR numpy)") from e
+    exr = OpenEXR.InputFile(path)
+    try:
+        window = exr.header()['dataWindow']
+        width, height = window.max.x - window.min.x + 1, window.max.y - window.min.y + 1
+        half = Imath.PixelType(Imath.PixelType.HALF)
+        planes = [np.frombuffer(exr.channel(c, half), np.float16).reshape(height, width) for c in channels]
+    finally:
+        exr.close()
+    return np.stack(planes, axis=-1)
+
+def pack_frame(exr_path, name, npz_path):
+    output = AUX_OUTPUTS[name]
+    data = read_exr(exr_path, output['channels'])
+    if output['offset']:
+        data = (data.astype(np.float32) + output['offset']).astype(np.float16)
+    if data.shape[-1] == 1:
+        data = data[..., 0]
+    np.savez_compressed(npz_path, **{name: data})
+
+def export_aux_outputs(pass_dir, output_path, names, keep_final_exr=False):
+    # Moves the EXRs of every output in names from pass_dir to <output_path>/<name>/ and packs them
+    # as Image.<name>.<frame>.npz. Copies written by the pass's other image outputs (8-bit PNG/BMP)
+    # and, unless keep_final_exr, the EXR of the final image are removed. Without OpenEXR the EXRs
+    # stay in place of the .npz files. Returns {name: number of frames}.
+    render_passes = {render_pass_name(name): name for name in names}
+    moved = {name: [] for name in names}
+    for file_name in sorted(os.listdir(pass_dir)):
+        match = IMAGE_NAME_RE.match(file_name)
+        if match is None:
+            continue
+        path = os.path.join(pass_dir, file_name)
+        name = render_passes.get(match['render_pass'])
+        if name is None:
+            if match['extension'] == 'exr' and not keep_final_exr:
+                os.remove(path)
+        elif match['extension'] != 'exr':
+            os.remove(path)
+        else:
+            aux_dir = os.path.join(output_path, name)
+            os.makedirs(aux_dir, exist_ok=True)
+            target = os.path.join(aux_dir, f"Image.{name}.{match['frame']}.exr")
+            os.replace(path, target)
+            moved[name].append(target)
+
+    for name, exr_paths in moved.items():
+        for exr_path in exr_paths:
+            pack_frame(exr_path, name, f"{os.path.splitext(exr_path)[0]}.npz")
+            os.remove(exr_path)
+    return {name: len(exr_paths) for name, exr_paths in moved.items()}
+
+def load_aux_frame(path):
+    # one .npz written by export_aux_outputs: depth (height, width) or motion (height, width, 2), float16
+    with np.load(path) as data:
+        return data[data.files[0]]
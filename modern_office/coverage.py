@@ -0,0 +1,109 @@
+import itertools
+import os
+import random
+from collections import Counter
+
+from .manifest import Manifest
+
+# Engine-free: coverage-guided scene planning. Every scene is a combination of a character, one of
+# its animations, a camera (target point key) and a cubemap. Counts of every value and of every
+# pair of values across axes are kept, and each scene takes the least covered of a few random
+# candidates, so combinations that never appeared win over ones already rendered.
+AXES = ('character', 'animation', 'camera', 'cubemap')
+AXIS_PAIRS = list(itertools.combinations(range(len(AXES)), 2))
+DEFAULT_CANDIDATES = 16
+
+# manifest path -> CoverageSampler, shared by the scenes of a batch
+_samplers = {}
+
+
+def scene_combination(row):
+    # a manifest scenes row (or scene metadata) as (character, animation, camera, cubemap)
+    character = row.get('character')
+    if character is None and row.get('skeletal_mesh'):
+        character = os.path.dirname(row['skeletal_mesh'])
+    camera = row.get('camera_key') or row.get('target_point_key')
+    return (character, row.get('animation'), camera, row.get('cubemap'))
+
+def discount(counter, key):
+    # zero counts are dropped, so len(counter) stays the number of values seen
+    counter[key] -= 1
+    if counter[key] <= 0:
+        del counter[key]
+
+class CoverageSampler:
+    def __init__(self):
+        self.counts = [Counter() for _ in AXES]
+        self.pair_counts = Counter()
+        self.scenes = 0
+
+    def record(self, combination):
+        # O(1): one counter per axis and per axis pair
+        for axis, value in enumerate(combination):
+            if value is not None:
+                self.counts[axis][value] += 1
+        for a, b in AXIS_PAIRS:
+            if combination[a] is not None and combination[b] is not None:
+                self.pair_counts[(a, b, combination[a], combination[b])] += 1
+        self.scenes += 1
+
+    def forget(self, combination):
+        # undoes record(combination), e.g. when a later stage changed what the scene renders
+        for axis, value in enumerate(combination):
+            if value is not None:
+                discount(self.counts[axis], value)
+        for a, b in AXIS_PAIRS:
+            if combination[a] is not None and combination[b] is not None:
+                discount(self.pair_counts, (a, b, combination[a], combination[b]))
+        self.scenes -= 1
+
+    def score(self, combination):
+        # uncovered pairs first, then rarely seen values
+        pairs = sum(self.pair_counts[(a, b, combination[a], combination[b])] for a, b in AXIS_PAIRS
+                    if combination[a] is not None and combination[b] is not None)
+        singles = sum(self.counts[axis][value] for axis, value in enumerate(combination) if value is not None)
+        return pairs, singles
+
+    def choose(self, animations, cameras, cubemaps, candidates=DEFAULT_CANDIDATES, rng=random):
+        # animations: character -> animation paths; empty domains leave that axis to the stages (None)
+        characters = sorted(animations)
+        best, best_key = None, None
+        for _ in range(candidates):
+            character = rng.choice(characters) if characters else None
+            combination = (character,
+                           rng.choice(animations[character]) if character is not None else None,
+                           rng.choice(cameras) if cameras else None,
+                           rng.choice(cubemaps) if cubemaps else None)
+            key = self.score(combination)
+            if best_key is None or key < best_key:
+                best, best_key = combination, key
+        return best, best_key
+
+    def summary(self, animations=None, cameras=None, cubemaps=None):
+        # distinct values seen per axis; with the domains, the fraction of cross-axis pairs covered
+        summary = {'scenes': self.scenes, 'values': {axis: len(self.counts[i]) for i, axis in enumerate(AXES)}}
+        if animations is not None:
+            sizes = [len(animations), sum(len(a) for a in animations.values()), len(cameras or ()), len(cubemaps or ())]
+            # animations belong to one character each
+            possible = sum(sizes[1] if (a, b) == (0, 1) else sizes[a] * sizes[b] for a, b in AXIS_PAIRS)
+            summary['pair_coverage'] = round(len(self.pair_counts) / possible, 4) if possible else None
+        return summary
+
+def load_coverage(manifest):
+    # every scene the manifest has not seen fail counts as covered
+    sampler = CoverageSampler()
+    for row in manifest.query_scenes(status=['complete', 'rendering']):
+        sampler.record(scene_combination(row))
+    return sampler
+
+def get_coverage_sampler(manifest_path=None):
+    if manifest_path not in _samplers:
+        if manifest_path is not None and os.path.exists(manifest_path):
+            manifest = Manifest(manifest_path)
+            try:
+                _samplers[manifest_path] = load_coverage(manifest)
+            finally:
+                manifest.close()
+        else:
+            _samplers[manifest_path] = CoverageSampler()
+    return _samplers[manifest_path]
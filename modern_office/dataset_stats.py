@@ -0,0 +1,243 @@
+import json
+import os
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:  # accumulating needs it, importing this module doesn't
+    np = None
+
+from .layout import DATASET_STATS_FILE, STATS_FILE, pass_dir
+from .manifest import scene_row
+from .plates import pass_frames, read_image
+
+# Engine-free: dataset statistics kept up to date as scenes finish, so training doesn't need a
+# pass over every frame first. Every accumulator is mergeable, so a scene's stats, a batch's and
+# a node's all combine into the same totals, in any order:
+#   moments     per pass, per channel count/mean/M2 of the pixel values in [0, 1] (Welford's
+#               update, merged with Chan et al.'s pairwise formula); variance = M2 / count
+#   values      per pass, per channel histogram of the 8-bit values (exact percentiles)
+#   coverage    per mask pass, histogram of the character's coverage of the frame (labels.py)
+#   frames      per pass, frames accumulated
+#   characters  frames per character (the skeletal mesh's package folder, as in the manifest)
+#   animations  frames per animation
+# Written per scene to <scene>/stats.json and per batch to <output_root>/dataset_stats.json.
+STATS_VERSION = 1
+VALUE_BINS = 256
+# coverage of the frame, in steps of 1%
+COVERAGE_BINS = 100
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("dataset statistics need numpy (pip install numpy)")
+
+class RunningMoments:
+    def __init__(self, channels):
+        self.count = 0
+        self.mean = np.zeros(channels)
+        self.m2 = np.zeros(channels)
+
+    def add(self, count, mean, m2):
+        # Chan et al.: merges the moments of another set of values into these
+        if count == 0:
+            return
+        mean, m2 = np.asarray(mean, np.float64), np.asarray(m2, np.float64)
+        if mean.shape != self.mean.shape:
+            raise ValueError(f"Cannot merge moments of {mean.shape[0]} channels into {self.mean.shape[0]}")
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / total)
+        self.count = total
+
+    def update_histogram(self, counts, centers):
+        # counts (channels, bins) of values at centers, e.g. the 256 levels of 8-bit pixels
+        n = counts.sum(axis=1)
+        if not n.any():
+            return
+        mean = counts @ centers / n
+        self.add(int(n[0]), mean, (counts * (centers[None, :] - mean[:, None]) ** 2).sum(axis=1))
+
+    def merge(self, other):
+        self.add(other.count, other.mean, other.m2)
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else np.full_like(self.m2, np.nan)
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean.tolist(), 'm2': self.m2.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        moments = cls(len(data['mean']))
+        moments.add(data['count'], data['mean'], data['m2'])
+        return moments
+
+class Histogram:
+    # fixed bins over [low, high], so histograms of the same layout merge by adding counts
+    def __init__(self, bins, low=0.0, high=1.0, channels=None):
+        self.bins, self.low, self.high = bins, low, high
+        self.counts = np.zeros((bins,) if channels is None else (channels, bins), np.int64)
+
+    def layout(self):
+        return self.bins, self.low, self.high, self.counts.shape
+
+    def empty(self):
+        return Histogram(self.bins, self.low, self.high, self.counts.shape[0] if self.counts.ndim == 2 else None)
+
+    def update(self, values):
+        # one channel; values outside [low, high] land in the first or last bin
+        index = ((np.asarray(values, np.float64) - self.low) * (self.bins / (self.high - self.low))).astype(np.int64)
+        self.counts += np.bincount(np.clip(index, 0, self.bins - 1).ravel(), minlength=self.bins)
+
+    def merge(self, other):
+        if other.layout() != self.layout():
+            raise ValueError(f"Cannot merge a histogram of {other.layout()} into {self.layout()}")
+        self.counts += other.counts
+
+    def quantile(self, q):
+        # the upper edge of the bin the q-th value falls in, per channel
+        cumulative = np.cumsum(self.counts, axis=-1)
+        index = np.argmax(cumulative >= q * cumulative[..., -1:], axis=-1)
+        return self.low + (index + 1) * (self.high - self.low) / self.bins
+
+    def to_dict(self):
+        return {'bins': self.bins, 'low': self.low, 'high': self.high, 'counts': self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data['bins'], data['low'], data['high'])
+        histogram.counts = np.asarray(data['counts'], np.int64)
+        return histogram
+
+def frame_value_counts(pixels):
+    # (height, width, channels) uint8 -> (channels, VALUE_BINS) counts, one bincount for every channel
+    channels = pixels.shape[-1]
+    offsets = np.arange(channels, dtype=np.int32) * VALUE_BINS
+    return np.bincount((pixels.reshape(-1, channels) + offsets).ravel(),
+                       minlength=channels * VALUE_BINS).reshape(channels, VALUE_BINS)
+
+class DatasetStats:
+    def __init__(self):
+        require_numpy()
+        self.scenes = 0
+        self.moments = {}
+        self.values = {}
+        self.coverage = {}
+        self.frames = Counter()
+        self.characters = Counter()
+        self.animations = Counter()
+
+    def add_frame(self, pass_name, pixels):
+        # pixels (height, width, channels) uint8
+        counts = frame_value_counts(pixels)
+        channels = counts.shape[0]
+        if pass_name not in self.moments:
+            self.moments[pass_name] = RunningMoments(channels)
+            self.values[pass_name] = Histogram(VALUE_BINS, 0, VALUE_BINS, channels=channels)
+        # from the frame's histogram, exact for 8-bit values and cheaper than the pixels themselves
+        self.moments[pass_name].update_histogram(counts, np.arange(VALUE_BINS) / (VALUE_BINS - 1))
+        self.values[pass_name].counts += counts
+        self.frames[pass_name] += 1
+
+    def add_pass(self, output_path, pass_name):
+        # every image of a scene's pass; returns the frames added
+        frames = pass_frames(pass_dir(output_path, pass_name))
+        for number in sorted(frames):
+            self.add_frame(pass_name, read_image(frames[number]))
+        return len(frames)
+
+    def add_coverage(self, pass_name, coverage):
+        # the coverage column of a mask pass's label table
+        self.coverage.setdefault(pass_name, Histogram(COVERAGE_BINS)).update(coverage)
+
+    def add_scene(self, metadata, frames=None):
+        # frames: the scene's frames, by default those of its pass with the most
+        frames = max(self.frames.values(), default=0) if frames is None else frames
+        row = scene_row(metadata)
+        if row['character'] is not None:
+            self.characters[row['character']] += frames
+        if row['animation'] is not None:
+            self.animations[row['animation']] += frames
+        self.scenes += 1
+
+    def merge(self, other):
+        for pass_name, moments in other.moments.items():
+            self.moments.setdefault(pass_name, RunningMoments(len(moments.mean))).merge(moments)
+        for histograms, other_histograms in ((self.values, other.values), (self.coverage, other.coverage)):
+            for pass_name, histogram in other_histograms.items():
+                histograms.setdefault(pass_name, histogram.empty()).merge(histogram)
+        self.frames.update(other.frames)
+        self.characters.update(other.characters)
+        self.animations.update(other.animations)
+        self.scenes += other.scenes
+        return self
+
+    def summary(self):
+        # what a training run normalizes with: per pass channel mean and std in [0, 1]
+        return {
+            'scenes': self.scenes,
+            'passes': {pass_name: {'frames': self.frames[pass_name],
+                                   'mean': np.round(moments.mean, 5).tolist(),
+                                   'std': np.round(np.sqrt(moments.variance), 5).tolist()}
+                       for pass_name, moments in self.moments.items()},
+            'coverage_median': {pass_name: round(float(histogram.quantile(0.5)), 3)
+                                for pass_name, histogram in self.coverage.items()},
+            'characters': len(self.characters),
+            'animations': len(self.animations),
+        }
+
+    def to_dict(self):
+        return {
+            'version': STATS_VERSION,
+            'scenes': self.scenes,
+            'summary': self.summary(),
+            'moments': {name: moments.to_dict() for name, moments in self.moments.items()},
+            'values': {name: histogram.to_dict() for name, histogram in self.values.items()},
+            'coverage': {name: histogram.to_dict() for name, histogram in self.coverage.items()},
+            'frames': dict(self.frames),
+            'characters': dict(self.characters),
+            'animations': dict(self.animations),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != STATS_VERSION:
+            raise ValueError(f"Dataset stats version {data.get('version')}, expected {STATS_VERSION}")
+        stats = cls()
+        stats.scenes = data['scenes']
+        stats.moments = {name: RunningMoments.from_dict(d) for name, d in data['moments'].items()}
+        stats.values = {name: Histogram.from_dict(d) for name, d in data['values'].items()}
+        stats.coverage = {name: Histogram.from_dict(d) for name, d in data['coverage'].items()}
+        stats.frames.update(data['frames'])
+        stats.characters.update(data['characters'])
+        stats.animations.update(data['animations'])
+        return stats
+
+def write_stats(stats, path):
+    partial = f"{path}.partial"
+    with open(partial, 'w') as f:
+        json.dump(stats.to_dict(), f)
+    os.replace(partial, path)
+    return path
+
+def load_stats(path):
+    with open(path) as f:
+        return DatasetStats.from_dict(json.load(f))
+
+def find_stats_files(root, scenes=False):
+    # a batch's dataset_stats.json, or with scenes=True (or none written) the stats.json of its scenes;
+    # root may also be a scene folder
+    batch_path = os.path.join(root, DATASET_STATS_FILE)
+    if not scenes and os.path.exists(batch_path):
+        return [batch_path]
+    candidates = [root] + [os.path.join(root, name) for name in sorted(os.listdir(root))]
+    return [os.path.join(scene, STATS_FILE) for scene in candidates if os.path.exists(os.path.join(scene, STATS_FILE))]
+
+def merge_stats_files(paths):
+    stats = DatasetStats()
+    for path in paths:
+        stats.merge(load_stats(path))
+    return stats
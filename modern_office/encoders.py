@@ -0,0 +1,271 @@
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait
+
+try:
+    import numpy as np
+except ImportError:  # PNG filtering is faster with it, QOI needs it
+    np = None
+
+# Engine-free: output encoders for the rendered frames. 'png', 'bmp' and 'exr' are written by the
+# Movie Render Queue itself. The others have it write uncompressed BMP intermediates, which
+# FrameWriterPool transcodes off the editor thread while the GPU renders the next pass; zlib,
+# libwebp and qoi release the GIL while encoding, so a thread pool scales with the cores.
+
+# encoder name -> MRQ output format, file extension, whether the intermediate keeps alpha, encode(frame, path, **options)
+ENCODERS = {}
+
+
+class Frame:
+    # 8-bit pixels, rows top-down, RGB or RGBA interleaved
+    __slots__ = ('width', 'height', 'channels', 'pixels')
+
+    def __init__(self, width, height, channels, pixels):
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.pixels = pixels
+
+
+def register_encoder(name, intermediate, extension, alpha, encode=None):
+    ENCODERS[name] = {'intermediate': intermediate, 'extension': extension, 'alpha': alpha, 'encode': encode}
+
+def needs_transcode(encoder):
+    return ENCODERS[encoder]['intermediate'] != ENCODERS[encoder]['extension']
+
+
+# BMP
+
+def read_bmp(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:2] != b'BM':
+        raise ValueError(f"{path} is not a BMP file")
+    offset, = struct.unpack_from('<I', data, 10)
+    _, width, height, _, bits, compression = struct.unpack_from('<IiiHHI', data, 14)
+    if bits not in (24, 32) or compression not in (0, 3):
+        raise ValueError(f"{path}: unsupported BMP ({bits} bits, compression {compression})")
+    channels = bits // 8
+    row_bytes = width * channels
+    stride = (row_bytes + 3) & ~3
+    rows = [data[offset + y * stride:offset + y * stride + row_bytes] for y in range(abs(height))]
+    if height > 0:
+        # bottom-up unless the height is negative
+        rows.reverse()
+    pixels = bytearray(b''.join(rows))
+    # BGR(A) -> RGB(A)
+    pixels[0::channels], pixels[2::channels] = pixels[2::channels], pixels[0::channels]
+    return Frame(width, abs(height), channels, pixels)
+
+def encode_bmp(frame, path):
+    # top-down BGR(A), the layout read_bmp and the MRQ write
+    channels = frame.channels
+    row_bytes = frame.width * channels
+    padding = b'\x00' * (((row_bytes + 3) & ~3) - row_bytes)
+    pixels = bytearray(frame.pixels)
+    pixels[0::channels], pixels[2::channels] = pixels[2::channels], pixels[0::channels]
+    image = b''.join(pixels[y * row_bytes:(y + 1) * row_bytes] + padding for y in range(frame.height))
+    header = struct.pack('<2sIHHI', b'BM', 54 + len(image), 0, 0, 54)
+    info = struct.pack('<IiiHHIIiiII', 40, frame.width, -frame.height, 1, channels * 8, 0, len(image), 2835, 2835, 0, 0)
+    with open(path, 'wb') as f:
+        f.write(header + info + image)
+
+
+# PNG, with a tunable deflate level
+
+def png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+def encode_png(frame, path, compress_level=1):
+    channels = frame.channels
+    row_bytes = frame.width * channels
+    if np is not None:
+        # 'Sub' filter on every row: deflates much better than unfiltered rows for little work
+        rows = np.frombuffer(bytes(frame.pixels), np.uint8).reshape(frame.height, row_bytes)
+        filtered = np.empty((frame.height, row_bytes + 1), np.uint8)
+        filtered[:, 0] = 1
+        filtered[:, 1:channels + 1] = rows[:, :channels]
+        np.subtract(rows[:, channels:], rows[:, :-channels], out=filtered[:, channels + 1:])
+        raw = filtered.tobytes()
+    else:
+        raw = b''.join(b'\x00' + frame.pixels[y * row_bytes:(y + 1) * row_bytes] for y in range(frame.height))
+    color_type = 6 if channels == 4 else 2
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(png_chunk(b'IHDR', struct.pack('>IIBBBBB', frame.width, frame.height, 8, color_type, 0, 0, 0)))
+        f.write(png_chunk(b'IDAT', zlib.compress(raw, compress_level)))
+        f.write(png_chunk(b'IEND', b''))
+
+# color type -> channels of the 8-bit, non-interlaced PNGs the MRQ and encode_png write
+PNG_CHANNELS = {0: 1, 2: 3, 4: 2, 6: 4}
+
+def unfilter_png_rows(raw, height, row_bytes, bpp):
+    # undoes the five PNG row filters; rows filtered with None/Sub/Up (encode_png's) one row at a time
+    rows = np.frombuffer(raw, np.uint8).reshape(height, row_bytes + 1)
+    kinds = rows[:, 0]
+    if kinds.max() > 4:
+        raise ValueError(f"Unknown PNG filter {kinds.max()}")
+    if kinds.max() <= 2:
+        out = np.zeros((height + 1, row_bytes), np.uint8)
+        for y in range(height):
+            kind, line = kinds[y], rows[y, 1:]
+            if kind == 0:
+                out[y + 1] = line
+            elif kind == 1:
+                # running sum per channel, wrapping at 256
+                out[y + 1] = np.cumsum(line.reshape(-1, bpp), axis=0, dtype=np.uint8).ravel()
+            else:
+                np.add(line, out[y], out=out[y + 1])
+        return out[1:]
+    # Average and Paeth depend on the pixel to the left, above and above left, so pixels are
+    # decoded one anti-diagonal (y + x = k) at a time: every pixel of a diagonal at once
+    width = row_bytes // bpp
+    filtered = rows[:, 1:].reshape(height, width, bpp).astype(np.int16)
+    # padded with a zero row above and a zero column to the left
+    out = np.zeros((height + 1, width + 1, bpp), np.int16)
+    all_ys = np.arange(height)
+    for k in range(height + width - 1):
+        y0, y1 = max(0, k - width + 1), min(height, k + 1)
+        ys = all_ys[y0:y1]
+        xs = k - ys
+        a, b, c = out[ys + 1, xs], out[ys, xs + 1], out[ys, xs]
+        kind = kinds[y0:y1, None]
+        pa, pb, pc = np.abs(b - c), np.abs(a - c), np.abs(a + b - 2 * c)
+        prediction = np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+        prediction = np.where(kind == 4, prediction, np.where(kind == 3, (a + b) >> 1,
+                                                              np.where(kind == 2, b, np.where(kind == 1, a, 0))))
+        out[ys + 1, xs + 1] = (filtered[ys, xs] + prediction) & 0xFF
+    return out[1:, 1:].astype(np.uint8).reshape(height, row_bytes)
+
+def read_png(path):
+    # Pillow-free decoder for 8-bit, non-interlaced PNGs, so engine-free tools read frames without it
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:8] != b'\x89PNG\r\n\x1a\n':
+        raise ValueError(f"{path} is not a PNG file")
+    position, idat = 8, []
+    while position < len(data):
+        length, = struct.unpack_from('>I', data, position)
+        kind, body = data[position + 4:position + 8], data[position + 8:position + 8 + length]
+        if kind == b'IHDR':
+            width, height, depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', body)
+        elif kind == b'IDAT':
+            idat.append(body)
+        elif kind == b'IEND':
+            break
+        position += length + 12
+    if depth != 8 or color_type not in PNG_CHANNELS or interlace:
+        raise ValueError(f"{path}: unsupported PNG (depth {depth}, color type {color_type}, interlace {interlace})")
+    channels = PNG_CHANNELS[color_type]
+    raw = zlib.decompress(b''.join(idat))
+    if np is None:
+        raise ImportError("reading PNG frames without Pillow needs numpy (pip install numpy)")
+    pixels = unfilter_png_rows(raw, height, width * channels, channels)
+    return Frame(width, height, channels, pixels.tobytes())
+
+
+# QOI and lossless WebP, optional packages
+
+def encode_qoi(frame, path):
+    try:
+        import qoi
+    except ImportError as e:
+        raise ImportError("the qoi encoder needs the qoi package (pip install qoi numpy)") from e
+    qoi.write(path, np.frombuffer(bytes(frame.pixels), np.uint8).reshape(frame.height, frame.width, frame.channels))
+
+def encode_webp(frame, path, method=0):
+    # lossless; method 0 (fastest) to 6 (smallest)
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise ImportError("the webp encoder needs Pillow (pip install Pillow)") from e
+    mode = 'RGBA' if frame.channels == 4 else 'RGB'
+    Image.frombuffer(mode, (frame.width, frame.height), bytes(frame.pixels), 'raw', mode, 0, 1).save(
+        path, 'WEBP', lossless=True, quality=100, method=method)
+
+
+# EXR, half floats
+
+def encode_exr(frame, path, compression='ZIP'):
+    # the MRQ writes these itself; this is for comparing against the other encoders offline
+    try:
+        import OpenEXR
+        import Imath
+    except ImportError as e:
+        raise ImportError("writing EXR outside the editor needs OpenEXR (pip install OpenEXR numpy)") from e
+    names = 'RGBA'[:frame.channels]
+    pixels = np.frombuffer(bytes(frame.pixels), np.uint8).reshape(frame.height, frame.width, frame.channels)
+    half = (pixels / np.float32(255.0)).astype(np.float16)
+    header = OpenEXR.Header(frame.width, frame.height)
+    header['channels'] = {c: Imath.Channel(Imath.PixelType(Imath.PixelType.HALF)) for c in names}
+    header['compression'] = Imath.Compression(getattr(Imath.Compression, f"{compression}_COMPRESSION"))
+    exr = OpenEXR.OutputFile(path, header)
+    exr.writePixels({c: np.ascontiguousarray(half[:, :, i]).tobytes() for i, c in enumerate(names)})
+    exr.close()
+
+
+register_encoder('png', 'png', 'png', alpha=True, encode=encode_png)
+register_encoder('bmp', 'bmp', 'bmp', alpha=False, encode=encode_bmp)
+register_encoder('exr', 'exr', 'exr', alpha=True, encode=encode_exr)
+# MRQ BMP intermediates have no alpha channel, so these are for passes that don't keep it
+register_encoder('png_zlib', 'bmp', 'png', alpha=False, encode=encode_png)
+register_encoder('qoi', 'bmp', 'qoi', alpha=False, encode=encode_qoi)
+register_encoder('webp', 'bmp', 'webp', alpha=False, encode=encode_webp)
+
+
+def transcode_frame(source_path, encoder, options=None, delete_source=True):
+    target_path = f"{os.path.splitext(source_path)[0]}.{ENCODERS[encoder]['extension']}"
+    try:
+        ENCODERS[encoder]['encode'](read_bmp(source_path), target_path, **(options or {}))
+    except Exception:
+        # the intermediate stays the frame, no half-written file next to it
+        if os.path.exists(target_path):
+            os.remove(target_path)
+        raise
+    if delete_source:
+        os.remove(source_path)
+    return target_path
+
+class FrameWriterPool:
+    # Transcodes intermediate frames on a bounded thread pool. submit() blocks once max_pending
+    # frames are queued, so intermediates can't pile up on disk faster than they are encoded.
+    def __init__(self, max_workers=4, max_pending=64):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='frame-writer')
+        self.pending = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.written = 0
+        self.failed = []
+
+    def submit(self, source_path, encoder, options=None, delete_source=True):
+        self.pending.acquire()
+        try:
+            return self.pool.submit(self.transcode, source_path, encoder, options, delete_source)
+        except Exception:
+            self.pending.release()
+            raise
+
+    def transcode(self, source_path, encoder, options, delete_source):
+        try:
+            target_path = transcode_frame(source_path, encoder, options, delete_source)
+            with self.lock:
+                self.written += 1
+            return target_path
+        except Exception as e:
+            with self.lock:
+                self.failed.append((source_path, repr(e)))
+            return None
+        finally:
+            self.pending.release()
+
+    def transcode_pass(self, pass_dir, encoder, options=None, delete_source=True):
+        # every intermediate in pass_dir; blocks until they are written, returns the failed sources
+        intermediate = f".{ENCODERS[encoder]['intermediate']}"
+        sources = sorted(os.path.join(pass_dir, name) for name in os.listdir(pass_dir) if name.endswith(intermediate))
+        futures = {self.submit(source, encoder, options, delete_source): source for source in sources}
+        wait(futures)
+        return [source for future, source in futures.items() if future.result() is None]
+
+    def close(self, wait=True):
+        self.pool.shutdown(wait=wait)
@@ -0,0 +1,43 @@
+import importlib
+import sys
+
+# The only import of the editor's `unreal` module. Engine-facing modules do
+#   from .engine import unreal
+# and the module is imported on the first attribute access, so everything in modern_office can be
+# imported on a plain Python install (planners, validators, dataset tools); only calling into the
+# engine needs the editor.
+#
+# Engine-free core, no engine access at all:
+#   coverage, trajectory, layout, manifest, scene_metadata, orchestrator, encoders, video,
+#   aux_outputs, metrics, labels, plates, dataset_stats, telemetry, storage, profiler
+# Engine adapter, needs the editor when called:
+#   assets, animation_catalog (build_catalog), keyframes, sequencer, lighting, materials,
+#   rail_paths, motion_sampling, resources, render, stages, warmup, quality_benchmark, pipeline
+ENGINE_MODULE = 'unreal'
+
+_engine = None
+
+
+def load_engine():
+    global _engine
+    if _engine is None:
+        try:
+            _engine = importlib.import_module(ENGINE_MODULE)
+        except ImportError as e:
+            raise ImportError("this needs the Unreal Editor's Python environment (the unreal module)") from e
+    return _engine
+
+def engine_loaded():
+    return _engine is not None or ENGINE_MODULE in sys.modules
+
+class LazyEngine:
+    # stands in for the unreal module until an attribute is used
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        return getattr(load_engine(), name)
+
+    def __repr__(self):
+        return f"<lazy {ENGINE_MODULE} module{'' if _engine is None else ' (loaded)'}>"
+
+unreal = LazyEngine()
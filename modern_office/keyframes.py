@@ -0,0 +1,80 @@
+from .engine import unreal
+from .trajectory import simplify_keys
+
+# MovieScene3DTransformSection channel order
+LOCATION_CHANNELS = (0, 1, 2)
+ROTATION_CHANNELS = (3, 4, 5)
+SCALE_CHANNELS = (6, 7, 8)
+
+# Key reduction tolerances: centimetres, degrees and millimetres of focal length.
+# None writes every key as given.
+LOCATION_TOLERANCE = 0.5
+ROTATION_TOLERANCE = 0.1
+FOCAL_LENGTH_TOLERANCE = 0.1
+
+
+class KeyframeWriter:
+    # Takes whole arrays per channel group and writes them in one pass. Every add_key is an
+    # engine call, so dense curves are first reduced to the keys needed to stay within
+    # tolerance; FrameNumbers are created once per key time and shared by the group.
+    def __init__(self, section):
+        self.section = section
+        self.channels = section.get_all_channels()
+        self.pending = []
+
+    def add(self, channel_indices, frames, values, tolerance=None, interpolation=None, seed_keys=None):
+        # values: (len(frames), len(channel_indices)) array or sequence of rows;
+        # interpolation: a MovieSceneKeyInterpolation, the engine default (auto) if None;
+        # seed_keys: indices the key reduction starts from (trajectory.simplify_keys)
+        self.pending.append((tuple(channel_indices), frames, values, tolerance, interpolation, seed_keys))
+
+    def commit(self):
+        frame_numbers = {}
+        keys_written = []
+        for channel_indices, frames, values, tolerance, interpolation, seed_keys in self.pending:
+            key_options = {} if interpolation is None else {'interpolation': interpolation}
+            if tolerance is not None and len(frames) > 2:
+                keep = simplify_keys(frames, values, tolerance, seed_keys)
+                frames = [frames[i] for i in keep]
+                values = [values[i] for i in keep]
+            channels = [self.channels[i] for i in channel_indices]
+            for frame, row in zip(frames, values):
+                frame = int(frame)
+                if frame not in frame_numbers:
+                    frame_numbers[frame] = unreal.FrameNumber(frame)
+                for channel, value in zip(channels, row):
+                    channel.add_key(frame_numbers[frame], float(value), **key_options)
+            keys_written.append((frames, values))
+        self.pending = []
+        return keys_written
+
+def add_transform_section(binding, start_frame, end_frame):
+    transform_track = binding.add_track(unreal.MovieScene3DTransformTrack)
+    transform_section = transform_track.add_section()
+    transform_section.set_range(start_frame, end_frame)
+    return transform_section
+
+def write_transform_keys(binding, frames, locations, rotations=None, start_frame=None, end_frame=None,
+                         location_tolerance=LOCATION_TOLERANCE, rotation_tolerance=ROTATION_TOLERANCE, seed_keys=None):
+    # returns the location keys actually written as [(frame, unreal.Vector)]; seed_keys as in KeyframeWriter.add
+    start_frame = int(frames[0]) if start_frame is None else start_frame
+    end_frame = int(frames[-1]) if end_frame is None else end_frame
+    writer = KeyframeWriter(add_transform_section(binding, start_frame, end_frame))
+    writer.add(LOCATION_CHANNELS, frames, locations, tolerance=location_tolerance, seed_keys=seed_keys)
+    if rotations is not None:
+        writer.add(ROTATION_CHANNELS, frames, rotations, tolerance=rotation_tolerance, seed_keys=seed_keys)
+    key_frames, key_locations = writer.commit()[0]
+    return [(int(frame), unreal.Vector(*map(float, location))) for frame, location in zip(key_frames, key_locations)]
+
+def write_focal_length_keys(level_sequence, camera, frames, focal_lengths, tolerance=FOCAL_LENGTH_TOLERANCE,
+                            seed_keys=None):
+    # CurrentFocalLength lives on the cine camera component, which gets its own binding
+    component_binding = level_sequence.add_possessable(camera.get_cine_camera_component())
+    focal_length_track = component_binding.add_track(unreal.MovieSceneFloatTrack)
+    focal_length_track.set_property_name_and_path('CurrentFocalLength', 'CurrentFocalLength')
+    section = focal_length_track.add_section()
+    section.set_range(int(frames[0]), int(frames[-1]))
+    writer = KeyframeWriter(section)
+    writer.add((0,), frames, [(value,) for value in focal_lengths], tolerance=tolerance, seed_keys=seed_keys)
+    key_frames, _ = writer.commit()[0]
+    return len(key_frames)
@@ -0,0 +1,152 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # labeling needs it, importing this module doesn't
+    np = None
+
+from .encoders import read_bmp, read_png
+from .layout import IMAGE_NAME_RE, FINAL_IMAGE, labels_path, pass_dir
+
+# Engine-free: per-frame labels of the character mask pass (rgb_alpha/alpha), computed from the
+# mask's alpha channel in batches of frames with array reductions and written as one table per
+# scene, <scene>/labels_<pass>.npz. Columns, one row per frame in frame number order:
+#   frame      int32     sequencer frame number
+#   area       int32     mask pixels
+#   box        int16x4   tight box x0, y0, x1, y1 (x1/y1 exclusive), -1 when the mask is empty
+#   truncated  uint8     bits of the image borders the mask touches: 1 left, 2 top, 4 right, 8 bottom
+#   centroid   float32x2 x, y in pixels, NaN when empty; in frame order this is the centroid track
+#   coverage   float32   area / image pixels
+#   fill       float32   area / box area
+#   crop       int16x4   square window around the box with CROP_MARGIN on each side, inside the image
+# plus width and height of the frames.
+MASK_PASSES = ('rgb_alpha', 'alpha')
+# alpha above this counts as character; the anti-aliased edge is split half way
+MASK_THRESHOLD = 127
+BATCH_FRAMES = 32
+CROP_MARGIN = 0.1
+
+TRUNCATED_LEFT, TRUNCATED_TOP, TRUNCATED_RIGHT, TRUNCATED_BOTTOM = 1, 2, 4, 8
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("mask labels need numpy (pip install numpy Pillow)")
+
+def read_mask(path, threshold=MASK_THRESHOLD):
+    # (height, width) bool from the alpha channel; PNG through Pillow when it is installed, 32-bit
+    # BMP and PNG without it
+    try:
+        from PIL import Image
+    except ImportError:
+        Image = None
+    if Image is None or path.lower().endswith('.bmp'):
+        frame = read_bmp(path) if path.lower().endswith('.bmp') else read_png(path)
+        pixels = np.frombuffer(bytes(frame.pixels), np.uint8).reshape(frame.height, frame.width, frame.channels)
+        return pixels[..., -1] > threshold
+    with Image.open(path) as image:
+        alpha = image.getchannel('A') if 'A' in image.getbands() else image.convert('L')
+        return np.asarray(alpha) > threshold
+
+def mask_frames(output_path, pass_name):
+    # [(frame_number, path)] of the pass's own images, in frame order
+    directory = pass_dir(output_path, pass_name)
+    if not os.path.isdir(directory):
+        return []
+    frames = []
+    for name in os.listdir(directory):
+        match = IMAGE_NAME_RE.match(name)
+        if match is not None and match['render_pass'] == FINAL_IMAGE:
+            frames.append((int(match['frame']), os.path.join(directory, name)))
+    return sorted(frames)
+
+def label_batch(masks):
+    # masks: (frames, height, width) bool -> columns of the label table for those frames
+    frames, height, width = masks.shape
+    row_counts = np.count_nonzero(masks, axis=2)
+    col_counts = np.count_nonzero(masks, axis=1)
+    area = row_counts.sum(axis=1)
+    rows, cols = row_counts > 0, col_counts > 0
+    visible = area > 0
+
+    # first and one past the last occupied row/column; argmax finds the first True
+    y0 = rows.argmax(axis=1)
+    y1 = height - rows[:, ::-1].argmax(axis=1)
+    x0 = cols.argmax(axis=1)
+    x1 = width - cols[:, ::-1].argmax(axis=1)
+    box = np.stack([x0, y0, x1, y1], axis=1)
+    box[~visible] = -1
+
+    truncated = ((cols[:, 0] * TRUNCATED_LEFT) | (rows[:, 0] * TRUNCATED_TOP)
+                 | (cols[:, -1] * TRUNCATED_RIGHT) | (rows[:, -1] * TRUNCATED_BOTTOM)).astype(np.uint8)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        centroid = np.stack([col_counts @ np.arange(width), row_counts @ np.arange(height)], axis=1) / area[:, None]
+        box_area = (x1 - x0) * (y1 - y0)
+        fill = np.where(visible, area / np.maximum(box_area, 1), 0.0)
+
+    # square, centred on the box, shifted (then clipped) to stay inside the image; rounded up so the
+    # margin is never cut short (less a hair, so 10 * 1.2 stays 12), then at most the image's short side
+    side = np.ceil(np.maximum(x1 - x0, y1 - y0) * (1 + 2 * CROP_MARGIN) - 1e-6)
+    side = np.minimum(side, min(width, height)).astype(np.int64)
+    cx0 = np.clip((x0 + x1 - side) // 2, 0, width - side)
+    cy0 = np.clip((y0 + y1 - side) // 2, 0, height - side)
+    crop = np.stack([cx0, cy0, cx0 + side, cy0 + side], axis=1)
+    crop[~visible] = -1
+
+    return {
+        'area': area.astype(np.int32),
+        'box': box.astype(np.int16),
+        'truncated': np.where(visible, truncated, 0).astype(np.uint8),
+        'centroid': centroid.astype(np.float32),
+        'coverage': (area / (width * height)).astype(np.float32),
+        'fill': fill.astype(np.float32),
+        'crop': crop.astype(np.int16),
+    }
+
+def label_pass(output_path, pass_name, batch_frames=BATCH_FRAMES, threshold=MASK_THRESHOLD):
+    # the label table of one scene's mask pass, without writing it; None when it has no frames
+    require_numpy()
+    frames = mask_frames(output_path, pass_name)
+    if not frames:
+        return None
+    columns, shape = [], None
+    for start in range(0, len(frames), batch_frames):
+        batch = [read_mask(path, threshold) for _, path in frames[start:start + batch_frames]]
+        if shape is None:
+            shape = batch[0].shape
+        if any(mask.shape != shape for mask in batch):
+            raise ValueError(f"{pass_dir(output_path, pass_name)}: frames of different sizes")
+        columns.append(label_batch(np.stack(batch)))
+    table = {name: np.concatenate([c[name] for c in columns]) for name in columns[0]}
+    table['frame'] = np.array([number for number, _ in frames], np.int32)
+    table['width'], table['height'] = np.int32(shape[1]), np.int32(shape[0])
+    return table
+
+def write_scene_labels(output_path, pass_name, **options):
+    # <scene>/labels_<pass>.npz; returns its path, None when the pass has no frames
+    table = label_pass(output_path, pass_name, **options)
+    if table is None:
+        return None
+    path = labels_path(output_path, pass_name)
+    partial = f"{path}.partial.npz"
+    np.savez_compressed(partial, **table)
+    os.replace(partial, path)
+    return path
+
+def load_labels(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+def label_scenes(scene_paths, pass_name, workers=None, **options):
+    # labels many scenes in a process pool, one scene per task: {scene path: labels path or error}
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {path: pool.submit(write_scene_labels, path, pass_name, **options) for path in scene_paths}
+        for path, future in futures.items():
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                results[path] = e
+    return results
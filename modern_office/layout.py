@@ -0,0 +1,53 @@
+import os
+import re
+from datetime import datetime
+
+# Engine-free: where a batch puts its files.
+#   <output_root>/<timestamp>/<pass>/Image.<render pass>.<frame>.<extension>
+#   <output_root>/<timestamp>/labels_<pass>.npz
+#   <output_root>/<timestamp>/stats.json, <output_root>/dataset_stats.json
+# <output_root> is one batch (e.g. RandomCamera), <timestamp> one scene. The Movie Render Queue
+# names the images after file_name_format, see render.create_render_job.
+TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"
+FILE_NAME_FORMAT = "Image.{render_pass}.{frame_number}"
+# the render pass of the pass's own images, as opposed to post-process materials
+FINAL_IMAGE = 'FinalImage'
+# a scene's and a batch's dataset statistics, see dataset_stats.py
+STATS_FILE = 'stats.json'
+DATASET_STATS_FILE = 'dataset_stats.json'
+# left in <output_root> by a batch that quit the editor for a restart, see LaunchBatch.py
+RESTART_FILE = 'restart.json'
+
+# e.g. Image.FinalImage.0042.png
+IMAGE_NAME_RE = re.compile(r'^Image\.(?P<render_pass>.+)\.(?P<frame>\d+)\.(?P<extension>[A-Za-z0-9]+)$')
+FRAME_NUMBER_RE = re.compile(r'\.(\d+)\.[A-Za-z0-9]+$')
+
+
+def timestamp():
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+def scene_output_path(output_root, scene_timestamp=None):
+    return os.path.join(output_root, scene_timestamp or timestamp())
+
+def scene_key(output_root, output_path):
+    # e.g. RandomCamera/2025-06-09_12-00-00
+    return f"{os.path.basename(os.path.normpath(output_root))}/{os.path.basename(os.path.normpath(output_path))}"
+
+def pass_dir(output_path, pass_name):
+    return os.path.join(output_path, pass_name)
+
+def pass_output_path(scene, pass_name):
+    # the folder a scene renders the pass into (the pass's own folder is inside it): the scene's,
+    # or a staging folder for background plate and character layer passes (plates.py)
+    return getattr(scene, 'pass_output_paths', {}).get(pass_name, scene.output_path)
+
+def labels_path(output_path, pass_name):
+    # the mask labels of a pass, see labels.write_scene_labels
+    return os.path.join(output_path, f"labels_{pass_name}.npz")
+
+def frame_file_name(render_pass, frame_number, extension):
+    return f"{FILE_NAME_FORMAT.format(render_pass=render_pass, frame_number=f'{frame_number:04d}')}.{extension}"
+
+def is_final_image(file_name):
+    match = IMAGE_NAME_RE.match(file_name)
+    return match is not None and match['render_pass'] == FINAL_IMAGE
@@ -0,0 +1,186 @@
+import math
+import random
+from collections import OrderedDict
+
+from .assets import select_random_asset, POOLED_SKYLIGHT_PREFIX
+from .engine import unreal
+
+CUBEMAP_ROOT = '/Game/HDRI/'
+
+SKYLIGHT_INTENSITY_RANGE = (0.6, 1.8)
+# skylight tint as a colour temperature; SkyLightComponent has no temperature of its own
+SKYLIGHT_TEMPERATURE_RANGE = (4500.0, 9000.0)
+# cubemap rotations are snapped to buckets so captures can be reused
+ROTATION_BUCKET_DEGREES = 30.0
+SKYLIGHT_POOL_SIZE = 8
+
+SUN_ELEVATION_RANGE = (10.0, 60.0)
+SUN_INTENSITY_SCALE = (0.3, 1.5)
+LIGHT_GROUP_ON_PROBABILITY = 0.75
+LIGHT_GROUP_INTENSITY_SCALE = (0.5, 1.5)
+LIGHT_TEMPERATURE_RANGE = (3000.0, 6500.0)
+
+# light settings put back after the batch (restore_lighting)
+LIGHT_SETTINGS = ('intensity', 'visible', 'use_temperature', 'temperature')
+
+# light path name -> (light component, LIGHT_SETTINGS as placed in the level), so scales don't
+# compound over scenes and the level can be restored
+_light_originals = {}
+# actor path name -> (actor, rotation as placed in the level)
+_actor_rotations = {}
+_skylight_pool = None
+
+
+def kelvin_to_linear_color(kelvin):
+    # Tanner Helland's blackbody fit (sRGB), normalized to the brightest channel and linearized
+    t = kelvin / 100.0
+    if t <= 66:
+        r, g = 255.0, 99.4708025861 * math.log(t) - 161.1195681661
+        b = 0.0 if t <= 19 else 138.5177312231 * math.log(t - 10) - 305.0447927307
+    else:
+        r = 329.698727446 * (t - 60) ** -0.1332047592
+        g = 288.1221695283 * (t - 60) ** -0.0755148492
+        b = 255.0
+    rgb = [min(max(c, 0.0), 255.0) for c in (r, g, b)]
+    brightest = max(rgb)
+    return unreal.LinearColor(*[(c / brightest) ** 2.2 for c in rgb], 1.0)
+
+class SkyLightPool:
+    # Captured skylights keyed by (cubemap, rotation bucket), least recently used evicted.
+    # Reusing a key only toggles visibility; intensity and tint never need a recapture.
+    def __init__(self, template_skylight, capacity=SKYLIGHT_POOL_SIZE):
+        if capacity < 1:
+            raise ValueError(f"Skylight pool capacity must be at least 1, got {capacity}")
+        self.template_skylight = template_skylight
+        self.capacity = capacity
+        self.skylights = OrderedDict()
+        self.active = template_skylight
+        self.spawned = 0
+        self.captures = 0
+        self.hits = 0
+
+    def acquire(self, cubemap_path, cubemap_asset, rotation_bucket):
+        key = (cubemap_path, rotation_bucket)
+        skylight = self.skylights.pop(key, None)
+        evicted = None
+        if skylight is None:
+            if len(self.skylights) >= self.capacity:
+                # destroyed once the new skylight has taken over, as it may be the active one
+                _, evicted = self.skylights.popitem(last=False)
+            skylight = unreal.get_editor_subsystem(unreal.EditorActorSubsystem).duplicate_actor(self.template_skylight)
+            self.spawned += 1
+            skylight.set_actor_label(f"{POOLED_SKYLIGHT_PREFIX}_{self.spawned}")
+            skylight_comp = skylight.get_editor_property('light_component')
+            skylight_comp.set_editor_property('cubemap', cubemap_asset)
+            skylight_comp.set_editor_property('source_cubemap_angle', rotation_bucket * ROTATION_BUCKET_DEGREES)
+            skylight_comp.recapture_sky()
+            self.captures += 1
+        else:
+            self.hits += 1
+        self.skylights[key] = skylight
+
+        if skylight is not self.active:
+            # only one skylight lights the scene
+            self.active.get_editor_property('light_component').set_visibility(False)
+            skylight.get_editor_property('light_component').set_visibility(True)
+            self.active = skylight
+        if evicted is not None:
+            unreal.get_editor_subsystem(unreal.EditorActorSubsystem).destroy_actor(evicted)
+        return skylight
+
+    def clear(self):
+        actor_subsystem = unreal.get_editor_subsystem(unreal.EditorActorSubsystem)
+        for skylight in self.skylights.values():
+            actor_subsystem.destroy_actor(skylight)
+        self.skylights.clear()
+        self.template_skylight.get_editor_property('light_component').set_visibility(True)
+        self.active = self.template_skylight
+
+def get_skylight_pool(template_skylight, capacity=SKYLIGHT_POOL_SIZE):
+    global _skylight_pool
+    if _skylight_pool is None or _skylight_pool.template_skylight != template_skylight:
+        _skylight_pool = SkyLightPool(template_skylight, capacity)
+    return _skylight_pool
+
+def clear_skylight_pool():
+    global _skylight_pool
+    if _skylight_pool is not None:
+        _skylight_pool.clear()
+        _skylight_pool = None
+
+def original_light_settings(light_component):
+    key = light_component.get_path_name()
+    if key not in _light_originals:
+        _light_originals[key] = (light_component,
+                                 {name: light_component.get_editor_property(name) for name in LIGHT_SETTINGS})
+    return _light_originals[key][1]
+
+def default_intensity(light_component):
+    return original_light_settings(light_component)['intensity']
+
+def record_actor_rotation(actor):
+    key = actor.get_path_name()
+    if key not in _actor_rotations:
+        _actor_rotations[key] = (actor, actor.get_actor_rotation())
+
+def restore_lighting():
+    # the sun and light groups as placed in the level, before any scene randomized them
+    for actor, rotation in _actor_rotations.values():
+        actor.set_actor_rotation(rotation, False)
+    for light_component, settings in _light_originals.values():
+        light_component.set_visibility(settings['visible'])
+        light_component.set_intensity(settings['intensity'])
+        light_component.set_use_temperature(settings['use_temperature'])
+        light_component.set_temperature(settings['temperature'])
+    _actor_rotations.clear()
+    _light_originals.clear()
+
+def randomize_skylight(skylight, resources=None, pool_size=SKYLIGHT_POOL_SIZE, cubemap_path=None, rng=random):
+    cubemap_path = cubemap_path or select_random_asset(CUBEMAP_ROOT, asset_class='TextureCube')
+    cubemap_asset = resources.load_asset(cubemap_path) if resources is not None else unreal.load_asset(cubemap_path)
+    rotation_bucket = rng.randrange(int(360 / ROTATION_BUCKET_DEGREES))
+    pooled_skylight = get_skylight_pool(skylight, pool_size).acquire(cubemap_path, cubemap_asset, rotation_bucket)
+
+    intensity = rng.uniform(*SKYLIGHT_INTENSITY_RANGE)
+    temperature = rng.uniform(*SKYLIGHT_TEMPERATURE_RANGE)
+    skylight_comp = pooled_skylight.get_editor_property('light_component')
+    skylight_comp.set_intensity(intensity)
+    skylight_comp.set_light_color(kelvin_to_linear_color(temperature))
+    return {'cubemap': cubemap_path, 'rotation': rotation_bucket * ROTATION_BUCKET_DEGREES,
+            'intensity': round(intensity, 3), 'temperature': round(temperature)}
+
+def randomize_sun(sun, rng=random):
+    elevation = rng.uniform(*SUN_ELEVATION_RANGE)
+    azimuth = rng.uniform(0.0, 360.0)
+    record_actor_rotation(sun)
+    sun.set_actor_rotation(unreal.Rotator(0.0, -elevation, azimuth), False)
+    sun_comp = sun.get_editor_property('light_component')
+    intensity = default_intensity(sun_comp) * rng.uniform(*SUN_INTENSITY_SCALE)
+    sun_comp.set_intensity(intensity)
+    return {'elevation': round(elevation, 2), 'azimuth': round(azimuth, 2), 'intensity': round(intensity, 3)}
+
+def randomize_light_groups(light_groups, rng=random):
+    # every group (outliner folder) is switched and scaled as a whole, like real fixtures on one circuit
+    groups = {}
+    for group_name, lights in sorted(light_groups.items()):
+        enabled = rng.random() < LIGHT_GROUP_ON_PROBABILITY
+        scale = rng.uniform(*LIGHT_GROUP_INTENSITY_SCALE)
+        temperature = rng.uniform(*LIGHT_TEMPERATURE_RANGE)
+        for light in lights:
+            light_comp = light.get_editor_property('light_component')
+            original_light_settings(light_comp)
+            light_comp.set_visibility(enabled)
+            if enabled:
+                light_comp.set_intensity(default_intensity(light_comp) * scale)
+                light_comp.set_use_temperature(True)
+                light_comp.set_temperature(temperature)
+        groups[group_name] = {'enabled': enabled, 'scale': round(scale, 3), 'temperature': round(temperature)}
+    return groups
+
+def randomize_lighting(level_actors, resources=None, pool_size=SKYLIGHT_POOL_SIZE, cubemap_path=None, rng=random):
+    lighting = {'skylight': randomize_skylight(level_actors.skylight, resources, pool_size, cubemap_path, rng)}
+    if level_actors.sun is not None:
+        lighting['sun'] = randomize_sun(level_actors.sun, rng)
+    if level_actors.light_groups:
+        lighting['light_groups'] = randomize_light_groups(level_actors.light_groups, rng)
+    return lighting
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .layout import FRAME_NUMBER_RE, pass_dir
+
+# Engine-free dataset index: one row per scene, per rendered pass and per written frame. The
+# pipeline appends as scenes are built and passes finish; training code queries it for file lists.
+MANIFEST_FILE = "manifest.sqlite"
+
+SCENE_COLUMNS = ['skeletal_mesh', 'character', 'animation', 'cubemap', 'camera_key', 'target_point_key',
+                 'camera_path', 'frame_step']
+# scene columns query_scenes/query_frames can filter on (a value, or a list of values)
+FILTER_COLUMNS = SCENE_COLUMNS + ['status', 'split', 'output_root']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenes (
+    id INTEGER PRIMARY KEY,
+    scene_key TEXT UNIQUE NOT NULL,
+    output_root TEXT,
+    output_path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL,
+    build_seconds REAL,
+    skeletal_mesh TEXT,
+    character TEXT,
+    animation TEXT,
+    cubemap TEXT,
+    camera_key TEXT,
+    target_point_key TEXT,
+    camera_path TEXT,
+    frame_step INTEGER,
+    num_frames INTEGER,
+    split TEXT,
+    metadata TEXT
+);
+CREATE TABLE IF NOT EXISTS passes (
+    id INTEGER PRIMARY KEY,
+    scene_id INTEGER NOT NULL REFERENCES scenes(id),
+    pass_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER,
+    render_seconds REAL,
+    frame_count INTEGER,
+    invalid_frames INTEGER,
+    error TEXT,
+    UNIQUE (scene_id, pass_name)
+);
+CREATE TABLE IF NOT EXISTS frames (
+    scene_id INTEGER NOT NULL REFERENCES scenes(id),
+    pass_name TEXT NOT NULL,
+    frame_number INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    valid INTEGER NOT NULL,
+    PRIMARY KEY (scene_id, pass_name, frame_number)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS scenes_character ON scenes(character);
+CREATE INDEX IF NOT EXISTS scenes_animation ON scenes(animation);
+CREATE INDEX IF NOT EXISTS scenes_cubemap ON scenes(cubemap);
+CREATE INDEX IF NOT EXISTS scenes_camera_key ON scenes(camera_key);
+CREATE INDEX IF NOT EXISTS scenes_split ON scenes(split);
+CREATE INDEX IF NOT EXISTS scenes_status ON scenes(status);
+"""
+
+
+def scan_pass_frames(output_path, pass_name):
+    # [(frame_number, path relative to the scene, valid)]; empty or unreadable files are invalid
+    directory = pass_dir(output_path, pass_name)
+    if not os.path.isdir(directory):
+        return []
+    frames = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            match = FRAME_NUMBER_RE.search(entry.name)
+            if match is None or not entry.is_file():
+                continue
+            frames.append((int(match.group(1)), f"{pass_name}/{entry.name}", entry.stat().st_size > 0))
+    return sorted(frames)
+
+def scene_row(metadata):
+    row = {column: metadata.get(column) for column in SCENE_COLUMNS}
+    if row['skeletal_mesh']:
+        # same grouping as the animation catalog: the character's package folder
+        row['character'] = os.path.dirname(row['skeletal_mesh'])
+    if row['cubemap'] is None and 'lighting' in metadata:
+        row['cubemap'] = metadata['lighting']['skylight']['cubemap']
+    if row['camera_key'] is None:
+        row['camera_key'] = metadata.get('target_point_key')
+    return row
+
+def split_for(value, fractions, salt=''):
+    # deterministic: the same group always lands in the same split, on every node
+    digest = hashlib.sha1(f"{salt}{value}".encode()).digest()
+    point = int.from_bytes(digest[:8], 'big') / 2 ** 64
+    cumulative = 0.0
+    for split, fraction in fractions.items():
+        cumulative += fraction
+        if point < cumulative:
+            return split
+    return list(fractions)[-1]
+
+class Manifest:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # written from the editor thread and CPU/upload workers, read from any of them; every statement
+        # (and the fetch of its rows) holds the lock, as they all share one connection
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def scene_id(self, scene_key):
+        with self.lock:
+            row = self.connection.execute("SELECT id FROM scenes WHERE scene_key = ?", (scene_key,)).fetchone()
+        return row['id'] if row is not None else None
+
+    def add_scene(self, scene_key, output_root, output_path, metadata, build_seconds=None, status='rendering'):
+        row = scene_row(metadata)
+        num_frames = len(metadata['frame_indices']) if 'frame_indices' in metadata else None
+        columns = ['scene_key', 'output_root', 'output_path', 'status', 'created_at', 'build_seconds',
+                   'num_frames', 'metadata'] + SCENE_COLUMNS
+        values = [scene_key, output_root, output_path, status, time.time(), build_seconds, num_frames,
+                  json.dumps(metadata)] + [row[c] for c in SCENE_COLUMNS]
+        updates = ', '.join(f"{c} = excluded.{c}" for c in columns[1:])
+        with self.lock, self.connection:
+            self.connection.execute(
+                f"INSERT INTO scenes ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT(scene_key) DO UPDATE SET {updates}", values)
+        return self.scene_id(scene_key)
+
+    def set_scene_status(self, scene_key, status):
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE scenes SET status = ? WHERE scene_key = ?", (status, scene_key))
+
+    def add_pass(self, scene_key, pass_name, status, attempts=1, render_seconds=None, frames=(), error=None):
+        scene_id = self.scene_id(scene_key)
+        invalid_frames = sum(1 for _, _, valid in frames if not valid)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO passes (scene_id, pass_name, status, attempts, render_seconds, frame_count, "
+                "invalid_frames, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (scene_id, pass_name, status, attempts, render_seconds, len(frames), invalid_frames, error))
+            self.connection.execute("DELETE FROM frames WHERE scene_id = ? AND pass_name = ?", (scene_id, pass_name))
+            self.connection.executemany(
+                "INSERT INTO frames (scene_id, pass_name, frame_number, path, valid) VALUES (?, ?, ?, ?, ?)",
+                [(scene_id, pass_name, number, path, int(valid)) for number, path, valid in frames])
+
+    def assign_splits(self, fractions=None, by='character', salt=''):
+        # e.g. {'train': 0.8, 'val': 0.1, 'test': 0.1}, grouped so no character (or animation, ...)
+        # appears in two splits
+        fractions = fractions or {'train': 0.8, 'val': 0.1, 'test': 0.1}
+        if by not in SCENE_COLUMNS:
+            raise ValueError(f"Cannot split by '{by}', expected one of {SCENE_COLUMNS}")
+        with self.lock, self.connection:
+            groups = [row[0] for row in self.connection.execute(f"SELECT DISTINCT {by} FROM scenes")]
+            self.connection.executemany(f"UPDATE scenes SET split = ? WHERE {by} IS ?",
+                                        [(split_for(group, fractions, salt), group) for group in groups])
+
+    def where(self, filters, prefix='s.'):
+        clauses, values = [], []
+        for column, value in filters.items():
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Cannot filter on '{column}', expected one of {FILTER_COLUMNS}")
+            if isinstance(value, (list, tuple, set)):
+                clauses.append(f"{prefix}{column} IN ({', '.join('?' * len(value))})")
+                values += list(value)
+            else:
+                clauses.append(f"{prefix}{column} = ?")
+                values.append(value)
+        return (' AND '.join(clauses) or '1'), values
+
+    def query_scenes(self, **filters):
+        clause, values = self.where(filters)
+        with self.lock:
+            rows = self.connection.execute(f"SELECT * FROM scenes s WHERE {clause} ORDER BY s.id", values).fetchall()
+        return [dict(row) for row in rows]
+
+    def query_frames(self, pass_name='rgb', valid_only=True, status='complete', **filters):
+        # absolute paths of the frames of pass_name in every scene matching the filters
+        # (frames packed into a video come as <video>#<frame number>, see video.read_frame)
+        if status is not None:
+            filters['status'] = status
+        clause, values = self.where(filters)
+        if valid_only:
+            clause += " AND f.valid = 1"
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT s.output_path, f.path FROM scenes s JOIN frames f ON f.scene_id = s.id "
+                f"WHERE f.pass_name = ? AND {clause} ORDER BY s.id, f.frame_number", [pass_name] + values).fetchall()
+        return [os.path.join(output_path, path) for output_path, path in rows]
+
+    def summary(self):
+        with self.lock:
+            scenes = dict(self.connection.execute("SELECT status, COUNT(*) FROM scenes GROUP BY status").fetchall())
+            passes = self.connection.execute(
+                "SELECT pass_name, COUNT(*), SUM(frame_count), SUM(invalid_frames), AVG(render_seconds) FROM passes "
+                "WHERE status = 'succeeded' GROUP BY pass_name").fetchall()
+        return {'scenes': scenes,
+                'passes': {name: {'count': count, 'frames': frames, 'invalid_frames': invalid, 'mean_seconds': mean}
+                           for name, count, frames, invalid, mean in passes}}
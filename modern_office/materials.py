@@ -0,0 +1,182 @@
+import colorsys
+import json
+import os
+import random
+import re
+
+from .assets import list_assets
+from .engine import unreal
+
+# Domain randomization of office surfaces from a pool of MaterialInstanceConstant assets, built
+# once by BuildMaterialPool.py. Constant instances only override scalar, vector and texture
+# parameters of materials the level already uses, so they share the parents' compiled shaders;
+# dynamic instances would not survive the duplication into the PIE world the renders run in.
+MATERIAL_POOL_ROOT = '/Game/DomainRandomization/MaterialPool'
+MATERIAL_TEXTURE_ROOT = '/Game/DomainRandomization/Textures'
+MATERIAL_POOL_CATALOG_FILE = "material_pool.json"
+
+# probability a surface keeps the material it has in the level
+KEEP_ORIGINAL_PROBABILITY = 0.2
+SCALAR_SCALE_RANGE = (0.6, 1.4)
+HUE_SHIFT = 0.08
+SATURATION_SCALE_RANGE = (0.6, 1.3)
+VALUE_SCALE_RANGE = (0.6, 1.4)
+
+# actor path name -> (mesh component, materials as placed in the level)
+_original_materials = {}
+
+
+def default_catalog_path():
+    return os.path.join(unreal.Paths.project_saved_dir(), MATERIAL_POOL_CATALOG_FILE)
+
+def surface_pool_path(surface):
+    return f"{MATERIAL_POOL_ROOT}/{surface.capitalize()}"
+
+def mesh_component(actor):
+    return actor.get_component_by_class(unreal.StaticMeshComponent)
+
+def original_materials(actor):
+    key = actor.get_path_name()
+    if key not in _original_materials:
+        component = mesh_component(actor)
+        _original_materials[key] = (component,
+                                    [component.get_material(i) for i in range(component.get_num_materials())])
+    return _original_materials[key][1]
+
+def restore_original_materials():
+    # every surface a scene randomized gets the materials it has in the level back
+    for component, materials in _original_materials.values():
+        for slot, material in enumerate(materials):
+            if material is not None:
+                component.set_material(slot, material)
+    _original_materials.clear()
+
+
+# offline: create the pool (needs the editor)
+
+def jitter_scalar(value, rng=random):
+    jittered = value * rng.uniform(*SCALAR_SCALE_RANGE)
+    # 0-1 parameters (roughness, metallic, ...) stay in range
+    return min(max(jittered, 0.0), 1.0) if 0.0 <= value <= 1.0 else jittered
+
+def jitter_color(color, rng=random):
+    h, s, v = colorsys.rgb_to_hsv(color.r, color.g, color.b)
+    h = (h + rng.uniform(-HUE_SHIFT, HUE_SHIFT)) % 1.0
+    s = min(s * rng.uniform(*SATURATION_SCALE_RANGE), 1.0)
+    v = v * rng.uniform(*VALUE_SCALE_RANGE)
+    return unreal.LinearColor(*colorsys.hsv_to_rgb(h, s, v), color.a)
+
+def create_material_variant(parent, package_path, asset_name, textures=(), rng=random):
+    mel = unreal.MaterialEditingLibrary
+    asset_tools = unreal.AssetToolsHelpers.get_asset_tools()
+    instance = asset_tools.create_asset(asset_name, package_path, unreal.MaterialInstanceConstant,
+                                        unreal.MaterialInstanceConstantFactoryNew())
+    mel.set_material_instance_parent(instance, parent)
+
+    # parameter overrides only: static switches would compile new shader permutations
+    parameters = {'scalar': {}, 'vector': {}, 'texture': {}}
+    for name in mel.get_scalar_parameter_names(parent):
+        value = jitter_scalar(mel.get_material_instance_scalar_parameter_value(instance, name), rng)
+        mel.set_material_instance_scalar_parameter_value(instance, name, value)
+        parameters['scalar'][str(name)] = round(value, 4)
+    for name in mel.get_vector_parameter_names(parent):
+        color = jitter_color(mel.get_material_instance_vector_parameter_value(instance, name), rng)
+        mel.set_material_instance_vector_parameter_value(instance, name, color)
+        parameters['vector'][str(name)] = [round(c, 4) for c in (color.r, color.g, color.b, color.a)]
+    if textures:
+        for name in mel.get_texture_parameter_names(parent):
+            texture_path = rng.choice(textures)
+            mel.set_material_instance_texture_parameter_value(instance, name, unreal.load_asset(texture_path))
+            parameters['texture'][str(name)] = texture_path
+    mel.update_material_instance(instance)
+    unreal.EditorAssetLibrary.save_loaded_asset(instance)
+    return instance, parameters
+
+def build_material_pool(surface_actors, variants_per_material=8, rng=random):
+    # surface_actors: surface name -> actors (see LevelActors.surfaces); variants are made from the
+    # materials those surfaces use in the level
+    catalog = {}
+    for surface, actors in sorted(surface_actors.items()):
+        package_path = surface_pool_path(surface)
+        texture_root = f"{MATERIAL_TEXTURE_ROOT}/{surface.capitalize()}"
+        textures = (unreal.EditorAssetLibrary.list_assets(texture_root)
+                    if unreal.EditorAssetLibrary.does_directory_exist(texture_root) else [])
+        parents = {}
+        for actor in actors:
+            for material in original_materials(actor):
+                if material is not None:
+                    parents[material.get_path_name()] = material
+        for parent_path, parent in sorted(parents.items()):
+            for v in range(variants_per_material):
+                asset_name = f"{variant_prefix(surface, parent.get_name())}{v:02d}"
+                instance, parameters = create_material_variant(parent, package_path, asset_name, textures, rng)
+                catalog[instance.get_path_name()] = {'surface': surface, 'parent': parent_path,
+                                                     'parameters': parameters}
+        unreal.log(f"{surface}: {len(parents)} materials, {len(parents) * variants_per_material} variants")
+    return catalog
+
+def save_pool_catalog(catalog, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(catalog, f, indent=1)
+
+def load_pool_catalog(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# per scene
+
+def variant_prefix(surface, parent_name):
+    return f"MI_{surface.capitalize()}_{parent_name}_"
+
+def asset_name(asset_path):
+    # /Game/Path/Name.Name -> Name
+    return asset_path.rsplit('/', 1)[-1].split('.')[0]
+
+def material_variants(surface, original, pool, catalog=None):
+    # The pool's variants of a level material: by parent path where the catalog has the variant,
+    # otherwise by exact name (a prefix would also match e.g. M_Wood_Dark's variants for M_Wood)
+    parent_path = original.get_path_name()
+    pattern = re.compile(rf"{re.escape(variant_prefix(surface, original.get_name()))}\d{{2}}")
+    return [path for path in pool
+            if (catalog[path]['parent'] == parent_path if catalog is not None and path in catalog
+                else pattern.fullmatch(asset_name(path)))]
+
+def randomize_surface(surface, actors, pool, resources=None, catalog=None, rng=random):
+    # One draw per material the surface uses, shared by all its actors so e.g. all walls match.
+    # Returns {original material path: variant path, or None where the original is kept}.
+    keep_original = rng.random() < KEEP_ORIGINAL_PROBABILITY
+    chosen = {}
+    for actor in actors:
+        component = mesh_component(actor)
+        for slot, original in enumerate(original_materials(actor)):
+            if original is None:
+                continue
+            original_path = original.get_path_name()
+            if original_path not in chosen:
+                variants = material_variants(surface, original, pool, catalog)
+                chosen[original_path] = rng.choice(variants) if variants and not keep_original else None
+            variant_path = chosen[original_path]
+            if variant_path is None:
+                component.set_material(slot, original)
+            elif resources is not None:
+                component.set_material(slot, resources.load_asset(variant_path))
+            else:
+                component.set_material(slot, unreal.load_asset(variant_path))
+    return chosen
+
+def randomize_materials(surface_actors, surfaces=None, resources=None, catalog=None, rng=random):
+    choices = {}
+    for surface, actors in sorted(surface_actors.items()):
+        if surfaces is not None and surface not in surfaces:
+            continue
+        pool = list_assets(surface_pool_path(surface), asset_class='MaterialInstanceConstant')
+        if not pool:
+            # no variants built for this surface yet
+            continue
+        chosen = randomize_surface(surface, actors, pool, resources, catalog, rng)
+        choices[surface] = {original_path: {'material': variant_path,
+                                            **((catalog or {}).get(variant_path, {}) if variant_path else {})}
+                            for original_path, variant_path in chosen.items()}
+    return choices
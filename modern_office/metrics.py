@@ -0,0 +1,183 @@
+import os
+import shutil
+import threading
+import time
+
+from .layout import is_final_image, pass_dir as scene_pass_dir, pass_output_path
+
+# Engine-free: live batch metrics in the Prometheus text format, written to a file for the node
+# exporter's textfile collector and/or served over HTTP. BatchMetrics updates them from the
+# orchestrator hooks, so a throughput drop shows up on the dashboards while the batch runs.
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# name -> (type, help)
+METRICS = {
+    'modern_office_scenes_planned': ('gauge', "Scenes planned for the batch"),
+    'modern_office_scenes_built_total': ('counter', "Scenes built"),
+    'modern_office_scenes_completed_total': ('counter', "Scenes with every pass rendered"),
+    'modern_office_failures_total': ('counter', "Failed passes and scene builds"),
+    'modern_office_stage_seconds_total': ('counter', "Time spent in each scene setup stage"),
+    'modern_office_stage_runs_total': ('counter', "Scene setup stage runs"),
+    'modern_office_stage_last_seconds': ('gauge', "Duration of the last run of each stage"),
+    'modern_office_pass_seconds_total': ('counter', "Render time per pass"),
+    'modern_office_frames_rendered_total': ('counter', "Frames rendered per pass"),
+    'modern_office_pass_frames_per_second': ('gauge', "Frames per second of the last render of each pass"),
+    'modern_office_bytes_written_total': ('counter', "Bytes the renders wrote to disk, per pass"),
+    'modern_office_queued_passes': ('gauge', "Passes waiting to render"),
+    'modern_office_pending_cpu_jobs': ('gauge', "Post-processing jobs not finished yet"),
+    'modern_office_disk_free_bytes': ('gauge', "Free space on the output volume"),
+    'modern_office_last_update_timestamp_seconds': ('gauge', "Unix time of the last update"),
+}
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+class MetricsRegistry:
+    def __init__(self, const_labels=None):
+        self.const_labels = dict(const_labels or {})
+        self.values = {}
+        # written from the editor thread, read by the HTTP server's threads
+        self.lock = threading.Lock()
+
+    def key(self, name, labels):
+        if name not in METRICS:
+            raise KeyError(f"Unknown metric '{name}'")
+        return name, tuple(sorted({**self.const_labels, **labels}.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            self.values[key] = value
+
+    def render(self):
+        with self.lock:
+            values = sorted(self.values.items())
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            samples = [(labels, value) for (n, labels), value in values if n == name]
+            if not samples:
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            lines += [f"{name}{format_labels(labels)} {float(value)!r}" for labels, value in samples]
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        # atomic, so a scrape never reads a half-written file
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, 'w') as f:
+            f.write(self.render())
+        os.replace(partial, path)
+
+class MetricsServer:
+    # /metrics on a daemon thread; port 0 picks a free port
+    def __init__(self, registry, port, host='0.0.0.0'):
+        # imported here, it is most of the module's import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name='metrics-server', daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def directory_bytes(path):
+    total = 0
+    if os.path.isdir(path):
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    total += entry.stat().st_size
+    return total
+
+class BatchMetrics:
+    # Hooks for orchestrator.RenderOrchestrator; add_hooks() registers them, before any hook that
+    # post-processes the frames. The file (if any) is rewritten after every event.
+    def __init__(self, output_root, path=None, port=None, const_labels=None):
+        self.output_root = output_root
+        self.path = path
+        self.registry = MetricsRegistry(const_labels)
+        self.server = MetricsServer(self.registry, port) if port is not None else None
+        self.orchestrator = None
+
+    def add_hooks(self, orchestrator):
+        self.orchestrator = orchestrator
+        self.registry.set('modern_office_scenes_planned', orchestrator.scene_count)
+        for event in ('scene_built', 'pass_finished', 'scene_finished', 'task_failed', 'batch_finished'):
+            orchestrator.add_hook(event, getattr(self, event))
+        self.publish()
+
+    def publish(self):
+        registry = self.registry
+        if self.orchestrator is not None:
+            registry.set('modern_office_scenes_planned', self.orchestrator.scene_count)
+            registry.set('modern_office_queued_passes', len(self.orchestrator.queue))
+            registry.set('modern_office_pending_cpu_jobs', sum(1 for f in self.orchestrator.cpu_futures if not f.done()))
+        if os.path.isdir(self.output_root):
+            registry.set('modern_office_disk_free_bytes', shutil.disk_usage(self.output_root).free)
+        registry.set('modern_office_last_update_timestamp_seconds', time.time())
+        if self.path is not None:
+            self.registry.write(self.path)
+
+    def scene_built(self, scene_index, scene):
+        self.registry.inc('modern_office_scenes_built_total')
+        for stage, seconds in scene.metadata.get('stage_seconds', {}).items():
+            self.registry.inc('modern_office_stage_seconds_total', seconds, stage=stage)
+            self.registry.inc('modern_office_stage_runs_total', stage=stage)
+            self.registry.set('modern_office_stage_last_seconds', seconds, stage=stage)
+        self.publish()
+
+    def pass_finished(self, task):
+        seconds = self.orchestrator.clock() - task.started_at
+        # before any post-processing, so these are the bytes the render itself wrote; plate and
+        # character layer passes are counted in their staging folders
+        pass_dir = scene_pass_dir(pass_output_path(task.scene, task.pass_name), task.pass_name)
+        frames = len([name for name in os.listdir(pass_dir) if is_final_image(name)] if os.path.isdir(pass_dir) else [])
+        self.registry.inc('modern_office_pass_seconds_total', seconds, render_pass=task.pass_name)
+        self.registry.inc('modern_office_frames_rendered_total', frames, render_pass=task.pass_name)
+        self.registry.set('modern_office_pass_frames_per_second', frames / seconds if seconds > 0 else 0.0,
+                          render_pass=task.pass_name)
+        self.registry.inc('modern_office_bytes_written_total', directory_bytes(pass_dir), render_pass=task.pass_name)
+        self.publish()
+
+    def scene_finished(self, scene_index, scene):
+        self.registry.inc('modern_office_scenes_completed_total')
+        self.publish()
+
+    def task_failed(self, task, message):
+        self.registry.inc('modern_office_failures_total', render_pass=task.pass_name or 'build')
+        self.publish()
+
+    def batch_finished(self, completed_scenes, failed_scenes):
+        self.publish()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
@@ -0,0 +1,105 @@
+import math
+
+from .engine import unreal
+
+# Mean bone rotation (radians) plus camera view change (radians) that a
+# rendered frame should add over the previous one. ~0.04 rad keeps idles
+# sparse while dances and fast camera moves fall back to stride 1.
+DEFAULT_MOTION_THRESHOLD = 0.04
+DEFAULT_MAX_STRIDE = 6
+# Rate percentile used to pick the stride, so short bursts of fast motion
+# are not undersampled because the rest of the clip is calm.
+DEFAULT_RATE_PERCENTILE = 0.9
+
+
+def quaternion_angle(q0, q1):
+    # Angle of the rotation taking q0 to q1, quaternions as (x, y, z, w)
+    dot = abs(q0[0] * q1[0] + q0[1] * q1[1] + q0[2] * q1[2] + q0[3] * q1[3])
+    return 2.0 * math.acos(min(1.0, dot))
+
+def sample_bone_rotations(animation_asset, bone_names=None):
+    anim_lib = unreal.AnimationLibrary
+    if bone_names is None:
+        bone_names = anim_lib.get_animation_track_names(animation_asset)
+
+    rotations = []
+    root_translations = []
+    for frame in range(anim_lib.get_num_frames(animation_asset)):
+        poses = anim_lib.get_bone_poses_for_frame(animation_asset, bone_names, frame, False)
+        rotations.append([(p.rotation.x, p.rotation.y, p.rotation.z, p.rotation.w) for p in poses])
+        root = poses[0].translation
+        root_translations.append((root.x, root.y, root.z))
+
+    return rotations, root_translations
+
+def pose_change_per_frame(rotations, root_translations, subject_distance=400.0):
+    # Per animation frame: mean bone rotation change, plus root travel
+    # converted to the angle it sweeps as seen from subject_distance away.
+    changes = []
+    for i in range(1, len(rotations)):
+        prev, cur = rotations[i - 1], rotations[i]
+        bone_change = sum(quaternion_angle(a, b) for a, b in zip(prev, cur)) / max(len(cur), 1)
+        root_travel = math.dist(root_translations[i - 1], root_translations[i])
+        changes.append(bone_change + root_travel / subject_distance)
+    return changes
+
+def camera_change_per_frame(camera_keys, subject_location, start_frame, end_frame):
+    # camera_keys: [(frame, location)] as written by bind_camera_to_level_sequence.
+    # Linear interpolation between keys is close enough for choosing a stride.
+    changes = [0.0] * (end_frame - start_frame)
+    subject = (subject_location.x, subject_location.y, subject_location.z)
+    for (f0, p0), (f1, p1) in zip(camera_keys, camera_keys[1:]):
+        if f1 <= f0:
+            continue
+        a, b = (p0.x, p0.y, p0.z), (p1.x, p1.y, p1.z)
+        speed = math.dist(a, b) / (f1 - f0)
+        distance = max(min(math.dist(a, subject), math.dist(b, subject)), 1.0)
+        for frame in range(max(f0, start_frame), min(f1, end_frame)):
+            changes[frame - start_frame] += speed / distance
+    return changes
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def choose_frame_stride(change_per_frame, threshold=DEFAULT_MOTION_THRESHOLD,
+                        max_stride=DEFAULT_MAX_STRIDE, rate_percentile=DEFAULT_RATE_PERCENTILE):
+    rate = percentile(change_per_frame, rate_percentile)
+    if rate <= 0.0:
+        return max_stride
+    return max(1, min(max_stride, int(threshold / rate)))
+
+def plan_frame_sampling(animation_asset, frame_rate, start_frame, end_frame,
+                        camera_keys=None, subject_location=None,
+                        threshold=DEFAULT_MOTION_THRESHOLD, max_stride=DEFAULT_MAX_STRIDE):
+    # Returns (stride, frame_indices, stats) for the sequence range [start_frame, end_frame)
+    fps = frame_rate.numerator / frame_rate.denominator
+    rotations, root_translations = sample_bone_rotations(animation_asset)
+    anim_changes = pose_change_per_frame(rotations, root_translations)
+
+    # Resample from animation frames to sequence frames
+    sequence_length = animation_asset.get_editor_property('sequence_length')
+    anim_fps = len(anim_changes) / sequence_length if sequence_length > 0 else fps
+    change_per_frame = []
+    for frame in range(start_frame, end_frame):
+        anim_frame = int((frame - start_frame) / fps * anim_fps)
+        if anim_frame < len(anim_changes):
+            change_per_frame.append(anim_changes[anim_frame] * anim_fps / fps)
+        else:
+            # the animation has ended and the character holds its last pose
+            change_per_frame.append(0.0)
+
+    if camera_keys and subject_location is not None:
+        camera_changes = camera_change_per_frame(camera_keys, subject_location, start_frame, end_frame)
+        change_per_frame = [a + c for a, c in zip(change_per_frame, camera_changes)]
+
+    stride = choose_frame_stride(change_per_frame, threshold=threshold, max_stride=max_stride)
+    frame_indices = list(range(start_frame, end_frame, stride))
+    stats = {
+        'motion_threshold': threshold,
+        'mean_change_per_frame': sum(change_per_frame) / max(len(change_per_frame), 1),
+        'peak_change_per_frame': max(change_per_frame, default=0.0),
+    }
+    return stride, frame_indices, stats
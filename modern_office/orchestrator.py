@@ -0,0 +1,290 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Engine-free: the orchestrator only talks to an executor object with
+#   start(task, on_finished(success), on_error(error_text, is_fatal))
+#   cancel()     stops the running pass, whose on_finished(False) follows once it has wound down
+# so it can be driven by the Movie Render Queue (render.UnrealPassExecutor)
+# or by SimulatedExecutor below.
+
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+# orchestrator states
+IDLE = 'idle'
+BUILDING = 'building'
+RENDERING = 'rendering'
+# a gate (add_gate) holds off building the next scene, e.g. while uploads catch up
+WAITING = 'waiting'
+# a timed out pass was cancelled; the next one starts once the executor reports it stopped
+CANCELLING = 'cancelling'
+DRAINING = 'draining'
+DONE = 'done'
+
+HOOK_EVENTS = ('scene_built', 'pass_finished', 'scene_finished', 'task_failed', 'batch_finished')
+
+
+class RenderTask:
+    def __init__(self, scene_index, scene, pass_name, timeout=None):
+        self.scene_index = scene_index
+        self.scene = scene
+        self.pass_name = pass_name
+        self.timeout = timeout
+        self.state = PENDING
+        self.attempts = 0
+        self.started_at = None
+        self.errors = []
+
+    def __repr__(self):
+        return f"RenderTask(scene={self.scene_index}, pass={self.pass_name}, state={self.state}, attempts={self.attempts})"
+
+class RetryPolicy:
+    def __init__(self, max_attempts=2, retry_on_timeout=True):
+        self.max_attempts = max_attempts
+        self.retry_on_timeout = retry_on_timeout
+
+    def should_retry(self, task, reason):
+        if reason == 'timeout' and not self.retry_on_timeout:
+            return False
+        return task.attempts < self.max_attempts
+
+class RenderOrchestrator:
+    def __init__(self, executor, build_scene, scene_count, render_passes, pass_timeouts=None,
+                 default_timeout=None, retry_policy=None, cpu_workers=2, clock=time.monotonic, cancel_timeout=60.0):
+        # build_scene(scene_index) -> scene with .output_path and .frame_step
+        self.executor = executor
+        self.build_scene = build_scene
+        self.scene_count = scene_count
+        self.render_passes = list(render_passes)
+        self.pass_timeouts = pass_timeouts or {}
+        self.default_timeout = default_timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.clock = clock
+        # seconds to wait for a cancelled pass to report back before starting the next one anyway
+        self.cancel_timeout = cancel_timeout
+
+        self.state = IDLE
+        self.queue = deque()
+        self.current_task = None
+        self.cancelling_task = None
+        self.cancelled_attempt = None
+        self.cancel_started_at = None
+        self.next_scene_index = 0
+        self.completed_scenes = []
+        self.failed_scenes = []
+        self.hooks = {event: [] for event in HOOK_EVENTS}
+        self.gates = []
+        self.cpu_pool = ThreadPoolExecutor(max_workers=cpu_workers)
+        self.cpu_futures = []
+
+    def add_hook(self, event, callback):
+        if event not in self.hooks:
+            raise KeyError(f"Unknown hook '{event}', expected one of {HOOK_EVENTS}")
+        self.hooks[event].append(callback)
+
+    def add_gate(self, ready):
+        # ready() -> False keeps the next scene from being built; checked again every tick
+        self.gates.append(ready)
+
+    def emit(self, event, *args):
+        for callback in self.hooks[event]:
+            callback(*args)
+
+    def submit_cpu(self, fn, *args, **kwargs):
+        # CPU-side work (packing, validation, ...) runs while the GPU renders the next pass
+        future = self.cpu_pool.submit(fn, *args, **kwargs)
+        self.cpu_futures.append(future)
+        return future
+
+    def start(self):
+        self.advance()
+
+    def stop_after_current_scene(self):
+        # no new scenes are built; passes already queued still render
+        self.scene_count = self.next_scene_index
+
+    def cancel(self):
+        # No new scenes are built and the current scene fails: its queued passes are dropped and the
+        # running one is cancelled. The batch finishes once the executor reports it stopped.
+        self.scene_count = self.next_scene_index
+        task = self.current_task or (self.queue[0] if self.queue else None)
+        self.queue.clear()
+        if task is not None:
+            task.state = FAILED
+            self.failed_scenes.append(task.scene_index)
+            self.emit('task_failed', task, f"{task.pass_name} pass cancelled")
+        if self.current_task is not None:
+            self.current_task = None
+            self.cancelling_task, self.cancelled_attempt = task, task.attempts
+            self.cancel_started_at = self.clock()
+            self.state = CANCELLING
+            self.executor.cancel()
+        elif self.state == WAITING:
+            self.advance()
+
+    def advance(self):
+        # Start the next pass, building the next scene first if the queue is empty
+        while not self.queue:
+            if self.next_scene_index >= self.scene_count:
+                self.state = DRAINING
+                self.check_drained()
+                return
+            if not all(ready() for ready in self.gates):
+                self.state = WAITING
+                return
+            self.enqueue_scene(self.next_scene_index)
+            self.next_scene_index += 1
+
+        task = self.queue.popleft()
+        task.state = RUNNING
+        task.attempts += 1
+        task.started_at = self.clock()
+        self.current_task = task
+        self.state = RENDERING
+        # callbacks carry the attempt, so a late one of a cancelled attempt can't finish its retry
+        attempt = task.attempts
+        self.executor.start(task,
+                            on_finished=lambda success: self.task_finished(task, success, attempt),
+                            on_error=lambda error_text, is_fatal: self.task_errored(task, error_text, is_fatal))
+
+    def enqueue_scene(self, scene_index):
+        self.state = BUILDING
+        try:
+            scene = self.build_scene(scene_index)
+        except Exception as e:
+            self.failed_scenes.append(scene_index)
+            self.emit('task_failed', RenderTask(scene_index, None, None), f"scene build failed: {e!r}")
+            return
+        self.emit('scene_built', scene_index, scene)
+        # a scene may render its own passes instead, e.g. background plates (stages.background_plate)
+        for pass_name in getattr(scene, 'render_passes', None) or self.render_passes:
+            timeout = self.pass_timeouts.get(pass_name, self.default_timeout)
+            self.queue.append(RenderTask(scene_index, scene, pass_name, timeout=timeout))
+
+    def task_errored(self, task, error_text, is_fatal):
+        # The executor reports errors before its finished callback, so only record them here
+        task.errors.append(error_text)
+
+    def task_finished(self, task, success, attempt=None):
+        if task is self.cancelling_task and attempt == self.cancelled_attempt:
+            # the cancelled pass has wound down (e.g. its PIE session closed), the next one can start
+            self.cancelling_task = None
+            self.advance()
+            return
+        if task is not self.current_task or (attempt is not None and attempt != task.attempts):
+            # late callback of a cancelled (timed out) pass
+            return
+        self.current_task = None
+        if success:
+            task.state = SUCCEEDED
+            self.emit('pass_finished', task)
+            if not any(t.scene_index == task.scene_index for t in self.queue):
+                self.completed_scenes.append(task.scene_index)
+                self.emit('scene_finished', task.scene_index, task.scene)
+        else:
+            self.fail(task, task.errors[-1] if task.errors else 'render failed', reason='error')
+        self.advance()
+
+    def fail(self, task, message, reason):
+        if self.retry_policy.should_retry(task, reason):
+            task.state = PENDING
+            self.queue.appendleft(task)
+            return
+        task.state = FAILED
+        # drop the remaining passes of the scene, a partial scene is not useful
+        self.queue = deque(t for t in self.queue if t.scene_index != task.scene_index)
+        self.failed_scenes.append(task.scene_index)
+        self.emit('task_failed', task, message)
+
+    def tick(self):
+        # Call periodically (e.g. from a slate tick) to enforce pass timeouts and finish draining
+        task = self.current_task
+        if task is not None and task.timeout is not None and self.clock() - task.started_at > task.timeout:
+            self.current_task = None
+            self.cancelling_task, self.cancelled_attempt = task, task.attempts
+            self.cancel_started_at = self.clock()
+            self.state = CANCELLING
+            # failed (and maybe queued again) first, the executor may report back from cancel() itself
+            self.fail(task, f"{task.pass_name} pass timed out after {task.timeout}s", reason='timeout')
+            self.executor.cancel()
+        elif self.state == CANCELLING and self.cancelling_task is not None:
+            if self.clock() - self.cancel_started_at > self.cancel_timeout:
+                # never reported back; starting the next pass beats waiting forever
+                self.cancelling_task = None
+                self.advance()
+        elif self.state == WAITING:
+            self.advance()
+        elif self.state == DRAINING:
+            self.check_drained()
+
+    def check_drained(self):
+        self.cpu_futures = [f for f in self.cpu_futures if not f.done()]
+        if self.cpu_futures:
+            return
+        self.state = DONE
+        self.cpu_pool.shutdown(wait=False)
+        self.emit('batch_finished', self.completed_scenes, self.failed_scenes)
+
+class SimulatedExecutor:
+    # Stand-in for the Movie Render Queue: passes finish when the fake clock passes their duration.
+    # outcomes maps (scene_index, pass_name) to a list of results per attempt: 'ok', 'error' or 'hang'.
+    # A cancelled pass reports on_finished(False) cancel_duration later, like a PIE session closing;
+    # never with cancel_duration=None.
+    def __init__(self, pass_duration=1.0, outcomes=None, cancel_duration=0.0):
+        self.now = 0.0
+        self.pass_duration = pass_duration
+        self.outcomes = outcomes or {}
+        self.cancel_duration = cancel_duration
+        self.running = None
+        self.started = []
+        self.cancelled = []
+
+    def clock(self):
+        return self.now
+
+    def start(self, task, on_finished, on_error):
+        attempts = self.outcomes.get((task.scene_index, task.pass_name), [])
+        outcome = attempts[task.attempts - 1] if task.attempts <= len(attempts) else 'ok'
+        self.running = (task, on_finished, on_error, outcome, self.now + self.pass_duration)
+        self.started.append((task.scene_index, task.pass_name, task.attempts, self.now))
+
+    def cancel(self):
+        if self.running is None:
+            return
+        task, on_finished, on_error, _, _ = self.running
+        self.cancelled.append(task)
+        if self.cancel_duration is None:
+            self.running = None
+            return
+        self.running = (task, on_finished, on_error, 'cancelled', self.now + self.cancel_duration)
+        if self.cancel_duration == 0:
+            self.advance(0)
+
+    def advance(self, seconds):
+        self.now += seconds
+        if self.running is None:
+            return
+        task, on_finished, on_error, outcome, finish_at = self.running
+        if outcome == 'hang' or self.now < finish_at:
+            return
+        self.running = None
+        if outcome == 'cancelled':
+            on_finished(False)
+        elif outcome == 'error':
+            on_error(f"simulated error in {task.pass_name}", True)
+            on_finished(False)
+        else:
+            on_finished(True)
+
+def run_simulated(orchestrator, executor, step=0.5, max_steps=100000):
+    # Drive an orchestrator built with clock=executor.clock until the batch is done
+    orchestrator.start()
+    for _ in range(max_steps):
+        if orchestrator.state == DONE:
+            return orchestrator
+        executor.advance(step)
+        orchestrator.tick()
+    raise RuntimeError(f"Simulated batch did not finish, state {orchestrator.state}")
@@ -0,0 +1,490 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import wait
+
+from .assets import find_relevant_assets, count_loaded_assets
+from .aux_outputs import AUX_OUTPUTS, export_aux_outputs
+from .dataset_stats import DatasetStats, load_stats, write_stats
+from .encoders import ENCODERS, FrameWriterPool, needs_transcode
+from .engine import unreal
+from .labels import load_labels, write_scene_labels
+from .layout import (DATASET_STATS_FILE, RESTART_FILE, STATS_FILE, pass_output_path, scene_key, scene_output_path,
+                     timestamp)
+from .lighting import clear_skylight_pool, restore_lighting
+from .materials import restore_original_materials
+from .manifest import MANIFEST_FILE, Manifest, scan_pass_frames
+from .metrics import BatchMetrics
+from .orchestrator import RenderOrchestrator, RenderTask, RetryPolicy
+from .plates import (AUX_SOURCES, COMPOSITES, LAYER_PASSES, LAYER_STAGING, PLATE_PASSES, PLATE_STAGING,
+                     composite_scene, get_plate_cache)
+from .profiler import enable_profiling, disable_profiling
+from .render import RENDER_PASSES, UnrealPassExecutor, pass_encoders, pass_quality_profiles
+from .resources import ResourceManager
+from .scene_metadata import write_scene_metadata
+from .storage import BackgroundUploader, make_sink
+from .telemetry import TelemetrySampler
+from .video import VIDEO_CODECS, encode_pass_video, scan_video_frames
+from .warmup import ShaderWarmup
+from .sequencer import load_render_sequence, clean_sequencer
+from .stages import Scene, run_stage
+
+
+def normalize_stages(stages):
+    # accept "name" or ("name", {options}) entries
+    normalized = []
+    for stage in stages:
+        if isinstance(stage, str):
+            normalized.append((stage, {}))
+        else:
+            name, options = stage
+            normalized.append((name, dict(options)))
+    return normalized
+
+class Pipeline:
+    def __init__(self, stages, render_passes, output_root, rounds=1, pass_timeout=3600.0,
+                 pass_timeouts=None, max_attempts=2, sink=None, upload_workers=4, delete_local=False,
+                 telemetry=True, trace_python=False, thresholds=None, gc_interval=5, profile=False,
+                 warmup=False, manifest_path=None, encoder='png', encoder_options=None, writer_workers=4,
+                 video_passes=None, aux_outputs=None, metrics_path=None, metrics_port=None, label_passes=None,
+                 quality_profiles=None, stats_passes=None, quit_on_finish=False):
+        self.stages = normalize_stages(stages)
+        self.render_passes = list(render_passes)
+        self.output_root = output_root
+        self.rounds = rounds
+        self.pass_timeout = pass_timeout
+        self.pass_timeouts = pass_timeouts or {}
+        self.max_attempts = max_attempts
+        # finished scenes are copied to the sink (a URL for make_sink, or an OutputSink) in the background
+        self.sink = make_sink(sink) if isinstance(sink, str) else sink
+        self.upload_workers = upload_workers
+        self.delete_local = delete_local
+        self.uploader = None
+        self.resource_manager = ResourceManager(gc_interval=gc_interval)
+        # RSS/GPU memory samples for the restart thresholds; trace_python adds Python heap samples and
+        # tracemalloc snapshots per scene, at the cost of tracing every allocation in the editor
+        self.telemetry = telemetry
+        self.trace_python = trace_python
+        self.thresholds = thresholds
+        self.sampler = None
+        self.restart_reason = None
+        # record every engine call per scene into <scene>/unreal_calls.folded (+ .json summary)
+        self.profile = profile
+        self.profiler = None
+        # written when memory thresholds are hit; LaunchBatch.py relaunches the editor and the next
+        # session resumes the remaining rounds
+        self.restart_state_path = os.path.join(output_root, RESTART_FILE)
+        # quit the editor once the batch is done, for launchers waiting on the editor process
+        self.quit_on_finish = quit_on_finish
+        # scenes, passes and frames are indexed in a SQLite manifest (by default next to the scenes)
+        self.manifest_path = manifest_path or os.path.join(output_root, MANIFEST_FILE)
+        self.manifest = None
+        # render every distinct mesh/material once before the batch so shader compiles don't land in it
+        self.warmup = warmup
+        self.warmup_orchestrator = None
+        # output encoder per pass (encoders.ENCODERS); BMP intermediates are transcoded on a writer pool
+        self.encoders = pass_encoders(self.render_passes, encoder)
+        self.encoder_options = encoder_options or {}
+        self.writer_workers = writer_workers
+        self.writer_pool = None
+        # {pass name: codec} packed into one video per scene (video.VIDEO_CODECS) from BMP intermediates
+        self.video_passes = video_passes or {}
+        for pass_name, codec in self.video_passes.items():
+            if codec not in VIDEO_CODECS:
+                raise KeyError(f"Unknown video codec '{codec}', expected one of {list(VIDEO_CODECS)}")
+            if RENDER_PASSES[pass_name]['write_alpha']:
+                raise ValueError(f"{pass_name} pass keeps alpha, which the video codecs drop")
+            self.encoders[pass_name] = 'bmp'
+        # {pass name: ['depth', 'motion']} exported from the same playback as float16 arrays (aux_outputs.py)
+        self.aux_outputs = {pass_name: list(names) for pass_name, names in (aux_outputs or {}).items()}
+        for names in self.aux_outputs.values():
+            for name in names:
+                if name not in AUX_OUTPUTS:
+                    raise KeyError(f"Unknown output '{name}', expected one of {list(AUX_OUTPUTS)}")
+        if 'rgb' in self.aux_outputs:
+            # with background plates, rgb's depth/motion are composited from these (plates.py)
+            for pass_name in AUX_SOURCES:
+                self.aux_outputs.setdefault(pass_name, self.aux_outputs['rgb'])
+        # mask passes labeled (boxes, areas, truncation, centroids) into <scene>/labels_<pass>.npz, see labels.py
+        self.label_passes = [pass_name for pass_name in label_passes or () if pass_name in self.render_passes]
+        # render quality per pass (render.QUALITY_PROFILES), {pass name: profile} overriding the pass's own
+        self.quality_profiles = pass_quality_profiles(self.render_passes, quality_profiles)
+        # channel moments/histograms of these passes, mask coverage and frames per character, kept per
+        # scene (<scene>/stats.json) and per batch (<output_root>/dataset_stats.json), see dataset_stats.py
+        self.stats_passes = [pass_name for pass_name in stats_passes or () if pass_name in self.render_passes]
+        self.dataset_stats_path = os.path.join(output_root, DATASET_STATS_FILE)
+        self.dataset_stats = None
+        # scene key -> DatasetStats of the scene's finished passes
+        self.scene_stats = {}
+        # scene key -> why its stats could not be computed; those scenes are left out of the totals
+        self.stats_failures = {}
+        self.stats_lock = threading.Lock()
+        # Prometheus text file (node exporter textfile collector) and/or http://<node>:<port>/metrics
+        self.metrics_path = metrics_path
+        self.metrics_port = metrics_port
+        self.metrics = None
+        self.orchestrator = None
+        self.tick_handle = None
+
+    def build_scene(self, scene_index=0):
+        if self.profiler is not None:
+            self.profiler.reset()
+        unreal.log(f"========== Start Render Round {scene_index + 1}/{self.rounds} ==========")
+        build_started_at = time.monotonic()
+        # get sequencer and clean it
+        level_sequence = load_render_sequence()
+        clean_sequencer(level_sequence)
+
+        output_path = scene_output_path(self.output_root)
+        scene = Scene(level_sequence, find_relevant_assets(), output_path,
+                      resources=self.resource_manager.begin_scene())
+        try:
+            for name, options in self.stages:
+                stage_started_at = time.monotonic()
+                run_stage(name, scene, **options)
+                scene.metadata.setdefault('stage_seconds', {})[name] = round(time.monotonic() - stage_started_at, 3)
+                if self.sampler is not None:
+                    self.sampler.sample(f"stage:{name}", scene_index)
+        except Exception:
+            self.resource_manager.end_scene(scene)
+            raise
+
+        scene.metadata['build_seconds'] = round(time.monotonic() - build_started_at, 3)
+        write_scene_metadata(scene.output_path, scene.metadata)
+        return scene
+
+    def make_orchestrator(self, executor):
+        orchestrator = RenderOrchestrator(executor, self.build_scene, self.rounds, self.render_passes,
+                                          pass_timeouts=self.pass_timeouts, default_timeout=self.pass_timeout,
+                                          retry_policy=RetryPolicy(max_attempts=self.max_attempts))
+        if self.metrics_path is not None or self.metrics_port is not None:
+            # first, so pass metrics see the frames as rendered
+            self.metrics = BatchMetrics(self.output_root, path=self.metrics_path, port=self.metrics_port,
+                                        const_labels={'batch': os.path.basename(os.path.normpath(self.output_root))})
+            self.metrics.add_hooks(orchestrator)
+        self.manifest = Manifest(self.manifest_path)
+        if self.stats_passes:
+            # carried on across editor restarts and earlier runs into the same batch
+            self.dataset_stats = (load_stats(self.dataset_stats_path) if os.path.exists(self.dataset_stats_path)
+                                  else DatasetStats())
+        if any(needs_transcode(encoder) for encoder in self.encoders.values()):
+            self.writer_pool = FrameWriterPool(max_workers=self.writer_workers)
+        orchestrator.add_hook('scene_built', self.record_scene)
+        orchestrator.add_hook('pass_finished', self.record_pass)
+        orchestrator.add_hook('task_failed', self.task_failed)
+        # registered first so telemetry and uploads see the scene after its resources are released
+        orchestrator.add_hook('scene_finished', self.teardown_scene)
+        orchestrator.add_hook('scene_finished', self.composite_plate)
+        orchestrator.add_hook('scene_finished', self.complete_scene)
+        if self.profile:
+            orchestrator.add_hook('scene_finished', self.write_profile)
+        if self.sink is not None:
+            self.uploader = BackgroundUploader(self.sink, max_workers=self.upload_workers,
+                                               delete_local=self.delete_local)
+            orchestrator.add_hook('scene_finished', self.upload_scene)
+            # the next scene is built once the upload backlog is below max_pending again
+            orchestrator.add_gate(lambda: not self.uploader.backlogged())
+        if self.telemetry:
+            report_path = os.path.join(self.output_root, 'telemetry', f"batch_{timestamp()}.json")
+            self.sampler = TelemetrySampler(report_path, thresholds=self.thresholds,
+                                            asset_counter=count_loaded_assets, trace_python=self.trace_python)
+            orchestrator.add_hook('pass_finished', self.sample_pass)
+            orchestrator.add_hook('scene_finished', self.check_memory)
+        orchestrator.add_hook('batch_finished', self.batch_finished)
+        return orchestrator
+
+    def resume_from_restart(self):
+        # left behind by a batch that quit the editor on a memory threshold
+        if not os.path.exists(self.restart_state_path):
+            return
+        with open(self.restart_state_path) as f:
+            state = json.load(f)
+        os.remove(self.restart_state_path)
+        self.rounds = state['remaining_rounds']
+        unreal.log(f"Resuming after editor restart ({state['reason']}): {self.rounds} rounds left")
+
+    def run(self):
+        self.resume_from_restart()
+        if self.profile:
+            self.profiler = enable_profiling()
+        executor = UnrealPassExecutor(self.encoders,
+                                      exr_compression=self.encoder_options.get('exr', {}).get('compression', 'ZIP'),
+                                      aux_outputs=self.aux_outputs, quality_profiles=self.quality_profiles)
+        try:
+            self.orchestrator = self.make_orchestrator(executor)
+            # timeouts and CPU-side work are checked from the editor tick
+            self.tick_handle = unreal.register_slate_post_tick_callback(self.tick)
+            if self.warmup:
+                shader_warmup = ShaderWarmup(self.stages, os.path.join(self.output_root, '_warmup'),
+                                             self.resource_manager,
+                                             report_path=os.path.join(self.output_root, 'telemetry',
+                                                                      f"warmup_{timestamp()}.json"))
+                self.warmup_orchestrator = shader_warmup.make_orchestrator(executor, on_done=self.start_batch)
+                self.warmup_orchestrator.start()
+            else:
+                self.start_batch()
+        except Exception:
+            self.abort()
+            raise
+
+    def start_batch(self):
+        self.warmup_orchestrator = None
+        self.orchestrator.start()
+
+    def tick(self, delta_seconds):
+        try:
+            (self.warmup_orchestrator or self.orchestrator).tick()
+        except Exception:
+            # it would raise again on every tick
+            self.abort()
+            raise
+
+    def cancel(self):
+        # e.g. from the editor's Python console: the running pass is cancelled, its scene fails and the
+        # batch finishes as usual, with the scenes done so far
+        if self.warmup_orchestrator is not None:
+            self.warmup_orchestrator.cancel()
+        self.orchestrator.cancel()
+
+    def abort(self):
+        # the batch broke: stop ticking it and leave the level as it was
+        if self.tick_handle is not None:
+            unreal.unregister_slate_post_tick_callback(self.tick_handle)
+            self.tick_handle = None
+        self.restore_level()
+
+    def restore_level(self):
+        # the level's own skylight, sun, lights and surface materials, as it was before the first scene
+        clear_skylight_pool()
+        restore_lighting()
+        restore_original_materials()
+
+    def scene_key(self, scene):
+        return scene_key(self.output_root, scene.output_path)
+
+    def record_scene(self, scene_index, scene):
+        self.manifest.add_scene(self.scene_key(scene), self.output_root, scene.output_path, scene.metadata,
+                                build_seconds=scene.metadata.get('build_seconds'))
+
+    def record_pass(self, task):
+        render_seconds = self.orchestrator.clock() - task.started_at
+        pass_name = task.pass_name
+        if pass_name in PLATE_PASSES or pass_name in LAYER_PASSES:
+            # background plate and character layer passes only feed composite_plate
+            if pass_name in self.aux_outputs:
+                output_path = pass_output_path(task.scene, pass_name)
+                task.scene.output_futures.append(self.orchestrator.submit_cpu(
+                    export_aux_outputs, os.path.join(output_path, pass_name), output_path, self.aux_outputs[pass_name]))
+            return
+        if (pass_name in self.aux_outputs or pass_name in self.video_passes or pass_name in self.label_passes
+                or pass_name in self.stats_passes or needs_transcode(self.encoders[pass_name])):
+            # post-processed while the next pass renders; indexed once the final files exist
+            task.scene.output_futures.append(self.orchestrator.submit_cpu(self.finish_pass, task, render_seconds))
+        else:
+            self.index_pass(task, render_seconds)
+
+    def finish_pass(self, task, render_seconds):
+        pass_dir = os.path.join(task.scene.output_path, task.pass_name)
+        encoder = self.encoders[task.pass_name]
+        aux_outputs = self.aux_outputs.get(task.pass_name)
+        if aux_outputs:
+            # first, so the depth/motion images are out of the pass's folder; nothing to export for
+            # passes composited from background plates
+            try:
+                export_aux_outputs(pass_dir, task.scene.output_path, aux_outputs, keep_final_exr=encoder == 'exr')
+            except Exception as e:
+                unreal.log_warning(f"{task.pass_name}: depth/motion kept as EXR: {e!r}")
+        if task.pass_name in self.stats_passes:
+            # before video packing or transcoding, while the frames are still BMP intermediates
+            try:
+                stats = DatasetStats()
+                stats.add_pass(task.scene.output_path, task.pass_name)
+                self.add_scene_stats(task.scene, stats)
+            except Exception as e:
+                self.fail_scene_stats(task.scene, f"{task.pass_name}: {e!r}")
+        if task.pass_name in self.video_passes:
+            try:
+                encode_pass_video(pass_dir, self.video_passes[task.pass_name])
+            except Exception as e:
+                unreal.log_warning(f"{task.pass_name}: video encode failed, frames kept as written: {e!r}")
+        elif needs_transcode(encoder):
+            failed = self.writer_pool.transcode_pass(pass_dir, encoder, self.encoder_options.get(encoder))
+            if failed:
+                unreal.log_warning(f"{task.pass_name}: {len(failed)} frames could not be encoded as {encoder}, "
+                                   f"kept as written")
+        if task.pass_name in self.label_passes:
+            try:
+                path = write_scene_labels(task.scene.output_path, task.pass_name)
+                if path is not None and self.dataset_stats is not None:
+                    stats = DatasetStats()
+                    stats.add_coverage(task.pass_name, load_labels(path)['coverage'])
+                    self.add_scene_stats(task.scene, stats)
+            except Exception as e:
+                unreal.log_warning(f"{task.pass_name}: mask labels failed: {e!r}")
+                if self.dataset_stats is not None:
+                    self.fail_scene_stats(task.scene, f"{task.pass_name} coverage: {e!r}")
+        self.index_pass(task, render_seconds)
+        for name in aux_outputs or ():
+            self.manifest.add_pass(self.scene_key(task.scene), name, 'succeeded', attempts=task.attempts,
+                                   frames=scan_pass_frames(task.scene.output_path, name))
+
+    def add_scene_stats(self, scene, stats):
+        # passes of a scene finish on different CPU workers
+        with self.stats_lock:
+            self.scene_stats.setdefault(self.scene_key(scene), DatasetStats()).merge(stats)
+
+    def fail_scene_stats(self, scene, message):
+        # a scene with some of its stats missing would skew the totals, so it is left out of them
+        unreal.log_error(f"{scene.output_path}: dataset stats failed, scene left out of {DATASET_STATS_FILE}: {message}")
+        with self.stats_lock:
+            self.stats_failures[self.scene_key(scene)] = message
+
+    def write_scene_stats(self, scene):
+        # the scene's stats.json, then merged into the batch's; failed scenes count in neither
+        with self.stats_lock:
+            stats = self.scene_stats.pop(self.scene_key(scene), None) or DatasetStats()
+            if self.scene_key(scene) in self.stats_failures:
+                return
+            stats.add_scene(scene.metadata)
+            write_stats(stats, os.path.join(scene.output_path, STATS_FILE))
+            write_stats(self.dataset_stats.merge(stats), self.dataset_stats_path)
+
+    def index_pass(self, task, render_seconds):
+        # image frames, or the frames of the pass's video once it is packed
+        frames = (scan_pass_frames(task.scene.output_path, task.pass_name)
+                  or scan_video_frames(task.scene.output_path, task.pass_name))
+        self.manifest.add_pass(self.scene_key(task.scene), task.pass_name, 'succeeded', attempts=task.attempts,
+                               render_seconds=render_seconds, frames=frames)
+
+    def after_outputs(self, scene, fn, *args):
+        # fn(*args) once every pass of the scene is encoded, right away if none is pending
+        futures = scene.output_futures
+        if not futures:
+            fn(*args)
+            return
+
+        def wait_and_call():
+            wait(futures)
+            fn(*args)
+        self.orchestrator.submit_cpu(wait_and_call)
+
+    def composite_plate(self, scene_index, scene):
+        # Background plate mode: publishes the plate the scene rendered (if any) to the cache, then
+        # composites the scene's passes over it and post-processes them like rendered ones
+        if scene.plate is None:
+            return
+        cache = get_plate_cache(scene.plate['root'])
+        key = scene.plate['key']
+        if not scene.plate['cached']:
+            metadata = {name: scene.metadata.get(name) for name in ('camera_key', 'target_point_key', 'camera_path',
+                                                                    'lighting', 'materials', 'plate_variant')}
+            def publish(futures):
+                wait(futures)
+                return cache.publish(key, os.path.join(scene.output_path, PLATE_STAGING),
+                                     dict(metadata, key=key, scene=self.scene_key(scene)))
+            # later scenes on this plate wait for it instead of rendering it again
+            cache.set_publishing(key, self.orchestrator.submit_cpu(publish, list(scene.output_futures)))
+
+        passes = [pass_name for pass_name in self.render_passes if pass_name in COMPOSITES]
+        extensions = {pass_name: 'bmp' if ENCODERS[self.encoders[pass_name]]['intermediate'] == 'bmp' else 'png'
+                      for pass_name in passes}
+        aux_names = self.aux_outputs.get('rgb', []) if 'rgb' in passes else []
+        def composite(futures):
+            wait(futures)
+            try:
+                plate_dir = cache.wait(key)
+                composite_scene(scene.output_path, plate_dir, os.path.join(scene.output_path, LAYER_STAGING), passes,
+                                extensions=extensions, aux_names=aux_names)
+            except Exception as e:
+                unreal.log_error(f"Scene {scene_index + 1}: compositing over plate {key} failed: {e!r}")
+                scene.plate['error'] = repr(e)
+                return
+            for pass_name in passes:
+                task = RenderTask(scene_index, scene, pass_name)
+                task.attempts = 1
+                self.finish_pass(task, None)
+        scene.output_futures.append(self.orchestrator.submit_cpu(composite, list(scene.output_futures)))
+
+    def complete_scene(self, scene_index, scene):
+        self.after_outputs(scene, self.set_scene_complete, scene)
+
+    def set_scene_complete(self, scene):
+        failed = scene.plate is not None and 'error' in scene.plate
+        self.manifest.set_scene_status(self.scene_key(scene), 'failed' if failed else 'complete')
+        if self.dataset_stats is not None:
+            if failed:
+                with self.stats_lock:
+                    self.scene_stats.pop(self.scene_key(scene), None)
+                    self.stats_failures.pop(self.scene_key(scene), None)
+            else:
+                self.write_scene_stats(scene)
+
+    def upload_scene(self, scene_index, scene):
+        self.after_outputs(scene, self.uploader.submit, scene.output_path, self.scene_key(scene))
+
+    def teardown_scene(self, scene_index, scene):
+        self.resource_manager.end_scene(scene)
+
+    def write_profile(self, scene_index, scene):
+        path = self.profiler.write(os.path.join(scene.output_path, 'unreal_calls'))
+        summary = self.profiler.summary(top=1)
+        unreal.log(f"Scene {scene_index + 1}: {summary['total_calls']} engine calls, "
+                   f"{summary['total_seconds']:.2f}s, profile {path}")
+
+    def sample_pass(self, task):
+        self.sampler.sample(f"pass:{task.pass_name}", task.scene_index)
+
+    def check_memory(self, scene_index, scene):
+        # loaded assets are counted once per scene, after its resources are released
+        self.sampler.sample('scene', scene_index, count_assets=True)
+        self.sampler.snapshot(scene_index)
+        self.restart_reason = self.sampler.restart_reason()
+        if self.restart_reason is not None:
+            unreal.log_warning(f"Stopping batch for an editor restart: {self.restart_reason}")
+            self.orchestrator.stop_after_current_scene()
+
+    def task_failed(self, task, message):
+        unreal.log_error(f"Scene {task.scene_index + 1} failed: {message}")
+        if task.scene is not None:
+            scene_key = self.scene_key(task.scene)
+            self.manifest.add_pass(scene_key, task.pass_name, 'failed', attempts=task.attempts, error=message)
+            self.manifest.set_scene_status(scene_key, 'failed')
+            with self.stats_lock:
+                self.scene_stats.pop(scene_key, None)
+                self.stats_failures.pop(scene_key, None)
+            self.resource_manager.end_scene(task.scene)
+
+    def batch_finished(self, completed_scenes, failed_scenes):
+        if self.tick_handle is not None:
+            unreal.unregister_slate_post_tick_callback(self.tick_handle)
+            self.tick_handle = None
+        if self.metrics is not None:
+            self.metrics.close()
+        if self.writer_pool is not None:
+            # the orchestrator only finishes the batch once every transcode has been indexed
+            self.writer_pool.close()
+        if self.uploader is not None:
+            # uploads still in flight keep running on the pool, unless the editor is about to quit
+            self.uploader.close(wait=self.quit_on_finish or self.restart_reason is not None)
+        self.restore_level()
+        unreal.log(f"========== All renders completed: {len(completed_scenes)} scenes, {len(failed_scenes)} failed ==========")
+        if self.profiler is not None:
+            disable_profiling()
+            self.profiler = None
+        unreal.log(f"Manifest {self.manifest_path}: {self.manifest.summary()}")
+        if self.dataset_stats is not None:
+            unreal.log(f"Dataset stats {self.dataset_stats_path}: {self.dataset_stats.summary()}")
+            if self.stats_failures:
+                unreal.log_error(f"Dataset stats are missing {len(self.stats_failures)} scenes: {self.stats_failures}")
+        self.manifest.close()
+        if self.sampler is not None:
+            unreal.log(f"Telemetry report: {self.sampler.write_report()}")
+        if self.restart_reason is not None:
+            # quit cleanly; the launcher restarts the editor and run() picks up the remaining rounds
+            remaining_rounds = self.rounds - len(completed_scenes) - len(failed_scenes)
+            with open(self.restart_state_path, 'w') as f:
+                json.dump({'remaining_rounds': remaining_rounds, 'reason': self.restart_reason}, f)
+            unreal.SystemLibrary.quit_editor()
+        elif self.quit_on_finish:
+            unreal.SystemLibrary.quit_editor()
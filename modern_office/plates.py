@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # compositing needs it, planning doesn't
+    np = None
+
+from .aux_outputs import load_aux_frame
+from .encoders import Frame, encode_bmp, encode_png, read_bmp, read_png
+from .layout import FINAL_IMAGE, IMAGE_NAME_RE, frame_file_name, pass_dir
+
+# Engine-free: background plates. The office behind the character only depends on the camera
+# path, lighting and materials, so scenes sharing those render the background once into a plate
+# cache (<plate root>/<plate key>/) and then only the character layer:
+#   character          the character alone, background actors hidden, alpha is its coverage
+#   character_normals  the same for the normals pass
+#   shadow             the background with the character hidden but casting shadows, at a lower
+#                      resolution; divided by the plate's own shadow pass it is the shadow catcher
+# The scene's rgb/normals/rgb_alpha frames (and depth/motion) are composited from the plate and
+# the character layer, see composite_scene. Passes are registered in render.py.
+PLATE_PASSES = ['plate_rgb', 'plate_normals', 'plate_shadow']
+LAYER_PASSES = ['character', 'character_normals', 'shadow']
+# the scene's pass -> (plate pass, character layer pass); the alpha passes add the character's coverage
+COMPOSITES = {
+    'rgb': ('plate_rgb', 'character'),
+    'rgb_alpha': ('plate_rgb', 'character'),
+    'alpha': ('plate_rgb', 'character'),
+    'normals': ('plate_normals', 'character_normals'),
+}
+ALPHA_COMPOSITES = ('rgb_alpha', 'alpha')
+# depth and motion of these come from the plate and character passes' aux outputs
+AUX_SOURCES = ('plate_rgb', 'character')
+PLATE_FILE = 'plate.json'
+# where the scene renders its plate and layer passes before they are published or composited
+PLATE_STAGING = '_plate'
+LAYER_STAGING = '_layers'
+# the shadow catcher leaves pixels within this of the plate untouched, so render noise doesn't dim them
+SHADOW_TOLERANCE = 0.02
+
+# plate root -> PlateCache, shared by the scenes of a batch
+_caches = {}
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("compositing background plates needs numpy (pip install numpy Pillow)")
+
+def plate_key(metadata):
+    # everything a scene's background depends on: camera, its path, lighting and materials
+    background = {name: metadata.get(name) for name in ('camera_key', 'target_point_key', 'camera_path',
+                                                          'camera_keys', 'rail', 'lighting', 'materials')}
+    return hashlib.sha1(json.dumps(background, sort_keys=True).encode()).hexdigest()[:16]
+
+def plate_seed(camera_key, variant=0):
+    # seeds the background draws (camera path, lighting, materials) of scenes on one camera
+    return int.from_bytes(hashlib.sha1(f"{camera_key}/{variant}".encode()).digest()[:8], 'big')
+
+class PlateCache:
+    def __init__(self, root):
+        self.root = root
+        # plate key -> future of the scene publishing it, for scenes that reuse it in the meantime
+        self.publishing = {}
+        self.lock = threading.Lock()
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def has(self, key):
+        with self.lock:
+            return key in self.publishing or os.path.exists(os.path.join(self.path(key), PLATE_FILE))
+
+    def set_publishing(self, key, future):
+        with self.lock:
+            self.publishing[key] = future
+
+    def wait(self, key):
+        # the plate's folder once it is published; raises if publishing it failed
+        with self.lock:
+            future = self.publishing.get(key)
+        if future is not None:
+            future.result()
+        return self.path(key)
+
+    def publish(self, key, staging_dir, metadata):
+        # moves a scene's rendered plate passes into the cache; the plate file goes last, so a
+        # plate without it is incomplete and gets rendered again
+        target = self.path(key)
+        if os.path.exists(os.path.join(target, PLATE_FILE)):
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return target
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.makedirs(self.root, exist_ok=True)
+        shutil.move(staging_dir, target)
+        with open(os.path.join(target, PLATE_FILE), 'w') as f:
+            json.dump(metadata, f, indent=2)
+        return target
+
+def get_plate_cache(root):
+    if root not in _caches:
+        _caches[root] = PlateCache(root)
+    return _caches[root]
+
+
+# compositing
+
+def pass_frames(directory):
+    # frame number -> path of the pass's own images
+    frames = {}
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            match = IMAGE_NAME_RE.match(name)
+            if match is not None and match['render_pass'] == FINAL_IMAGE:
+                frames[int(match['frame'])] = os.path.join(directory, name)
+    return frames
+
+def read_image(path):
+    # (height, width, channels) uint8; PNG through Pillow when it is installed, else encoders.read_png
+    if path.lower().endswith('.bmp'):
+        frame = read_bmp(path)
+    else:
+        try:
+            from PIL import Image
+        except ImportError as e:
+            if not path.lower().endswith('.png'):
+                raise ImportError("reading frames other than BMP and PNG needs Pillow (pip install Pillow numpy)") from e
+            frame = read_png(path)
+        else:
+            with Image.open(path) as image:
+                return np.asarray(image)
+    return np.frombuffer(bytes(frame.pixels), np.uint8).reshape(frame.height, frame.width, frame.channels)
+
+def write_image(pixels, path):
+    height, width, channels = pixels.shape
+    frame = Frame(width, height, channels, pixels.tobytes())
+    if path.endswith('.bmp'):
+        encode_bmp(frame, path)
+    else:
+        encode_png(frame, path)
+
+def luma(pixels):
+    return pixels[..., :3].astype(np.float32) @ np.array([0.2126, 0.7152, 0.0722], np.float32)
+
+def shadow_shade(shadow, reference, shape):
+    # how much the character darkens the background, per pixel of shape, 1 where it doesn't
+    ratio = (luma(shadow) + 1.0) / (luma(reference) + 1.0)
+    ratio = np.minimum(ratio, 1.0)
+    ratio[ratio > 1.0 - SHADOW_TOLERANCE] = 1.0
+    # the shadow pass renders at a fraction of the resolution; shadows are soft enough for nearest
+    height, width = shape
+    rows = np.arange(height) * ratio.shape[0] // height
+    cols = np.arange(width) * ratio.shape[1] // width
+    return ratio[rows[:, None], cols]
+
+def composite_frame(plate, layer, alpha, shade=None, hard=False):
+    # plate (h, w, c) and layer (h, w, >= c) uint8, alpha (h, w) in [0, 1]; the layer's colour is
+    # straight (not premultiplied). hard=True takes the layer wherever alpha > 0.5 (normals).
+    channels = plate.shape[-1]
+    if hard:
+        return np.where((alpha > 0.5)[..., None], layer[..., :channels], plate)
+    out = plate[..., :3].astype(np.float32)
+    if shade is not None:
+        out *= shade[..., None]
+    out += (layer[..., :3].astype(np.float32) - out) * alpha[..., None]
+    return np.clip(out + 0.5, 0, 255).astype(np.uint8)
+
+def composite_aux(plate_path, layer_path, alpha):
+    plate, layer = load_aux_frame(plate_path), load_aux_frame(layer_path)
+    mask = alpha > 0.5
+    return np.where(mask if plate.ndim == 2 else mask[..., None], layer, plate)
+
+def composite_scene(output_path, plate_dir, layer_dir, passes, extensions=None, aux_names=(), keep_layers=False):
+    # Writes <output_path>/<pass>/ for every pass in passes (keys of COMPOSITES) and
+    # <output_path>/<name>/ for aux_names, one frame per frame of the character layer; returns
+    # {pass or aux name: frames written}. extensions: pass -> 'png' or 'bmp' (png by default).
+    require_numpy()
+    layers = pass_frames(pass_dir(layer_dir, 'character'))
+    shadows = pass_frames(pass_dir(layer_dir, 'shadow'))
+    references = pass_frames(pass_dir(plate_dir, 'plate_shadow'))
+    plates = {name: pass_frames(pass_dir(plate_dir, name)) for name in ('plate_rgb', 'plate_normals')}
+    normals = pass_frames(pass_dir(layer_dir, 'character_normals'))
+    written = {name: 0 for name in list(passes) + list(aux_names)}
+    for name in written:
+        os.makedirs(pass_dir(output_path, name), exist_ok=True)
+
+    for number, layer_path in sorted(layers.items()):
+        layer = read_image(layer_path)
+        alpha = layer[..., 3].astype(np.float32) / 255.0 if layer.shape[-1] == 4 else np.ones(layer.shape[:2], np.float32)
+        shade = None
+        if number in shadows and number in references:
+            shade = shadow_shade(read_image(shadows[number]), read_image(references[number]), alpha.shape)
+        rgb = None
+        for name in passes:
+            plate_pass, _ = COMPOSITES[name]
+            if number not in plates[plate_pass]:
+                raise FileNotFoundError(f"{plate_dir}: no {plate_pass} frame {number}")
+            plate = read_image(plates[plate_pass][number])
+            if plate_pass == 'plate_normals':
+                if number not in normals:
+                    raise FileNotFoundError(f"{layer_dir}: no character_normals frame {number}")
+                pixels = composite_frame(plate, read_image(normals[number]), alpha, hard=True)
+            else:
+                if rgb is None:
+                    rgb = composite_frame(plate, layer, alpha, shade)
+                pixels = rgb
+                if name in ALPHA_COMPOSITES:
+                    pixels = np.dstack([rgb, np.clip(alpha * 255.0 + 0.5, 0, 255).astype(np.uint8)])
+            extension = (extensions or {}).get(name, 'png')
+            write_image(np.ascontiguousarray(pixels), os.path.join(pass_dir(output_path, name),
+                                                                  frame_file_name(FINAL_IMAGE, number, extension)))
+            written[name] += 1
+        for name in aux_names:
+            file_name = f"Image.{name}.{number:04d}.npz"
+            plate_path, layer_aux_path = os.path.join(plate_dir, name, file_name), os.path.join(layer_dir, name, file_name)
+            if os.path.exists(plate_path) and os.path.exists(layer_aux_path):
+                data = composite_aux(plate_path, layer_aux_path, alpha)
+                np.savez_compressed(os.path.join(pass_dir(output_path, name), file_name), **{name: data})
+                written[name] += 1
+
+    if not keep_layers:
+        shutil.rmtree(layer_dir, ignore_errors=True)
+    return written
@@ -0,0 +1,100 @@
+import os
+
+from .labels import MASK_PASSES
+from .manifest import MANIFEST_FILE
+from .pipeline import Pipeline
+
+# Local staging root on the render node and optional sink the finished scenes are shipped to,
+# e.g. MODERN_OFFICE_SINK=s3://synthetic-data/office?endpoint=http://minio:9000
+OUTPUT_ROOT = os.environ.get('MODERN_OFFICE_OUTPUT_ROOT', 'D:\\SyntheticData')
+OUTPUT_SINK = os.environ.get('MODERN_OFFICE_SINK')
+# set by LaunchBatch.py, which waits for the editor to exit and relaunches it after a memory restart
+QUIT_ON_FINISH = os.environ.get('MODERN_OFFICE_QUIT_ON_FINISH') == '1'
+# one manifest for every preset writing under OUTPUT_ROOT
+MANIFEST_PATH = os.path.join(OUTPUT_ROOT, MANIFEST_FILE)
+# MODERN_OFFICE_PROFILE=1 writes a flame-graph profile of the engine calls next to every scene
+PROFILE = os.environ.get('MODERN_OFFICE_PROFILE') == '1'
+# MODERN_OFFICE_WARMUP=0 skips the shader warm-up render before the batch
+WARMUP = os.environ.get('MODERN_OFFICE_WARMUP', '1') == '1'
+# output encoder for every pass that doesn't keep alpha: png, bmp, exr, png_zlib, qoi or webp (see encoders.py)
+ENCODER = os.environ.get('MODERN_OFFICE_ENCODER', 'png')
+# MODERN_OFFICE_RGB_VIDEO=x264 packs the rgb pass into one lossless video per scene (see video.py)
+RGB_VIDEO = os.environ.get('MODERN_OFFICE_RGB_VIDEO')
+# depth and motion vectors exported with the rgb pass as float16 .npz (see aux_outputs.py); empty to skip
+RGB_AUX_OUTPUTS = [name for name in os.environ.get('MODERN_OFFICE_AUX_OUTPUTS', 'depth,motion').split(',') if name]
+# live batch metrics in the Prometheus text format: a file for the node exporter's textfile collector
+# (MODERN_OFFICE_METRICS_FILE, empty to skip) and optionally http://<node>:<MODERN_OFFICE_METRICS_PORT>/metrics
+METRICS_PATH = os.environ.get('MODERN_OFFICE_METRICS_FILE', os.path.join(OUTPUT_ROOT, 'metrics', 'modern_office.prom')) or None
+METRICS_PORT = int(os.environ['MODERN_OFFICE_METRICS_PORT']) if os.environ.get('MODERN_OFFICE_METRICS_PORT') else None
+# render quality overrides per pass, e.g. MODERN_OFFICE_QUALITY=normals=full,rgb_alpha=full; by default normals
+# and masks render with the 'labels' profile (see render.QUALITY_PROFILES)
+QUALITY_PROFILES = dict(item.split('=', 1) for item in os.environ.get('MODERN_OFFICE_QUALITY', '').split(',') if item)
+# MODERN_OFFICE_MASK_LABELS=0 skips the per-scene box/area/centroid table of the mask passes (see labels.py)
+MASK_LABELS = os.environ.get('MODERN_OFFICE_MASK_LABELS', '1') == '1'
+# passes whose channel mean/variance and value histograms are accumulated as scenes finish, next to mask
+# coverage and frames per character (see dataset_stats.py); MODERN_OFFICE_STATS_PASSES= turns them off
+STATS_PASSES = [name for name in os.environ.get('MODERN_OFFICE_STATS_PASSES', 'rgb').split(',') if name]
+
+# MODERN_OFFICE_COVERAGE=0 draws every scene independently instead of planning the least covered
+# (character, animation, camera, cubemap) against the manifest
+COVERAGE = os.environ.get('MODERN_OFFICE_COVERAGE', '1') == '1'
+# MODERN_OFFICE_PLATES=1 renders the office once per camera path into a plate cache and then only the
+# character layer of every scene, composited over the plate (see plates.py); each camera gets
+# MODERN_OFFICE_PLATE_VARIANTS backgrounds
+PLATES = os.environ.get('MODERN_OFFICE_PLATES') == '1'
+PLATE_ROOT = os.environ.get('MODERN_OFFICE_PLATE_ROOT', os.path.join(OUTPUT_ROOT, 'plates'))
+PLATE_VARIANTS = int(os.environ.get('MODERN_OFFICE_PLATE_VARIANTS', '1'))
+
+
+def planning_stages(**options):
+    return [('coverage', dict(options, manifest_path=MANIFEST_PATH))] if COVERAGE else []
+
+def plate_seed_stages(**options):
+    return [('plate_seed', dict(options, variants=PLATE_VARIANTS))] if PLATES else []
+
+def background_plate_stages():
+    return [('background_plate', {'plate_root': PLATE_ROOT})] if PLATES else []
+
+BACKGROUND_STAGES = ['random_lighting', 'random_materials'] + background_plate_stages()
+CHARACTER_STAGES = BACKGROUND_STAGES + ['random_character', 'animation', 'frame_sampling']
+
+PRESETS = {
+    # camera orbits the character between two random keys
+    'random_camera': {
+        'stages': planning_stages() + plate_seed_stages() + [('random_camera', {'num_frames': 300, 'move_radius': 800})]
+                  + CHARACTER_STAGES,
+        'render_passes': ['rgb', 'normals', 'rgb_alpha'],
+        'output_root': os.path.join(OUTPUT_ROOT, 'MordenOffice', 'RandomCamera'),
+    },
+    # CineCameraRigRail moved next to a random target point, tracking it
+    'camera_rail': {
+        'stages': planning_stages(rail=True) + plate_seed_stages(rail=True)
+                  + [('camera_rail', {'rail_offset': (-100.0, -30.0, 0.0)})] + CHARACTER_STAGES,
+        'render_passes': ['rgb', 'normals', 'rgb_alpha'],
+        'output_root': os.path.join(OUTPUT_ROOT, 'MordenOffice', 'CameraRail'),
+    },
+    # static camera, rgb followed by the alpha mask
+    'rgb_alpha': {
+        'stages': planning_stages() + plate_seed_stages() + ['fixed_camera'] + BACKGROUND_STAGES
+                  + [('random_character', {'layer_name': None}), 'animation', 'frame_sampling'],
+        'render_passes': ['rgb', 'alpha'],
+        'output_root': os.path.join(OUTPUT_ROOT, 'auto'),
+    },
+}
+
+
+def make_pipeline(name, **overrides):
+    preset = dict(PRESETS[name], sink=OUTPUT_SINK, profile=PROFILE, warmup=WARMUP,
+                  manifest_path=MANIFEST_PATH, encoder=ENCODER,
+                  video_passes={'rgb': RGB_VIDEO} if RGB_VIDEO else None,
+                  aux_outputs={'rgb': RGB_AUX_OUTPUTS} if RGB_AUX_OUTPUTS else None,
+                  metrics_path=METRICS_PATH, metrics_port=METRICS_PORT,
+                  label_passes=MASK_PASSES if MASK_LABELS else None, quality_profiles=QUALITY_PROFILES,
+                  stats_passes=STATS_PASSES, quit_on_finish=QUIT_ON_FINISH)
+    preset.update(overrides)
+    return Pipeline(**preset)
+
+def run_preset(name, **overrides):
+    pipeline = make_pipeline(name, **overrides)
+    pipeline.run()
+    return pipeline
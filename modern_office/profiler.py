@@ -0,0 +1,232 @@
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+from .engine import LazyEngine, load_engine
+
+# Opt-in: enable_profiling() swaps the `unreal` global of every loaded modern_office module
+# for an EngineProxy. Proxies time every call and non-method attribute read that crosses into
+# the engine and wrap whatever comes back, so chained calls like
+# section.get_all_channels()[0].add_key(...) are attributed too.
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIRS = (PACKAGE_DIR, os.path.dirname(PACKAGE_DIR))
+MAX_STACK_DEPTH = 32
+
+_PRIMITIVES = (int, float, str, bool, bytes, type(None))
+
+
+class CallProfiler:
+    def __init__(self, project_dirs=PROJECT_DIRS):
+        self.project_dirs = tuple(os.path.normcase(d) + os.sep for d in project_dirs)
+        self.reset()
+
+    def reset(self):
+        # folded stack -> [calls, seconds]
+        self.stacks = defaultdict(lambda: [0, 0.0])
+        # (engine api, call site) -> [calls, seconds]
+        self.sites = defaultdict(lambda: [0, 0.0])
+
+    def is_project_frame(self, frame):
+        filename = os.path.normcase(os.path.abspath(frame.f_code.co_filename))
+        return filename.startswith(self.project_dirs) and filename != os.path.normcase(__file__)
+
+    def record(self, api_name, seconds, frame):
+        stack = []
+        call_site = None
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            if self.is_project_frame(frame):
+                code = frame.f_code
+                module = os.path.splitext(os.path.basename(code.co_filename))[0]
+                stack.append(f"{module}.{getattr(code, 'co_qualname', code.co_name)}")
+                if call_site is None:
+                    call_site = f"{os.path.relpath(code.co_filename, PROJECT_DIRS[1])}:{frame.f_lineno}"
+            frame = frame.f_back
+        stack.reverse()
+        stack.append(api_name)
+
+        entry = self.stacks[';'.join(stack)]
+        entry[0] += 1
+        entry[1] += seconds
+        entry = self.sites[(api_name, call_site)]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def folded_lines(self):
+        # Brendan Gregg's folded format (flamegraph.pl, speedscope, inferno), weights in microseconds
+        return [f"{stack} {max(1, round(seconds * 1e6))}" for stack, (_, seconds) in sorted(self.stacks.items())]
+
+    def summary(self, top=50):
+        by_api = defaultdict(lambda: [0, 0.0])
+        for (api_name, _), (calls, seconds) in self.sites.items():
+            by_api[api_name][0] += calls
+            by_api[api_name][1] += seconds
+        apis = sorted(by_api.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        sites = sorted(self.sites.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        return {
+            'total_calls': sum(calls for calls, _ in by_api.values()),
+            'total_seconds': sum(seconds for _, seconds in by_api.values()),
+            'apis': [{'api': api, 'calls': calls, 'seconds': seconds} for api, (calls, seconds) in apis],
+            'chattiest_sites': [{'api': api, 'site': site, 'calls': calls, 'seconds': seconds}
+                                for (api, site), (calls, seconds) in sites],
+        }
+
+    def write(self, path_prefix):
+        os.makedirs(os.path.dirname(path_prefix) or '.', exist_ok=True)
+        with open(path_prefix + '.folded', 'w') as f:
+            f.write('\n'.join(self.folded_lines()) + '\n')
+        with open(path_prefix + '.json', 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        return path_prefix + '.folded'
+
+def same_sequence(value, items):
+    # a list or tuple of the same type as value (namedtuples included) holding items
+    if type(value) is list:
+        return list(items)
+    return type(value)(*items) if hasattr(value, '_fields') else type(value)(items)
+
+def unwrap(value):
+    if isinstance(value, EngineProxy):
+        return object.__getattribute__(value, '_target')
+    if type(value) is list or isinstance(value, tuple):
+        return same_sequence(value, (unwrap(v) for v in value))
+    return value
+
+def wrap(value, name, profiler):
+    if isinstance(value, _PRIMITIVES) or isinstance(value, EngineProxy):
+        return value
+    if type(value) is list or isinstance(value, tuple):
+        return same_sequence(value, (wrap(v, name, profiler) for v in value))
+    # anything else, engine containers like unreal.Array included, keeps its type behind a proxy
+    return EngineProxy(value, name, profiler)
+
+class EngineProxy:
+    __slots__ = ('_target', '_name', '_profiler')
+
+    def __init__(self, target, name, profiler):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_profiler', profiler)
+
+    def _label(self):
+        target = object.__getattribute__(self, '_target')
+        if isinstance(target, type) or type(target).__name__ == 'module':
+            return object.__getattribute__(self, '_name')
+        return type(target).__name__
+
+    def __getattr__(self, attr):
+        target = object.__getattribute__(self, '_target')
+        profiler = object.__getattribute__(self, '_profiler')
+        start = time.perf_counter()
+        value = getattr(target, attr)
+        elapsed = time.perf_counter() - start
+        name = f"{self._label()}.{attr}"
+        if callable(value):
+            # methods are timed when called, not when looked up
+            return EngineProxy(value, name, profiler)
+        profiler.record(name, elapsed, sys._getframe(1))
+        return wrap(value, name, profiler)
+
+    def __setattr__(self, attr, value):
+        target = object.__getattribute__(self, '_target')
+        start = time.perf_counter()
+        setattr(target, attr, unwrap(value))
+        object.__getattribute__(self, '_profiler').record(f"{self._label()}.{attr}=", time.perf_counter() - start,
+                                                          sys._getframe(1))
+
+    def __call__(self, *args, **kwargs):
+        target = object.__getattribute__(self, '_target')
+        profiler = object.__getattribute__(self, '_profiler')
+        name = object.__getattribute__(self, '_name')
+        args = [unwrap(a) for a in args]
+        kwargs = {k: unwrap(v) for k, v in kwargs.items()}
+        start = time.perf_counter()
+        result = target(*args, **kwargs)
+        profiler.record(f"{name}()", time.perf_counter() - start, sys._getframe(1))
+        return wrap(result, type(result).__name__, profiler)
+
+    def __instancecheck__(self, instance):
+        return isinstance(unwrap(instance), object.__getattribute__(self, '_target'))
+
+    def __eq__(self, other):
+        return object.__getattribute__(self, '_target') == unwrap(other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(object.__getattribute__(self, '_target'))
+
+    def __bool__(self):
+        return bool(object.__getattribute__(self, '_target'))
+
+    def __repr__(self):
+        return repr(object.__getattribute__(self, '_target'))
+
+    # engine containers (unreal.Array, unreal.Map, ...): items read through the proxy are proxied too
+    def __len__(self):
+        return len(object.__getattribute__(self, '_target'))
+
+    def __iter__(self):
+        profiler = object.__getattribute__(self, '_profiler')
+        name = f"{self._label()}[]"
+        for item in object.__getattribute__(self, '_target'):
+            yield wrap(item, name, profiler)
+
+    def __contains__(self, item):
+        return unwrap(item) in object.__getattribute__(self, '_target')
+
+    def __getitem__(self, key):
+        target = object.__getattribute__(self, '_target')
+        profiler = object.__getattribute__(self, '_profiler')
+        start = time.perf_counter()
+        value = target[unwrap(key)]
+        name = f"{self._label()}[]"
+        profiler.record(name, time.perf_counter() - start, sys._getframe(1))
+        return wrap(value, name, profiler)
+
+    def __setitem__(self, key, value):
+        object.__getattribute__(self, '_target')[unwrap(key)] = unwrap(value)
+
+    def __str__(self):
+        return str(object.__getattribute__(self, '_target'))
+
+    def _binary(self, op, other):
+        target = object.__getattribute__(self, '_target')
+        result = getattr(target, op)(unwrap(other))
+        return wrap(result, type(result).__name__, object.__getattribute__(self, '_profiler'))
+
+    def __add__(self, other):
+        return self._binary('__add__', other)
+
+    def __sub__(self, other):
+        return self._binary('__sub__', other)
+
+    def __mul__(self, other):
+        return self._binary('__mul__', other)
+
+    def __truediv__(self, other):
+        return self._binary('__truediv__', other)
+
+_patched_modules = []
+
+def enable_profiling(profiler=None):
+    # Returns the CallProfiler collecting the calls; a no-op returning the active one if already enabled
+    if _patched_modules:
+        return object.__getattribute__(_patched_modules[0][0].unreal, '_profiler')
+    profiler = profiler or CallProfiler()
+    real_unreal = load_engine()
+    proxy = EngineProxy(real_unreal, 'unreal', profiler)
+    for name, module in list(sys.modules.items()):
+        original = getattr(module, 'unreal', None)
+        if name.startswith(__package__) and (original is real_unreal or isinstance(original, LazyEngine)):
+            module.unreal = proxy
+            _patched_modules.append((module, original))
+    return profiler
+
+def disable_profiling():
+    for module, real_unreal in _patched_modules:
+        module.unreal = real_unreal
+    _patched_modules.clear()
@@ -0,0 +1,139 @@
+import json
+import os
+import shutil
+
+from .engine import unreal
+from .labels import MASK_PASSES, label_pass, read_mask
+from .layout import is_final_image, pass_dir, pass_output_path, timestamp
+from .orchestrator import RenderOrchestrator, RetryPolicy
+from .plates import pass_frames, read_image
+from .render import UnrealPassExecutor
+
+# frames rendered per pass, spread over the sequence
+BENCHMARK_FRAMES = 24
+# every pass at 'full', then at its own profile (render.QUALITY_PROFILES); twice, and the faster
+# render of each counts, so shader compiles in the first round don't favour either setting
+SETTINGS = ('full', 'profile')
+ROUNDS = 2
+
+
+def compare_pass(full_path, profile_path, pass_name):
+    # how far the labels of a pass moved between the two settings; changed_pixels is 0 when the
+    # profile leaves them as they are, which the 'labels' profile has to
+    full, profile = pass_frames(pass_dir(full_path, pass_name)), pass_frames(pass_dir(profile_path, pass_name))
+    numbers = sorted(set(full) & set(profile))
+    if not numbers:
+        return None
+    if pass_name in MASK_PASSES:
+        changed = sum(int((read_mask(full[n]) != read_mask(profile[n])).sum()) for n in numbers)
+        full_labels, profile_labels = label_pass(full_path, pass_name), label_pass(profile_path, pass_name)
+        return {'changed_pixels': changed,
+                'max_box_shift': int(abs(full_labels['box'].astype(int) - profile_labels['box'].astype(int)).max()),
+                'area_ratio': round(float(profile_labels['area'].sum() / max(full_labels['area'].sum(), 1)), 4)}
+    # mean absolute difference in 8-bit steps, e.g. normals across anti-aliased edges
+    differences = [abs(read_image(full[n]).astype(int) - read_image(profile[n]).astype(int)) for n in numbers]
+    return {'changed_pixels': sum(int(d.any(axis=-1).sum()) for d in differences),
+            'mean_abs_diff': round(float(sum(d.mean() for d in differences) / len(differences)), 3)}
+
+class QualityBenchmark:
+    # Renders one scene of a pipeline with every pass at 'full' quality and at its quality profile,
+    # and reports the time per frame of every pass and how much its labels changed. Runs in the
+    # editor, see BenchmarkPassQuality.py.
+    def __init__(self, pipeline, num_frames=BENCHMARK_FRAMES, report_path=None, keep_frames=False):
+        self.pipeline = pipeline
+        self.num_frames = num_frames
+        self.report_path = report_path or os.path.join(pipeline.output_root, f"quality_{timestamp()}.json")
+        self.keep_frames = keep_frames
+        self.render_passes = list(pipeline.render_passes)
+        self.scene = None
+        self.scene_path = None
+        self.executor = None
+        self.orchestrator = None
+        self.tick_handle = None
+        # (setting, pass name) -> [(seconds, frames)] per round
+        self.renders = {}
+        self.failures = []
+
+    def setting(self, scene_index):
+        return SETTINGS[scene_index % len(SETTINGS)]
+
+    def output_path(self, scene_index):
+        return os.path.join(self.scene_path, f"{self.setting(scene_index)}_{scene_index // len(SETTINGS)}")
+
+    def build_scene(self, scene_index):
+        # every round renders the scene built first
+        if self.scene is None:
+            self.scene = self.pipeline.build_scene(0)
+            self.scene_path = self.scene.output_path
+            # the pipeline's own passes, also in background plate mode
+            self.scene.render_passes = None
+            level_sequence = self.scene.level_sequence
+            length = level_sequence.get_playback_end() - level_sequence.get_playback_start()
+            self.scene.frame_step = max(1, length // self.num_frames)
+        self.scene.output_path = self.output_path(scene_index)
+        if self.setting(scene_index) == 'full':
+            self.executor.quality_profiles = {pass_name: 'full' for pass_name in self.render_passes}
+        else:
+            self.executor.quality_profiles = dict(self.pipeline.quality_profiles)
+        return self.scene
+
+    def run(self):
+        pipeline = self.pipeline
+        self.executor = UnrealPassExecutor(pipeline.encoders, aux_outputs=pipeline.aux_outputs)
+        self.orchestrator = RenderOrchestrator(self.executor, self.build_scene, len(SETTINGS) * ROUNDS,
+                                               self.render_passes, default_timeout=pipeline.pass_timeout,
+                                               retry_policy=RetryPolicy(max_attempts=1))
+        self.orchestrator.add_hook('pass_finished', self.pass_finished)
+        self.orchestrator.add_hook('task_failed', self.task_failed)
+        self.orchestrator.add_hook('batch_finished', self.batch_finished)
+        self.tick_handle = unreal.register_slate_post_tick_callback(lambda delta_seconds: self.orchestrator.tick())
+        self.orchestrator.start()
+
+    def pass_finished(self, task):
+        seconds = self.orchestrator.clock() - task.started_at
+        directory = pass_dir(pass_output_path(task.scene, task.pass_name), task.pass_name)
+        frames = len([name for name in os.listdir(directory) if is_final_image(name)]) if os.path.isdir(directory) else 0
+        self.renders.setdefault((self.setting(task.scene_index), task.pass_name), []).append((seconds, frames))
+
+    def task_failed(self, task, message):
+        self.failures.append(message)
+        unreal.log_warning(f"Quality benchmark render failed: {message}")
+
+    def report(self):
+        passes = {}
+        for pass_name in self.render_passes:
+            entry = {'profile': self.pipeline.quality_profiles[pass_name]}
+            for setting in SETTINGS:
+                renders = self.renders.get((setting, pass_name))
+                if renders:
+                    seconds, frames = min(renders)
+                    entry[setting] = {'frames': frames, 'seconds': round(seconds, 2),
+                                      'seconds_per_frame': round(seconds / max(frames, 1), 4)}
+            if 'full' in entry and 'profile' in entry:
+                entry['speedup'] = round(entry['full']['seconds'] / max(entry['profile']['seconds'], 1e-6), 2)
+                try:
+                    entry['labels'] = compare_pass(self.output_path(0), self.output_path(1), pass_name)
+                except ImportError as e:
+                    entry['labels'] = f"not compared: {e}"
+            passes[pass_name] = entry
+        return {'scene': self.scene_path, 'frame_step': self.scene.frame_step if self.scene else None,
+                'passes': passes, 'failures': self.failures}
+
+    def batch_finished(self, completed_scenes, failed_scenes):
+        unreal.unregister_slate_post_tick_callback(self.tick_handle)
+        report = self.report()
+        for pass_name, entry in report['passes'].items():
+            unreal.log(f"{pass_name} ({entry['profile']}): {entry.get('full')} -> {entry.get('profile')}, "
+                       f"{entry.get('speedup')}x, labels {entry.get('labels')}")
+            labels = entry.get('labels')
+            if entry['profile'] == 'labels' and isinstance(labels, dict) and labels['changed_pixels']:
+                unreal.log_error(f"{pass_name}: the 'labels' profile changed {labels['changed_pixels']} label pixels, "
+                                 f"render it at 'full' (MODERN_OFFICE_QUALITY={pass_name}=full)")
+        os.makedirs(os.path.dirname(self.report_path), exist_ok=True)
+        with open(self.report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        unreal.log(f"Quality benchmark report: {self.report_path}")
+        if self.scene is not None:
+            self.pipeline.resource_manager.end_scene(self.scene)
+            if not self.keep_frames:
+                shutil.rmtree(self.scene_path, ignore_errors=True)
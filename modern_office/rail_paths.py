@@ -0,0 +1,180 @@
+import json
+import math
+import os
+import random
+
+from .engine import unreal
+from .keyframes import KeyframeWriter
+
+RAIL_LIBRARY_FILE = "rail_library.json"
+
+# Rail shapes are generated around each target point, in centimetres relative to it and in world
+# axes (the rig is placed on the target point with zero rotation).
+RAIL_SHAPES = ('arc', 'truck', 'dolly', 's_curve')
+RAIL_RADIUS_RANGE = (200.0, 600.0)
+RAIL_HEIGHT_RANGE = (80.0, 220.0)
+RAIL_LENGTH_RANGE = (150.0, 500.0)
+# sphere swept along the rail for the camera body, and the point the camera has to see
+CAMERA_CLEARANCE = 30.0
+SUBJECT_HEIGHT = 100.0
+# max spacing between spline points, so the spline stays close to the checked polyline
+POINT_SPACING = 50.0
+
+DEFAULT_SPEED_RANGE = (20.0, 120.0)  # cm/s along the rail
+
+
+def default_library_path():
+    return os.path.join(unreal.Paths.project_saved_dir(), RAIL_LIBRARY_FILE)
+
+def polyline(corners, spacing=POINT_SPACING):
+    # subdivide straight segments so no two points are further apart than spacing
+    points = [corners[0]]
+    for a, b in zip(corners, corners[1:]):
+        steps = max(1, math.ceil(math.dist(a, b) / spacing))
+        points += [tuple(a[i] + (b[i] - a[i]) * s / steps for i in range(3)) for s in range(1, steps + 1)]
+    return points
+
+def rail_shape(kind, rng=random):
+    radius = rng.uniform(*RAIL_RADIUS_RANGE)
+    height = rng.uniform(*RAIL_HEIGHT_RANGE)
+    length = rng.uniform(*RAIL_LENGTH_RANGE)
+    heading = rng.uniform(0.0, 2 * math.pi)
+    # unit vectors towards the camera side and along the truck direction
+    out = (math.cos(heading), math.sin(heading))
+    side = (-out[1], out[0])
+
+    def at(distance, lateral, z=height):
+        return (out[0] * distance + side[0] * lateral, out[1] * distance + side[1] * lateral, z)
+
+    if kind == 'arc':
+        # orbit part of a circle around the subject
+        span = length / radius
+        steps = max(2, math.ceil(length / POINT_SPACING))
+        return [(radius * math.cos(heading + span * (s / steps - 0.5)),
+                 radius * math.sin(heading + span * (s / steps - 0.5)), height) for s in range(steps + 1)]
+    if kind == 'truck':
+        return polyline([at(radius, -length / 2), at(radius, length / 2)])
+    if kind == 'dolly':
+        # push in towards the subject, never closer than half the minimum radius
+        near = max(RAIL_RADIUS_RANGE[0] / 2, radius - length / 2)
+        return polyline([at(near + length, 0.0), at(near, 0.0)])
+    if kind == 's_curve':
+        wiggle = rng.uniform(0.1, 0.25) * length
+        return polyline([at(radius, -length / 2), at(radius - wiggle, -length / 6), at(radius + wiggle, length / 6),
+                         at(radius, length / 2)])
+    raise ValueError(f"Unknown rail shape '{kind}', expected one of {RAIL_SHAPES}")
+
+def rail_length(points):
+    return sum(math.dist(a, b) for a, b in zip(points, points[1:]))
+
+def position_on_rail(points, position):
+    # point at a fraction of the rail length; CurrentPositionOnRail is distance based as well
+    remaining = position * rail_length(points)
+    for a, b in zip(points, points[1:]):
+        segment = math.dist(a, b)
+        if remaining <= segment and segment > 0:
+            return tuple(a[i] + (b[i] - a[i]) * remaining / segment for i in range(3))
+        remaining -= segment
+    return points[-1]
+
+
+# offline: generate and collision check (needs the editor)
+
+def trace_blocked(world, start, end, radius, actors_to_ignore):
+    start, end = unreal.Vector(*start), unreal.Vector(*end)
+    if radius > 0:
+        hit = unreal.SystemLibrary.sphere_trace_single(world, start, end, radius,
+                                                       unreal.TraceTypeQuery.TRACE_TYPE_QUERY1, False,
+                                                       actors_to_ignore, unreal.DrawDebugTrace.NONE, True)
+    else:
+        hit = unreal.SystemLibrary.line_trace_single(world, start, end, unreal.TraceTypeQuery.TRACE_TYPE_QUERY1,
+                                                     False, actors_to_ignore, unreal.DrawDebugTrace.NONE, True)
+    return hit is not None
+
+def rail_is_clear(world, target_location, points, actors_to_ignore, clearance=CAMERA_CLEARANCE):
+    origin = (target_location.x, target_location.y, target_location.z)
+    world_points = [tuple(origin[i] + p[i] for i in range(3)) for p in points]
+    subject = (origin[0], origin[1], origin[2] + SUBJECT_HEIGHT)
+    # the camera body fits along the whole rail ...
+    for a, b in zip(world_points, world_points[1:]):
+        if trace_blocked(world, a, b, clearance, actors_to_ignore):
+            return False
+    # ... and sees the subject from every point
+    return not any(trace_blocked(world, p, subject, 0.0, actors_to_ignore) for p in world_points)
+
+def build_rail_library(level_actors, paths_per_target=16, candidates_per_target=64, rng=random):
+    world = unreal.get_editor_subsystem(unreal.UnrealEditorSubsystem).get_editor_world()
+    actors_to_ignore = [a for a in (level_actors.camera_rig_rail, level_actors.rail_camera) if a is not None]
+    targets = {}
+    for target_key, target_point in level_actors.target_points.items():
+        target_location = target_point.get_actor_location()
+        paths = []
+        for _ in range(candidates_per_target):
+            kind = rng.choice(RAIL_SHAPES)
+            points = rail_shape(kind, rng)
+            if rail_is_clear(world, target_location, points, actors_to_ignore + [target_point]):
+                paths.append({'shape': kind, 'points': [[round(c) for c in p] for p in points]})
+                if len(paths) >= paths_per_target:
+                    break
+        unreal.log(f"Target point {target_key}: {len(paths)} clear rails")
+        targets[target_key] = paths
+    return {'clearance': CAMERA_CLEARANCE, 'targets': targets}
+
+def save_rail_library(library, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        # integer centimetres, no whitespace: a few KB per target point
+        json.dump(library, f, separators=(',', ':'))
+
+def load_rail_library(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# per scene
+
+def sample_rail_shot(paths, num_frames, frame_rate, speed_range=DEFAULT_SPEED_RANGE, rng=random):
+    path = rng.choice(paths)
+    points = [tuple(p) for p in path['points']]
+    length = rail_length(points)
+    speed = rng.uniform(*speed_range)
+    seconds = num_frames * frame_rate.denominator / frame_rate.numerator
+    # travel a random stretch of the rail at constant speed, either way
+    travel = min(1.0, speed * seconds / max(length, 1.0))
+    # short rails cap the speed
+    speed = travel * length / seconds
+    start_position = rng.uniform(0.0, 1.0 - travel)
+    end_position = start_position + travel
+    direction = rng.choice((1, -1))
+    if direction < 0:
+        start_position, end_position = end_position, start_position
+    return {'shape': path['shape'], 'points': points, 'length': round(length, 1), 'speed': round(speed, 1),
+            'direction': direction, 'start_position': start_position, 'end_position': end_position}
+
+def apply_rail_shot(level_sequence, camera_rig_rail, target_location, shot, start_frame, end_frame):
+    camera_rig_rail.set_actor_location(target_location, False, False)
+    camera_rig_rail.set_actor_rotation(unreal.Rotator(0.0, 0.0, 0.0), False)
+    spline = camera_rig_rail.get_rail_spline_component()
+    spline.set_spline_points([unreal.Vector(*p) for p in shot['points']], unreal.SplineCoordinateSpace.LOCAL, True)
+
+    rig_binding = level_sequence.add_possessable(camera_rig_rail)
+    position_track = rig_binding.add_track(unreal.MovieSceneFloatTrack)
+    position_track.set_property_name_and_path('CurrentPositionOnRail', 'CurrentPositionOnRail')
+    section = position_track.add_section()
+    section.set_range(start_frame, end_frame)
+    writer = KeyframeWriter(section)
+    # linear keys: constant speed along the rail
+    writer.add((0,), [start_frame, end_frame], [(shot['start_position'],), (shot['end_position'],)],
+               interpolation=unreal.MovieSceneKeyInterpolation.LINEAR)
+    writer.commit()
+
+def rail_camera_keys(shot, target_location, start_frame, end_frame, num_keys=11):
+    # approximate camera locations along the shot, for frame_sampling
+    keys = []
+    for k in range(num_keys):
+        t = k / (num_keys - 1)
+        position = shot['start_position'] + (shot['end_position'] - shot['start_position']) * t
+        point = position_on_rail(shot['points'], position)
+        frame = round(start_frame + (end_frame - start_frame) * t)
+        keys.append((frame, target_location + unreal.Vector(*point)))
+    return keys
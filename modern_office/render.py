@@ -0,0 +1,267 @@
+from .aux_outputs import AUX_OUTPUTS
+from .encoders import ENCODERS
+from .engine import unreal
+from .layout import FILE_NAME_FORMAT, pass_dir, pass_output_path
+
+RENDER_SEQUENCE_SOFT_PATH = '/Game/RenderSequencer'
+
+OUTPUT_RESOLUTION = (1920, 1080)
+
+# Render quality per pass, applied on top of the config asset: anti-aliasing samples and method,
+# and console variables for motion blur, GI, reflections, shadows, AO and screen percentage.
+QUALITY_PROFILES = {
+    # the config asset as it is
+    'full': {},
+    # normals and masks: none of the lighting features, which they don't show. Samples,
+    # anti-aliasing, motion blur and screen percentage stay as the config has them, since they
+    # shape mask edges and normal filtering; BenchmarkPassQuality.py checks the labels don't move.
+    'labels': {
+        'cvars': {
+            'r.DynamicGlobalIlluminationMethod': 0, 'r.ReflectionMethod': 0, 'r.ShadowQuality': 0,
+            'r.Shadow.Virtual.Enable': 0, 'r.AmbientOcclusionLevels': 0,
+        },
+    },
+    # shadow catcher (plates.py): shadows and GI as the plate has them, one sample, no motion blur
+    'shadow': {
+        'spatial_samples': 1, 'temporal_samples': 1, 'anti_aliasing': 'AAM_TEMPORAL_AA',
+        'cvars': {'r.MotionBlurQuality': 0},
+    },
+}
+
+# pass name -> Movie Render Queue config, whether the PNGs keep their alpha channel, its quality
+# profile, and for the background plate passes (plates.py) what is hidden, whether every frame is
+# rendered and at which fraction of the output resolution
+RENDER_PASSES = {}
+
+
+def register_render_pass(name, config_path, write_alpha, quality='full', visibility=None, every_frame=False,
+                         resolution_scale=1.0):
+    RENDER_PASSES[name] = {'config': config_path, 'write_alpha': write_alpha, 'quality': quality,
+                           'visibility': visibility, 'every_frame': every_frame, 'resolution_scale': resolution_scale}
+
+register_render_pass('rgb', '/Game/MoviePipelinePrimaryConfig/RGB', write_alpha=False)
+# renders normals in the alpha channel
+register_render_pass('normals', '/Game/MoviePipelinePrimaryConfig/CameraNormal', write_alpha=True, quality='labels')
+register_render_pass('rgb_alpha', '/Game/MoviePipelinePrimaryConfig/Alpha_Mask', write_alpha=True, quality='labels')
+register_render_pass('alpha', '/Game/MoviePipelinePrimaryConfig/Alpha_Mask', write_alpha=True, quality='labels')
+# rendered once per plate key, for every frame of the sequence so any frame sampling finds its plate
+register_render_pass('plate_rgb', '/Game/MoviePipelinePrimaryConfig/RGB', write_alpha=False,
+                     visibility='background', every_frame=True)
+register_render_pass('plate_normals', '/Game/MoviePipelinePrimaryConfig/CameraNormal', write_alpha=True,
+                     quality='labels', visibility='background', every_frame=True)
+register_render_pass('plate_shadow', '/Game/MoviePipelinePrimaryConfig/RGB', write_alpha=False, quality='shadow',
+                     visibility='background', every_frame=True, resolution_scale=0.5)
+# rendered per scene
+register_render_pass('character', '/Game/MoviePipelinePrimaryConfig/RGB', write_alpha=True, visibility='character')
+register_render_pass('character_normals', '/Game/MoviePipelinePrimaryConfig/CameraNormal', write_alpha=True,
+                     quality='labels', visibility='character')
+register_render_pass('shadow', '/Game/MoviePipelinePrimaryConfig/RGB', write_alpha=False, quality='shadow',
+                     visibility='shadow', resolution_scale=0.5)
+
+# encoders.ENCODERS intermediate -> Movie Render Queue output setting
+IMAGE_OUTPUT_SETTINGS = {
+    'png': 'MoviePipelineImageSequenceOutput_PNG',
+    'bmp': 'MoviePipelineImageSequenceOutput_BMP',
+    'exr': 'MoviePipelineImageSequenceOutput_EXR',
+}
+
+
+def pass_encoders(render_passes, encoder='png'):
+    # encoder: one name for every pass, or {pass name: name}. Passes that keep their alpha channel
+    # stay on PNG when the encoder's intermediate has none.
+    encoders = {}
+    for pass_name in render_passes:
+        name = encoder.get(pass_name, 'png') if isinstance(encoder, dict) else encoder
+        if name not in ENCODERS:
+            raise KeyError(f"Unknown encoder '{name}', expected one of {list(ENCODERS)}")
+        if RENDER_PASSES[pass_name]['write_alpha'] and not ENCODERS[name]['alpha']:
+            unreal.log_warning(f"{pass_name} pass keeps alpha, writing PNG instead of {name}")
+            name = 'png'
+        encoders[pass_name] = name
+    return encoders
+
+def enable_aux_outputs(deferred_pass, names):
+    # switch on the post-process materials of aux_outputs.AUX_OUTPUTS, adding the missing ones
+    materials = list(deferred_pass.get_editor_property('additional_post_process_materials'))
+    for name in names:
+        material_path = AUX_OUTPUTS[name]['material']
+        entry = next((m for m in materials if m.get_editor_property('material') is not None
+                      and m.get_editor_property('material').get_path_name() == material_path), None)
+        if entry is None:
+            entry = unreal.MoviePipelinePostProcessPass()
+            entry.set_editor_property('material', unreal.load_asset(material_path))
+            materials.append(entry)
+        entry.set_editor_property('enabled', True)
+    deferred_pass.set_editor_property('additional_post_process_materials', materials)
+
+def pass_quality_profiles(render_passes, overrides=None):
+    # pass name -> quality profile, the pass's own unless overrides ({pass name: profile}) names one
+    profiles = {}
+    for pass_name in render_passes:
+        profile = (overrides or {}).get(pass_name, RENDER_PASSES[pass_name]['quality'])
+        if profile not in QUALITY_PROFILES:
+            raise KeyError(f"Unknown quality profile '{profile}', expected one of {list(QUALITY_PROFILES)}")
+        profiles[pass_name] = profile
+    return profiles
+
+def apply_quality_profile(configuration, profile):
+    settings = QUALITY_PROFILES[profile]
+    if 'spatial_samples' in settings or 'anti_aliasing' in settings:
+        aa = configuration.find_or_add_setting_by_class(unreal.MoviePipelineAntiAliasingSetting)
+        if 'spatial_samples' in settings:
+            aa.set_editor_property('spatial_sample_count', settings['spatial_samples'])
+            aa.set_editor_property('temporal_sample_count', settings['temporal_samples'])
+        if 'anti_aliasing' in settings:
+            aa.set_editor_property('override_anti_aliasing', True)
+            aa.set_editor_property('anti_aliasing_method', getattr(unreal.AntiAliasingMethod, settings['anti_aliasing']))
+    if settings.get('cvars'):
+        cvar_setting = configuration.find_or_add_setting_by_class(unreal.MoviePipelineConsoleVariableSetting)
+        for name, value in settings['cvars'].items():
+            # applied for the render only, the MRQ restores the previous values afterwards
+            cvar_setting.add_or_update_console_variable(name, value)
+
+def set_pass_visibility(scene, visibility):
+    # Hides what a plate pass leaves out and returns a callable restoring it:
+    #   background  the character (the spawnable's template), so the office renders alone
+    #   character   every static mesh actor, so the character renders alone over a transparent background
+    #   shadow      the character, still casting its shadows onto the office
+    changed = []
+    def set_property(obj, name, value):
+        changed.append((obj, name, obj.get_editor_property(name)))
+        obj.set_editor_property(name, value)
+
+    if visibility == 'character':
+        for actor in scene.level_actors.static_meshes:
+            set_property(actor, 'hidden', True)
+    elif visibility in ('background', 'shadow') and scene.spawnable_actor is not None:
+        template = scene.spawnable_actor.get_object_template()
+        set_property(template, 'hidden', True)
+        if visibility == 'shadow':
+            component = template.get_editor_property('skeletal_mesh_component')
+            set_property(component, 'cast_hidden_shadow', True)
+
+    def restore():
+        for obj, name, value in reversed(changed):
+            obj.set_editor_property(name, value)
+    return restore
+
+
+def create_render_job(output_path, pass_name, start_frame=0, num_frames=0, frame_step=1, encoder='png',
+                      exr_compression='ZIP', aux_outputs=(), quality=None):
+    render_pass = RENDER_PASSES[pass_name]
+    subsystem = unreal.get_editor_subsystem(unreal.MoviePipelineQueueSubsystem)
+    pipelineQueue = subsystem.get_queue()
+    # delete all jobs before rendering
+    for job in pipelineQueue.get_jobs():
+        pipelineQueue.delete_job(job)
+
+    ues = unreal.get_editor_subsystem(unreal.UnrealEditorSubsystem)
+    current_world = ues.get_editor_world()
+    map_name = current_world.get_path_name()
+
+    job = pipelineQueue.allocate_new_job(unreal.MoviePipelineExecutorJob)
+    job.set_editor_property('map', unreal.SoftObjectPath(map_name))
+    job.set_editor_property('sequence', unreal.SoftObjectPath(RENDER_SEQUENCE_SOFT_PATH))
+    job.author = "Voia"
+    job.job_name = "Synthetic Data"
+    job.set_configuration(unreal.load_asset(render_pass['config']))
+
+    # Calling find_or_add_setting_by_class is how you add new settings or find the existing one.
+    outputSetting = job.get_configuration().find_or_add_setting_by_class(unreal.MoviePipelineOutputSetting)
+    scale = render_pass['resolution_scale']
+    outputSetting.output_resolution = unreal.IntPoint(round(OUTPUT_RESOLUTION[0] * scale), round(OUTPUT_RESOLUTION[1] * scale)) # HORIZONTAL
+    outputSetting.file_name_format = FILE_NAME_FORMAT
+    outputSetting.flush_disk_writes_per_shot = True  # Required for the OnIndividualShotFinishedCallback to get called.
+    outputSetting.output_directory = unreal.DirectoryPath(path=pass_dir(output_path, pass_name))
+    outputSetting.use_custom_playback_range = num_frames > 0
+    outputSetting.custom_start_frame = start_frame
+    outputSetting.custom_end_frame = start_frame + num_frames
+    # Only render every Nth frame, as chosen by plan_frame_sampling
+    outputSetting.output_frame_step = frame_step
+
+    apply_quality_profile(job.get_configuration(), quality or render_pass['quality'])
+
+    deferred_pass = job.get_configuration().find_or_add_setting_by_class(unreal.MoviePipelineDeferredPassBase)
+    if aux_outputs:
+        # depth/motion from the same playback, see aux_outputs.export_aux_outputs
+        enable_aux_outputs(deferred_pass, aux_outputs)
+
+    # remove default, and any other image output the config asset comes with
+    output_class = getattr(unreal, IMAGE_OUTPUT_SETTINGS[ENCODERS[encoder]['intermediate']])
+    for class_name in ['MoviePipelineImageSequenceOutput_JPG'] + list(IMAGE_OUTPUT_SETTINGS.values()):
+        setting_class = getattr(unreal, class_name)
+        setting = job.get_configuration().find_setting_by_class(setting_class)
+        if setting is not None and setting_class is not output_class:
+            job.get_configuration().remove_setting(setting)
+    output_settings = job.get_configuration().find_or_add_setting_by_class(output_class)
+    if output_class is unreal.MoviePipelineImageSequenceOutput_PNG:
+        output_settings.set_editor_property('write_alpha', render_pass['write_alpha'])
+    elif output_class is unreal.MoviePipelineImageSequenceOutput_EXR:
+        # half floats: the MRQ writes its 16-bit accumulation buffers as they are
+        output_settings.set_editor_property('compression', getattr(unreal.EXRCompressionFormat, exr_compression))
+        output_settings.set_editor_property('multilayer', False)
+    if aux_outputs and output_class is not unreal.MoviePipelineImageSequenceOutput_EXR:
+        # depth and motion need float output next to the pass's own images
+        exr_settings = job.get_configuration().find_or_add_setting_by_class(unreal.MoviePipelineImageSequenceOutput_EXR)
+        exr_settings.set_editor_property('compression', getattr(unreal.EXRCompressionFormat, exr_compression))
+        exr_settings.set_editor_property('multilayer', False)
+
+    job.get_configuration().initialize_transient_settings()
+    return subsystem, job
+
+class UnrealPassExecutor:
+    # Movie Render Queue side of orchestrator.RenderOrchestrator; holds on to the PIE executor
+    # so it is not garbage collected mid-render
+    def __init__(self, encoders=None, exr_compression='ZIP', aux_outputs=None, quality_profiles=None):
+        # pass name -> encoder name (see pass_encoders), PNG by default
+        self.encoders = encoders or {}
+        self.exr_compression = exr_compression
+        # pass name -> depth/motion outputs rendered with it
+        self.aux_outputs = aux_outputs or {}
+        # pass name -> quality profile (see pass_quality_profiles), the pass's own by default
+        self.quality_profiles = quality_profiles or {}
+        self.executor = None
+        self.restore_visibility = None
+
+    def start(self, task, on_finished, on_error):
+        scene = task.scene
+        render_pass = RENDER_PASSES[task.pass_name]
+        # background plate passes render into staging folders, see plates.py
+        output_path = pass_output_path(scene, task.pass_name)
+        subsystem, job = create_render_job(output_path, task.pass_name,
+                                           frame_step=1 if render_pass['every_frame'] else scene.frame_step,
+                                           encoder=self.encoders.get(task.pass_name, 'png'),
+                                           exr_compression=self.exr_compression,
+                                           aux_outputs=self.aux_outputs.get(task.pass_name, ()),
+                                           quality=self.quality_profiles.get(task.pass_name))
+
+        error_callback = unreal.OnMoviePipelineExecutorErrored()
+        def movie_error(pipeline_executor, pipeline_with_error, is_fatal, error_text):
+            unreal.log_error(f"{task.pass_name} pass error (fatal={is_fatal}): {error_text}")
+            on_error(str(error_text), is_fatal)
+        error_callback.add_callable(movie_error)
+
+        self.restore_visibility = set_pass_visibility(scene, render_pass['visibility'])
+
+        def movie_finished(pipeline_executor, success):
+            self.restore()
+            unreal.log(f'{task.pass_name} pass finished: {success}')
+            on_finished(success)
+        finished_callback = unreal.OnMoviePipelineExecutorFinished()
+        finished_callback.add_callable(movie_finished)
+
+        unreal.log(f"Starting Executor ({task.pass_name}, attempt {task.attempts})")
+        self.executor = unreal.MoviePipelinePIEExecutor(subsystem)
+        self.executor.set_editor_property('on_executor_errored_delegate', error_callback)
+        self.executor.set_editor_property('on_executor_finished_delegate', finished_callback)
+        subsystem.render_queue_with_executor_instance(self.executor)
+
+    def restore(self):
+        if self.restore_visibility is not None:
+            self.restore_visibility()
+            self.restore_visibility = None
+
+    def cancel(self):
+        if self.executor is not None:
+            self.executor.cancel_all_jobs()
+        self.restore()
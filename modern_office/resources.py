@@ -0,0 +1,74 @@
+import gc
+
+from .engine import unreal
+from .sequencer import clean_sequencer
+
+
+class SceneResources:
+    # Everything one scene loaded or spawned, released together on scene teardown
+    def __init__(self):
+        self.assets = {}
+        self.actors = []
+
+    def load_asset(self, asset_path):
+        asset = self.assets.get(asset_path)
+        if asset is None:
+            asset = unreal.load_asset(asset_path)
+            self.assets[asset_path] = asset
+        return asset
+
+    def track_actor(self, actor):
+        self.actors.append(actor)
+        return actor
+
+    def release(self):
+        actor_subsystem = unreal.get_editor_subsystem(unreal.EditorActorSubsystem)
+        for actor in self.actors:
+            # template actors are usually destroyed already once they became spawnables
+            try:
+                if actor is not None and not actor.is_actor_being_destroyed():
+                    actor_subsystem.destroy_actor(actor)
+            except Exception:
+                pass
+        released = list(self.assets)
+        self.actors.clear()
+        self.assets.clear()
+        return released
+
+class ResourceManager:
+    # Releases each scene's resources on teardown and runs engine GC every gc_interval scenes,
+    # so editor memory stays flat over long batches
+    def __init__(self, gc_interval=5, unload_packages=False):
+        self.gc_interval = gc_interval
+        self.unload_packages = unload_packages
+        self.scenes_since_gc = 0
+        self.released_asset_paths = set()
+
+    def begin_scene(self):
+        return SceneResources()
+
+    def end_scene(self, scene):
+        # the spawnable and its animation track keep the mesh and animation alive until unbound
+        if scene.level_sequence is not None:
+            clean_sequencer(scene.level_sequence)
+        released = scene.resources.release()
+        self.released_asset_paths.update(released)
+        # drop the scene's own references to engine objects
+        scene.spawnable_actor = None
+        scene.animation_asset = None
+        scene.level_actors = None
+        scene.level_sequence = None
+
+        self.scenes_since_gc += 1
+        if self.gc_interval and self.scenes_since_gc >= self.gc_interval:
+            self.collect()
+
+    def collect(self):
+        self.scenes_since_gc = 0
+        gc.collect()
+        if self.unload_packages and self.released_asset_paths:
+            # only safe for assets nothing in the level references any more
+            packages = [unreal.find_package(p.split('.')[0]) for p in self.released_asset_paths]
+            unreal.EditorLoadingAndSavingUtils.unload_packages([p for p in packages if p is not None])
+        self.released_asset_paths.clear()
+        unreal.SystemLibrary.collect_garbage()
@@ -0,0 +1,22 @@
+import json
+import os
+
+SCENE_METADATA_FILE = "scene.json"
+
+
+def write_scene_metadata(output_path, metadata):
+    # Merge into any existing scene.json so later stages can add their own keys
+    os.makedirs(output_path, exist_ok=True)
+    metadata_path = os.path.join(output_path, SCENE_METADATA_FILE)
+    scene = read_scene_metadata(output_path)
+    scene.update(metadata)
+    with open(metadata_path, 'w') as f:
+        json.dump(scene, f, indent=2)
+    return metadata_path
+
+def read_scene_metadata(output_path):
+    metadata_path = os.path.join(output_path, SCENE_METADATA_FILE)
+    if not os.path.exists(metadata_path):
+        return {}
+    with open(metadata_path) as f:
+        return json.load(f)
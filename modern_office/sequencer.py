@@ -0,0 +1,89 @@
+import random
+
+from .engine import unreal
+from .keyframes import write_transform_keys, write_focal_length_keys
+from .trajectory import (FOCAL_LENGTH_CONTROL_POINTS, control_point_keys, linear_camera_keys, smooth_camera_path,
+                         look_at_rotations, focal_length_curve)
+
+RENDER_SEQUENCE_PATH = '/Game/RenderSequencer.RenderSequencer'
+
+
+def load_render_sequence():
+    return unreal.EditorAssetLibrary.load_asset(RENDER_SEQUENCE_PATH)
+
+def clean_sequencer(level_sequence):
+    for b in level_sequence.get_bindings():
+        b.remove()
+
+def get_tracks(level_sequence):
+    # get_master_tracks was renamed to get_tracks in UE 5.2
+    if hasattr(level_sequence, 'get_tracks'):
+        return level_sequence.get_tracks()
+    return level_sequence.get_master_tracks()
+
+def find_camera_cut_track(level_sequence):
+    for track in get_tracks(level_sequence):
+        if track.get_class() == unreal.MovieSceneCameraCutTrack.static_class():
+            return track
+    return None
+
+def bind_camera_to_level_sequence(level_sequence, camera):
+    # Get the Camera Cuts track manually
+    camera_cuts_track = find_camera_cut_track(level_sequence)
+    if camera_cuts_track is None:
+        print("No Camera Cuts track found.")
+        return None
+
+    # Find the section (usually only one for camera cuts)
+    camera_binding = None
+    for section in camera_cuts_track.get_sections():
+        if isinstance(section, unreal.MovieSceneCameraCutSection):
+            # Replace the camera binding
+            camera_binding = level_sequence.add_possessable(camera)
+            camera_binding_id = level_sequence.get_binding_id(camera_binding)
+
+            # Set the new camera binding to the camera cut section
+            section.set_camera_binding_id(camera_binding_id)
+            print("Camera cut updated to use:", camera.get_name())
+
+    return camera_binding
+
+def add_random_camera_keys(camera_binding, center_location, start_frame=0, num_frames=0, move_radius=500, rng=random):
+    # Randomize location around the center within a radius, one key at each end
+    center = (center_location.x, center_location.y, center_location.z)
+    frames, locations = linear_camera_keys(center, start_frame, num_frames, move_radius, rng)
+    return write_transform_keys(camera_binding, frames, locations, location_tolerance=None)
+
+def add_smooth_camera_keys(level_sequence, camera_binding, camera, center_location, start_frame=0, num_frames=0,
+                           move_radius=500, num_control_points=4, look_at=None, focal_length_range=None, rng=random):
+    # Dense spline through random control points; optionally aims the camera at look_at and
+    # animates its focal length. Keys are reduced before they are written, starting from the
+    # control points, which the location curve already fits.
+    center = (center_location.x, center_location.y, center_location.z)
+    frames, locations = smooth_camera_path(center, start_frame, num_frames, move_radius, num_control_points, rng)
+    rotations = None
+    if look_at is not None:
+        rotations = look_at_rotations(locations, (look_at.x, look_at.y, look_at.z))
+    camera_keys = write_transform_keys(camera_binding, frames, locations, rotations,
+                                       seed_keys=control_point_keys(num_control_points, len(frames)))
+    if focal_length_range is not None:
+        focal_lengths = focal_length_curve(frames, focal_length_range, rng=rng)
+        write_focal_length_keys(level_sequence, camera, frames, focal_lengths,
+                                seed_keys=control_point_keys(FOCAL_LENGTH_CONTROL_POINTS, len(frames)))
+    return camera_keys
+
+def add_animation_to_actor(spawnable_actor, animation_path, frame_rate, resources=None):
+    # Get the skeleton animation track class
+    anim_track = spawnable_actor.add_track(unreal.MovieSceneSkeletalAnimationTrack)
+    # Add a new animation section
+    animation_section = anim_track.add_section()
+    # Set the skeletal animation asset
+    animation_asset = resources.load_asset(animation_path) if resources is not None else unreal.load_asset(animation_path)
+    animation_section.params.animation = animation_asset
+
+    # Set the Section Range (frame_rate is the sequence's unreal.FrameRate, level_sequence.get_display_rate())
+    start_frame = 0
+    end_frame = animation_asset.get_editor_property('sequence_length') * frame_rate.numerator / frame_rate.denominator
+    animation_section.set_range(start_frame, end_frame)
+
+    return animation_asset
@@ -0,0 +1,316 @@
+import os
+import random
+
+from .animation_catalog import (BAKED_CHARACTER_ROOT, default_catalog_path, load_catalog, filter_catalog,
+                                sample_animation)
+from .assets import list_assets, select_random_asset, spawn_actor, add_actor_to_layer, random_cubemap
+from .coverage import DEFAULT_CANDIDATES, get_coverage_sampler
+from .engine import unreal
+from .lighting import CUBEMAP_ROOT, SKYLIGHT_POOL_SIZE, randomize_lighting
+from .materials import default_catalog_path as default_material_catalog_path, load_pool_catalog, randomize_materials
+from .motion_sampling import plan_frame_sampling
+from .plates import (LAYER_PASSES, LAYER_STAGING, PLATE_PASSES, PLATE_STAGING, get_plate_cache, plate_key,
+                     plate_seed)
+from .rail_paths import (DEFAULT_SPEED_RANGE, default_library_path as default_rail_library_path, load_rail_library,
+                         sample_rail_shot, apply_rail_shot, rail_camera_keys)
+from .resources import SceneResources
+from .sequencer import bind_camera_to_level_sequence, add_random_camera_keys, add_smooth_camera_keys, add_animation_to_actor
+
+# stage name -> callable(scene, **options); stages run in the order a preset lists them
+STAGES = {}
+
+
+class Scene:
+    def __init__(self, level_sequence, level_actors, output_path, resources=None):
+        self.level_sequence = level_sequence
+        self.level_actors = level_actors
+        self.output_path = output_path
+        # assets loaded and actors spawned by the stages, released on scene teardown
+        self.resources = resources if resources is not None else SceneResources()
+        # filled in by the stages
+        self.camera = None
+        self.camera_keys = None
+        self.location = None
+        self.skeletal_mesh_path = None
+        self.animation_path = None
+        self.spawnable_actor = None
+        self.animation_asset = None
+        self.frame_step = 1
+        # written to scene.json before rendering
+        self.metadata = {}
+        # skeletal_mesh, animation, camera_key and cubemap chosen by the coverage stage; the stages
+        # draw whatever it leaves out themselves
+        self.plan = {}
+        # (sampler, combination) the coverage stage recorded the plan as; plate_seed keeps it in step
+        self.coverage_entry = None
+        # passes still being transcoded off the editor thread (see Pipeline.record_pass)
+        self.output_futures = []
+        # draws the camera path, lighting and materials; seeded per camera by plate_seed so scenes
+        # on one camera share their background
+        self.background_rng = random
+        # set by background_plate: the passes to render instead of the pipeline's, where the plate
+        # and character layer passes render, and the plate {'key', 'root', 'cached'}
+        self.render_passes = None
+        self.pass_output_paths = {}
+        self.plate = None
+
+
+def register_stage(name):
+    def decorator(stage):
+        STAGES[name] = stage
+        return stage
+    return decorator
+
+def run_stage(name, scene, **options):
+    if name not in STAGES:
+        raise KeyError(f"Unknown stage '{name}', registered: {sorted(STAGES)}")
+    return STAGES[name](scene, **options)
+
+def choose_camera_and_target(scene):
+    cameras = scene.level_actors.cameras
+    target_points = scene.level_actors.target_points
+    # find the intersect of keys
+    random_keys = [k for k in cameras.keys() if k in target_points.keys()]
+    random_key = (scene.plan['camera_key'] if scene.plan.get('camera_key') in random_keys
+                  else scene.background_rng.choice(random_keys))
+    scene.camera = cameras[random_key]
+    scene.location = target_points[random_key].get_actor_location()
+    scene.metadata['camera_key'] = random_key
+
+
+# scene planning
+
+def camera_domain(scene, rail=False):
+    # camera keys the camera stages can pick; camera_rail's are the target points with rails
+    target_points = scene.level_actors.target_points
+    if rail:
+        library_path = default_rail_library_path()
+        rail_paths = load_rail_library(library_path)['targets'] if os.path.exists(library_path) else {}
+        return [k for k in target_points if rail_paths.get(k)] or list(target_points)
+    return [k for k in scene.level_actors.cameras if k in target_points]
+
+def character_animations(catalog_filters=None):
+    # character folder -> animation paths, and animation path -> skeletal mesh
+    catalog_path = default_catalog_path()
+    if os.path.exists(catalog_path):
+        pairs = [(e['skeletal_mesh'], e['animation'])
+                 for e in filter_catalog(load_catalog(catalog_path), **(catalog_filters or {}))]
+    else:
+        pairs = []
+        for skeletal_mesh_path in list_assets(BAKED_CHARACTER_ROOT, asset_class='SkeletalMesh'):
+            a_pose_animation_name = os.path.splitext(skeletal_mesh_path)[-1] + "_Anim"
+            folder_animations = list_assets(os.path.dirname(skeletal_mesh_path), asset_class='AnimSequence')
+            pairs += [(skeletal_mesh_path, a) for a in folder_animations if not a.endswith(a_pose_animation_name)]
+    animations, meshes = {}, {}
+    for skeletal_mesh_path, animation_path in pairs:
+        animations.setdefault(os.path.dirname(skeletal_mesh_path), []).append(animation_path)
+        meshes[animation_path] = skeletal_mesh_path
+    return animations, meshes
+
+@register_stage('coverage')
+def coverage(scene, manifest_path=None, candidates=DEFAULT_CANDIDATES, catalog_filters=None, rail=False):
+    # Runs before the other stages: plans the least covered (character, animation, camera, cubemap)
+    # of a few random candidates, counting every scene in the manifest and every scene of the batch.
+    # rail=True plans for camera_rail, whose cameras are the target points with rails.
+    sampler = get_coverage_sampler(manifest_path)
+    cameras = camera_domain(scene, rail)
+    cubemaps = list_assets(CUBEMAP_ROOT, asset_class='TextureCube')
+    animations, meshes = character_animations(catalog_filters)
+    combination, (pair_count, value_count) = sampler.choose(animations, cameras, cubemaps, candidates=candidates)
+    sampler.record(combination)
+    scene.coverage_entry = (sampler, combination)
+
+    _, animation_path, camera_key, cubemap_path = combination
+    scene.plan = {'skeletal_mesh': meshes.get(animation_path), 'animation': animation_path,
+                  'camera_key': camera_key, 'cubemap': cubemap_path}
+    scene.metadata['coverage'] = {'pair_count': pair_count, 'value_count': value_count,
+                                  **sampler.summary(animations, cameras, cubemaps)}
+
+
+@register_stage('plate_seed')
+def plate_seed_stage(scene, variants=1, rail=False):
+    # Background plate mode, before the camera stage: keeps the planned camera (or draws one) and
+    # seeds the camera path, cubemap, lighting and materials from it, so the scenes on a camera
+    # share one of `variants` backgrounds and reuse its plate (see background_plate).
+    cameras = camera_domain(scene, rail)
+    camera_key = scene.plan['camera_key'] if scene.plan.get('camera_key') in cameras else random.choice(cameras)
+    variant = random.randrange(variants)
+    scene.background_rng = random.Random(plate_seed(camera_key, variant))
+    cubemaps = sorted(list_assets(CUBEMAP_ROOT, asset_class='TextureCube'))
+    scene.plan['camera_key'] = camera_key
+    # the background's cubemap, not the one coverage planned
+    scene.plan['cubemap'] = scene.background_rng.choice(cubemaps) if cubemaps else None
+    scene.metadata['plate_variant'] = variant
+    if scene.coverage_entry is not None:
+        # count the camera and cubemap the scene renders, not the ones coverage planned
+        sampler, planned = scene.coverage_entry
+        combination = planned[:2] + (camera_key, scene.plan['cubemap'])
+        if combination != planned:
+            sampler.forget(planned)
+            sampler.record(combination)
+            scene.coverage_entry = (sampler, combination)
+
+@register_stage('background_plate')
+def background_plate(scene, plate_root):
+    # Background plate mode, after the camera, lighting and materials stages: the scene renders
+    # the plate passes only if no scene rendered its background before, then the character layer
+    # passes; the pipeline composites its own passes from them (plates.composite_scene).
+    key = plate_key(scene.metadata)
+    cached = get_plate_cache(plate_root).has(key)
+    scene.plate = {'key': key, 'root': plate_root, 'cached': cached}
+    scene.render_passes = ([] if cached else PLATE_PASSES) + LAYER_PASSES
+    for name in PLATE_PASSES:
+        scene.pass_output_paths[name] = os.path.join(scene.output_path, PLATE_STAGING)
+    for name in LAYER_PASSES:
+        scene.pass_output_paths[name] = os.path.join(scene.output_path, LAYER_STAGING)
+    scene.metadata['plate'] = dict(scene.plate)
+    # the character and everything after it stay random
+    scene.background_rng = random
+
+
+# camera rigs
+
+@register_stage('fixed_camera')
+def fixed_camera(scene):
+    choose_camera_and_target(scene)
+    bind_camera_to_level_sequence(scene.level_sequence, scene.camera)
+
+@register_stage('random_camera')
+def random_camera(scene, start_frame=0, num_frames=300, move_radius=800, path='linear', num_control_points=4,
+                  look_at_subject=False, focal_length_range=None):
+    choose_camera_and_target(scene)
+    camera_binding = bind_camera_to_level_sequence(scene.level_sequence, scene.camera)
+    if camera_binding is None:
+        return
+    # Offset to avoid ground collision
+    center_location = scene.location + unreal.Vector(0.0, 0.0, 100.0)
+    if path == 'smooth':
+        scene.camera_keys = add_smooth_camera_keys(scene.level_sequence, camera_binding, scene.camera, center_location,
+                                                   start_frame=start_frame, num_frames=num_frames,
+                                                   move_radius=move_radius, num_control_points=num_control_points,
+                                                   look_at=scene.location if look_at_subject else None,
+                                                   focal_length_range=focal_length_range, rng=scene.background_rng)
+    else:
+        scene.camera_keys = add_random_camera_keys(camera_binding, center_location, start_frame=start_frame,
+                                                   num_frames=num_frames, move_radius=move_radius,
+                                                   rng=scene.background_rng)
+    scene.metadata['camera_path'] = path
+    scene.metadata['camera_keys'] = [(frame, [location.x, location.y, location.z])
+                                     for frame, location in scene.camera_keys]
+
+@register_stage('camera_rail')
+def camera_rail(scene, rail_offset=(-100.0, -30.0, 0.0), library_path=None, speed_range=DEFAULT_SPEED_RANGE):
+    target_points = scene.level_actors.target_points
+    library_path = library_path or default_rail_library_path()
+    # precomputed collision-checked rails (BuildRailLibrary.py); without them the rig keeps its own shape
+    rail_paths = load_rail_library(library_path)['targets'] if os.path.exists(library_path) else {}
+    rail_keys = [k for k in target_points.keys() if rail_paths.get(k)]
+    random_keys = rail_keys or list(target_points.keys())
+    random_key = (scene.plan['camera_key'] if scene.plan.get('camera_key') in random_keys
+                  else scene.background_rng.choice(random_keys))
+    target_point = target_points[random_key]
+    scene.camera = scene.level_actors.rail_camera
+    scene.location = target_point.get_actor_location()
+    scene.metadata['target_point_key'] = random_key
+
+    # Set the actor to look at
+    scene.camera.lookat_tracking_settings.actor_to_track = target_point
+    camera_rig_rail = scene.level_actors.camera_rig_rail
+    if rail_keys:
+        level_sequence = scene.level_sequence
+        start_frame, end_frame = level_sequence.get_playback_start(), level_sequence.get_playback_end()
+        shot = sample_rail_shot(rail_paths[random_key], end_frame - start_frame, level_sequence.get_display_rate(),
+                                speed_range=speed_range, rng=scene.background_rng)
+        apply_rail_shot(level_sequence, camera_rig_rail, scene.location, shot, start_frame, end_frame)
+        scene.camera_keys = rail_camera_keys(shot, scene.location, start_frame, end_frame)
+        scene.metadata['rail'] = shot
+    else:
+        camera_rig_rail.set_actor_location(scene.location + unreal.Vector(*rail_offset), False, False)
+    bind_camera_to_level_sequence(scene.level_sequence, scene.camera)
+
+
+# lighting
+
+@register_stage('random_cubemap')
+def random_cubemap_stage(scene):
+    scene.metadata['cubemap'] = random_cubemap(scene.level_actors.skylight, resources=scene.resources,
+                                               cubemap_path=scene.plan.get('cubemap'))
+
+@register_stage('random_lighting')
+def random_lighting(scene, pool_size=SKYLIGHT_POOL_SIZE):
+    # cubemap, rotation, intensity and tint of the skylight, sun direction and interior light groups;
+    # skylight captures are pooled per (cubemap, rotation bucket) across scenes
+    scene.metadata['lighting'] = randomize_lighting(scene.level_actors, resources=scene.resources,
+                                                    pool_size=pool_size, cubemap_path=scene.plan.get('cubemap'),
+                                                    rng=scene.background_rng)
+    scene.metadata['cubemap'] = scene.metadata['lighting']['skylight']['cubemap']
+
+
+# surfaces
+
+@register_stage('random_materials')
+def random_materials(scene, surfaces=None):
+    # desks, walls and floors draw from the MaterialInstanceConstant pool (BuildMaterialPool.py)
+    catalog_path = default_material_catalog_path()
+    catalog = load_pool_catalog(catalog_path) if os.path.exists(catalog_path) else None
+    scene.metadata['materials'] = randomize_materials(scene.level_actors.surfaces, surfaces=surfaces,
+                                                      resources=scene.resources, catalog=catalog,
+                                                      rng=scene.background_rng)
+
+
+# character and animation
+
+@register_stage('random_character')
+def random_character(scene, layer_name="character", catalog_filters=None, category_weights=None):
+    catalog_path = default_catalog_path()
+    if scene.plan.get('animation'):
+        scene.skeletal_mesh_path = scene.plan['skeletal_mesh']
+        scene.animation_path = scene.plan['animation']
+    elif os.path.exists(catalog_path):
+        # draw from the precomputed animation catalog (stratified by motion category, no asset loads)
+        catalog = filter_catalog(load_catalog(catalog_path), **(catalog_filters or {}))
+        catalog_entry = sample_animation(catalog, category_weights=category_weights)
+        scene.skeletal_mesh_path = catalog_entry['skeletal_mesh']
+        scene.animation_path = catalog_entry['animation']
+    else:
+        scene.skeletal_mesh_path = select_random_asset('/Game/ActorcoreCharacterBaked', asset_class='SkeletalMesh')
+        a_pose_animation_name = os.path.splitext(scene.skeletal_mesh_path)[-1] + "_Anim"
+        def not_a_pose_animation(asset:str):
+            return not asset.endswith(a_pose_animation_name)
+        baked_animation_directory_path = os.path.dirname(scene.skeletal_mesh_path)
+        scene.animation_path = select_random_asset(baked_animation_directory_path, asset_class="AnimSequence", predicate=not_a_pose_animation)
+
+    print(f"Skeletal Mesh: {scene.skeletal_mesh_path}")
+    print(f"Animation: {scene.animation_path}")
+    scene.metadata['skeletal_mesh'] = scene.skeletal_mesh_path
+    scene.metadata['animation'] = scene.animation_path
+
+    actor = spawn_actor(asset_path=scene.skeletal_mesh_path, location=scene.location, resources=scene.resources)
+    if layer_name is not None:
+        add_actor_to_layer(actor, layer_name=layer_name)
+    scene.spawnable_actor = scene.level_sequence.add_spawnable_from_instance(actor)
+    # delete the original import (keeping only the spawnable actor)
+    unreal.get_editor_subsystem(unreal.EditorActorSubsystem).destroy_actor(actor)
+
+@register_stage('animation')
+def animation(scene):
+    scene.animation_asset = add_animation_to_actor(scene.spawnable_actor, animation_path=scene.animation_path,
+                                                   frame_rate=scene.level_sequence.get_display_rate(),
+                                                   resources=scene.resources)
+
+
+# render planning
+
+@register_stage('frame_sampling')
+def frame_sampling(scene, **options):
+    # skip frames that add no new pose or viewpoint information
+    level_sequence = scene.level_sequence
+    frame_step, frame_indices, motion_stats = plan_frame_sampling(
+        scene.animation_asset, level_sequence.get_display_rate(),
+        level_sequence.get_playback_start(), level_sequence.get_playback_end(),
+        camera_keys=scene.camera_keys, subject_location=scene.location, **options)
+    unreal.log(f"Frame step: {frame_step} ({len(frame_indices)} frames)")
+    scene.frame_step = frame_step
+    scene.metadata['frame_step'] = frame_step
+    scene.metadata['frame_indices'] = frame_indices
+    scene.metadata['motion'] = motion_stats
@@ -0,0 +1,235 @@
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+# S3 rejects multipart parts below 5 MiB (except the last one)
+MIN_CHUNK_SIZE = 5 * 1024 * 1024
+
+
+def iter_scene_files(local_dir):
+    for dirpath, _, filenames in os.walk(local_dir):
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            yield path, os.path.relpath(path, local_dir).replace(os.sep, '/')
+
+def copy_and_fsync(source, destination):
+    # fsync from the copy's own write handle; on Windows fsync of a read-only handle fails (EBADF)
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        shutil.copyfileobj(src, dst, DEFAULT_CHUNK_SIZE)
+        dst.flush()
+        os.fsync(dst.fileno())
+    shutil.copystat(source, destination)
+    return destination
+
+class OutputSink:
+    # Where finished scene folders end up. put_scene may be called from uploader threads.
+    def put_scene(self, local_dir, scene_key):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class LocalDiskSink(OutputSink):
+    def __init__(self, root):
+        self.root = root
+
+    def put_scene(self, local_dir, scene_key):
+        destination = os.path.join(self.root, scene_key)
+        if os.path.abspath(destination) != os.path.abspath(local_dir):
+            shutil.copytree(local_dir, destination, dirs_exist_ok=True)
+        return destination
+
+class NFSSink(LocalDiskSink):
+    # Copies into a hidden staging folder on the share and renames it into place,
+    # so readers on other nodes never see half-written scenes.
+    def put_scene(self, local_dir, scene_key):
+        destination = os.path.join(self.root, scene_key)
+        staging = os.path.join(self.root, '.incoming', scene_key.replace('/', '_'))
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.copytree(local_dir, staging, copy_function=copy_and_fsync)
+        os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+        shutil.rmtree(destination, ignore_errors=True)
+        os.replace(staging, destination)
+        return destination
+
+class S3Sink(OutputSink):
+    # S3-compatible object storage (AWS, MinIO, Ceph, ...). One client is shared by all uploader
+    # threads so HTTP connections are pooled; large files go up as multipart uploads.
+    def __init__(self, bucket, prefix='', endpoint_url=None, region_name=None, client=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, part_attempts=3, max_pool_connections=16):
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.chunk_size = max(chunk_size, MIN_CHUNK_SIZE)
+        self.part_attempts = part_attempts
+        if client is None:
+            try:
+                import boto3
+                from botocore.config import Config
+            except ImportError as e:
+                raise ImportError("S3Sink needs boto3 (pip install boto3)") from e
+            client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region_name,
+                                  config=Config(max_pool_connections=max_pool_connections,
+                                                retries={'max_attempts': part_attempts, 'mode': 'standard'}))
+        self.client = client
+
+    def object_key(self, scene_key, relative_path):
+        return '/'.join(p for p in (self.prefix, scene_key, relative_path) if p)
+
+    def put_scene(self, local_dir, scene_key):
+        for path, relative_path in iter_scene_files(local_dir):
+            self.put_file(path, self.object_key(scene_key, relative_path))
+        return f"s3://{self.bucket}/{self.object_key(scene_key, '')}"
+
+    def put_file(self, path, key):
+        if os.path.getsize(path) <= self.chunk_size:
+            with open(path, 'rb') as f:
+                self.client.put_object(Bucket=self.bucket, Key=key, Body=f.read())
+            return
+
+        upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=key)['UploadId']
+        try:
+            parts = []
+            with open(path, 'rb') as f:
+                part_number = 1
+                while True:
+                    chunk = f.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    etag = self.put_part(key, upload_id, part_number, chunk)
+                    parts.append({'PartNumber': part_number, 'ETag': etag})
+                    part_number += 1
+            self.client.complete_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id,
+                                                  MultipartUpload={'Parts': parts})
+        except Exception:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+
+    def put_part(self, key, upload_id, part_number, chunk):
+        for attempt in range(1, self.part_attempts + 1):
+            try:
+                response = self.client.upload_part(Bucket=self.bucket, Key=key, UploadId=upload_id,
+                                                   PartNumber=part_number, Body=chunk)
+                return response['ETag']
+            except Exception:
+                if attempt == self.part_attempts:
+                    raise
+                time.sleep(0.5 * 2 ** (attempt - 1))
+
+class LocalObjectStore:
+    # MinIO-style stand-in for the subset of the S3 client API that S3Sink uses,
+    # storing objects under root/<bucket>/<key>. Pass as S3Sink(client=...) for dry runs.
+    def __init__(self, root):
+        self.root = root
+        self.uploads = {}
+        self.lock = threading.Lock()
+        self.calls = []
+
+    def path(self, bucket, key):
+        return os.path.join(self.root, bucket, *key.split('/'))
+
+    def write(self, bucket, key, data):
+        path = self.path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def put_object(self, Bucket, Key, Body):
+        self.calls.append('put_object')
+        self.write(Bucket, Key, Body)
+        return {'ETag': str(len(Body))}
+
+    def create_multipart_upload(self, Bucket, Key):
+        with self.lock:
+            upload_id = f"upload-{len(self.uploads) + 1}"
+            self.uploads[upload_id] = {}
+        self.calls.append('create_multipart_upload')
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.calls.append('upload_part')
+        self.uploads[UploadId][PartNumber] = Body
+        return {'ETag': f"{UploadId}-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.calls.append('complete_multipart_upload')
+        parts = self.uploads.pop(UploadId)
+        self.write(Bucket, Key, b''.join(parts[p['PartNumber']] for p in MultipartUpload['Parts']))
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append('abort_multipart_upload')
+        self.uploads.pop(UploadId, None)
+
+def make_sink(url):
+    # "D:\\Data", "file:///data", "nfs:///mnt/share/data" or "s3://bucket/prefix?endpoint=http://minio:9000"
+    parsed = urlparse(url)
+    if parsed.scheme in ('', 'file') or len(parsed.scheme) == 1:  # len 1: Windows drive letter
+        return LocalDiskSink(parsed.path if parsed.scheme == 'file' else url)
+    if parsed.scheme == 'nfs':
+        return NFSSink(parsed.path)
+    if parsed.scheme == 's3':
+        query = parse_qs(parsed.query)
+        return S3Sink(parsed.netloc, prefix=parsed.path,
+                      endpoint_url=query.get('endpoint', [None])[0],
+                      region_name=query.get('region', [None])[0])
+    raise ValueError(f"Unsupported output sink '{url}'")
+
+class BackgroundUploader:
+    # Ships finished scenes to a sink on a bounded thread pool while the next scene renders.
+    # submit() never blocks (it may run on the editor thread); once max_pending scenes are queued
+    # backlogged() is True, and the pipeline holds off building scenes so a slow sink cannot fill
+    # the render node's disk (see RenderOrchestrator.add_gate).
+    def __init__(self, sink, max_workers=4, max_pending=8, max_attempts=3, backoff=2.0, delete_local=False):
+        self.sink = sink
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.delete_local = delete_local
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scene-upload')
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.uploaded = []
+        self.failed = []
+
+    def submit(self, local_dir, scene_key):
+        with self.lock:
+            self.pending += 1
+        try:
+            return self.pool.submit(self.upload, local_dir, scene_key)
+        except Exception:
+            with self.lock:
+                self.pending -= 1
+            raise
+
+    def backlogged(self):
+        with self.lock:
+            return self.pending >= self.max_pending
+
+    def upload(self, local_dir, scene_key):
+        try:
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    location = self.sink.put_scene(local_dir, scene_key)
+                    break
+                except Exception as e:
+                    if attempt == self.max_attempts:
+                        with self.lock:
+                            self.failed.append((scene_key, repr(e)))
+                        return None
+                    time.sleep(self.backoff * 2 ** (attempt - 1))
+
+            if self.delete_local and os.path.abspath(location) != os.path.abspath(local_dir):
+                shutil.rmtree(local_dir, ignore_errors=True)
+            with self.lock:
+                self.uploaded.append((scene_key, location))
+            return location
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+    def close(self, wait=True):
+        self.pool.shutdown(wait=wait)
+        self.sink.close()
@@ -0,0 +1,157 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+GIB = 1024 ** 3
+
+
+def process_rss_bytes():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+def gpu_memory():
+    # [(used_bytes, total_bytes)] per NVIDIA GPU, or None without pynvml
+    try:
+        import pynvml
+    except ImportError:
+        return None
+    try:
+        pynvml.nvmlInit()
+        devices = []
+        for i in range(pynvml.nvmlDeviceGetCount()):
+            info = pynvml.nvmlDeviceGetMemoryInfo(pynvml.nvmlDeviceGetHandleByIndex(i))
+            devices.append((info.used, info.total))
+        return devices
+    except pynvml.NVMLError:
+        return None
+
+class Thresholds:
+    def __init__(self, max_rss_bytes=48 * GIB, max_python_heap_bytes=4 * GIB, max_gpu_fraction=0.92):
+        self.max_rss_bytes = max_rss_bytes
+        self.max_python_heap_bytes = max_python_heap_bytes
+        self.max_gpu_fraction = max_gpu_fraction
+
+class TelemetrySampler:
+    # Memory samples at stage boundaries and pass ends: RSS and GPU memory, which cost next to nothing.
+    # asset_counter is an optional callable returning {class name: loaded object count} (see
+    # assets.count_loaded_assets), which walks every loaded object, so it only runs for samples taken
+    # with count_assets=True (once per scene). trace_python traces every Python allocation for the
+    # heap samples and snapshots, which slows the whole editor down; off unless asked for.
+    def __init__(self, report_path, thresholds=None, asset_counter=None, trace_python=False, snapshot_top=10):
+        self.report_path = report_path
+        self.thresholds = thresholds or Thresholds()
+        self.asset_counter = asset_counter
+        self.trace_python = trace_python
+        self.snapshot_top = snapshot_top
+        self.samples = []
+        self.snapshots = []
+        self.started_at = time.time()
+        self.baseline_snapshot = None
+        if trace_python:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.baseline_snapshot = tracemalloc.take_snapshot()
+
+    def sample(self, label, scene_index=None, count_assets=False):
+        heap_current, heap_peak = tracemalloc.get_traced_memory() if self.trace_python else (None, None)
+        sample = {
+            'time': round(time.time() - self.started_at, 3),
+            'label': label,
+            'scene_index': scene_index,
+            'rss_bytes': process_rss_bytes(),
+            'python_heap_bytes': heap_current,
+            'python_heap_peak_bytes': heap_peak,
+            'gpu_memory': gpu_memory(),
+            'loaded_assets': self.asset_counter() if count_assets and self.asset_counter is not None else None,
+        }
+        self.samples.append(sample)
+        return sample
+
+    def snapshot(self, scene_index):
+        # Largest Python allocation growth since the batch started, by source line (trace_python only)
+        if not self.trace_python:
+            return
+        snapshot = tracemalloc.take_snapshot()
+        growth = snapshot.compare_to(self.baseline_snapshot, 'lineno')[:self.snapshot_top]
+        self.snapshots.append({
+            'scene_index': scene_index,
+            'top_growth': [{'where': str(stat.traceback), 'size_diff_bytes': stat.size_diff, 'count_diff': stat.count_diff}
+                           for stat in growth],
+        })
+
+    def restart_reason(self):
+        # Reason to restart the editor before it runs out of memory, or None
+        if not self.samples:
+            return None
+        last = self.samples[-1]
+        if last['rss_bytes'] is not None and last['rss_bytes'] > self.thresholds.max_rss_bytes:
+            return f"editor RSS {last['rss_bytes'] / GIB:.1f} GiB over {self.thresholds.max_rss_bytes / GIB:.1f} GiB"
+        heap = last['python_heap_bytes']
+        if heap is not None and heap > self.thresholds.max_python_heap_bytes:
+            return f"Python heap {last['python_heap_bytes'] / GIB:.1f} GiB over {self.thresholds.max_python_heap_bytes / GIB:.1f} GiB"
+        for used, total in last['gpu_memory'] or []:
+            if total and used / total > self.thresholds.max_gpu_fraction:
+                return f"GPU memory {used / total:.0%} used"
+        return None
+
+    def summary(self):
+        # per scene: first and last sample and the growth in between
+        scenes = {}
+        for sample in self.samples:
+            if sample['scene_index'] is None:
+                continue
+            scene = scenes.setdefault(sample['scene_index'], {'first': sample, 'last': sample, 'samples': []})
+            scene['last'] = sample
+            scene['samples'].append(sample)
+        per_scene = []
+        for scene_index, scene in sorted(scenes.items()):
+            first, last = scene['first'], scene['last']
+            per_scene.append({
+                'scene_index': scene_index,
+                'rss_bytes': last['rss_bytes'],
+                'rss_growth_bytes': (last['rss_bytes'] - first['rss_bytes'])
+                                    if last['rss_bytes'] is not None and first['rss_bytes'] is not None else None,
+                'python_heap_bytes': last['python_heap_bytes'],
+                'loaded_assets': next((s['loaded_assets'] for s in reversed(scene['samples'])
+                                       if s['loaded_assets'] is not None), None),
+            })
+        rss = [s['rss_bytes'] for s in self.samples if s['rss_bytes'] is not None]
+        return {
+            'samples': len(self.samples),
+            'peak_rss_bytes': max(rss, default=None),
+            'rss_growth_bytes': rss[-1] - rss[0] if rss else None,
+            'scenes': per_scene,
+        }
+
+    def write_report(self):
+        os.makedirs(os.path.dirname(self.report_path) or '.', exist_ok=True)
+        with open(self.report_path, 'w') as f:
+            json.dump({'summary': self.summary(), 'samples': self.samples, 'snapshots': self.snapshots}, f, indent=2)
+        return self.report_path
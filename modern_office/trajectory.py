@@ -0,0 +1,112 @@
+import random
+
+try:
+    import numpy as np
+except ImportError:  # only the dense trajectories and key reduction need it
+    np = None
+
+# Engine-free camera trajectory generation. Arrays are (num_frames + 1, 3) for locations and
+# rotations (roll, pitch, yaw in degrees, the order of the transform section channels).
+FOCAL_LENGTH_CONTROL_POINTS = 3
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("dense camera trajectories need numpy (pip install numpy)")
+
+def catmull_rom(control_points, num_samples):
+    # uniform Catmull-Rom through all control points, end tangents from reflected neighbours. The
+    # control points sit on samples (control_point_keys) and the curve is the cubic hermite_curve
+    # evaluates, so keys at the control points reproduce it exactly, whatever the sample count
+    points = np.asarray(control_points, dtype=float)
+    if num_samples < len(points):
+        # too few samples to hold every control point
+        return points[np.linspace(0, len(points) - 1, num_samples).round().astype(int)]
+    return hermite_curve(control_point_keys(len(points), num_samples).astype(float), points,
+                         np.arange(num_samples, dtype=float))
+
+def control_point_keys(num_control_points, num_samples):
+    # sample indices of catmull_rom's control points; keys there reproduce the curve (see hermite_curve)
+    return np.unique(np.linspace(0, num_samples - 1, num_control_points).round().astype(int))
+
+def random_control_points(center, move_radius, num_control_points, rng=random):
+    # same box as the two-key path: +-radius horizontally, +-radius/2 vertically
+    return [(center[0] + rng.uniform(-move_radius, move_radius),
+             center[1] + rng.uniform(-move_radius, move_radius),
+             center[2] + rng.uniform(-move_radius / 2, move_radius / 2)) for _ in range(num_control_points)]
+
+def smooth_camera_path(center, start_frame, num_frames, move_radius, num_control_points=4, rng=random):
+    require_numpy()
+    frames = np.arange(start_frame, start_frame + num_frames + 1)
+    control_points = random_control_points(center, move_radius, num_control_points, rng)
+    return frames, catmull_rom(control_points, len(frames))
+
+def look_at_rotations(locations, target):
+    require_numpy()
+    direction = np.asarray(target, dtype=float) - np.asarray(locations, dtype=float)
+    yaw = np.unwrap(np.arctan2(direction[:, 1], direction[:, 0]))
+    pitch = np.arctan2(direction[:, 2], np.hypot(direction[:, 0], direction[:, 1]))
+    return np.degrees(np.column_stack([np.zeros(len(direction)), pitch, yaw]))
+
+def focal_length_curve(frames, focal_length_range, num_control_points=FOCAL_LENGTH_CONTROL_POINTS, rng=random):
+    require_numpy()
+    low, high = focal_length_range
+    control_points = [[rng.uniform(low, high)] for _ in range(num_control_points)]
+    return np.clip(catmull_rom(control_points, len(frames))[:, 0], low, high)
+
+def hermite_curve(key_frames, key_values, frames):
+    # cubic Hermite with Catmull-Rom tangents, close to how Sequencer evaluates auto-tangent keys
+    tangents = np.empty_like(key_values)
+    tangents[0] = (key_values[1] - key_values[0]) / (key_frames[1] - key_frames[0])
+    tangents[-1] = (key_values[-1] - key_values[-2]) / (key_frames[-1] - key_frames[-2])
+    tangents[1:-1] = (key_values[2:] - key_values[:-2]) / (key_frames[2:] - key_frames[:-2])[:, None]
+    segment = np.clip(np.searchsorted(key_frames, frames, side='right') - 1, 0, len(key_frames) - 2)
+    span = (key_frames[segment + 1] - key_frames[segment])[:, None]
+    u = (frames - key_frames[segment])[:, None] / span
+    u2, u3 = u * u, u * u * u
+    return ((2 * u3 - 3 * u2 + 1) * key_values[segment] + (u3 - 2 * u2 + u) * span * tangents[segment]
+            + (3 * u2 - 2 * u3) * key_values[segment + 1] + (u3 - u2) * span * tangents[segment + 1])
+
+def key_error(frames, values, keys, tolerance, at=slice(None)):
+    # per-frame error of the cubic through keys, in units of tolerance, of the frames at `at`
+    return np.max(np.abs(values[at] - hermite_curve(frames[keys], values[keys], frames[at])) / tolerance, axis=1)
+
+def simplify_keys(frames, values, tolerance, seed_keys=None):
+    # Few keys whose cubic stays within tolerance of every frame, in one refinement pass: from
+    # seed_keys (the ends by default; a Catmull-Rom path's control_point_keys already fit it), the
+    # worst-fitting frame of every out-of-tolerance segment is added until every frame fits.
+    # All columns share key times; tolerance is a scalar or one value per column. Returns the
+    # indices of the keys to keep.
+    require_numpy()
+    frames = np.asarray(frames, dtype=float)
+    values = np.asarray(values, dtype=float).reshape(len(frames), -1)
+    tolerance = np.broadcast_to(np.asarray(tolerance, dtype=float), values.shape[1:])
+
+    keep = np.zeros(len(frames), dtype=bool)
+    keep[[0, -1]] = True
+    if seed_keys is not None:
+        keep[np.asarray(seed_keys, dtype=int)] = True
+    keys = np.flatnonzero(keep)
+    error = key_error(frames, values, keys, tolerance)
+    while True:
+        segment = np.searchsorted(keys, np.arange(len(frames)), side='right') - 1
+        order = np.lexsort((-error, segment))
+        worst = order[np.r_[True, segment[order][1:] != segment[order][:-1]]]
+        worst = worst[(error[worst] > 1.0) & ~keep[worst]]
+        if len(worst) == 0:
+            return keys
+        keep[worst] = True
+        keys = np.flatnonzero(keep)
+        # a new key moves the curve up to two keys either side (its neighbours' tangents change),
+        # so only the error there is evaluated again
+        position = np.searchsorted(keys, worst)
+        changed = np.zeros(len(frames) + 1, dtype=int)
+        np.add.at(changed, keys[np.maximum(position - 2, 0)], 1)
+        np.add.at(changed, keys[np.minimum(position + 2, len(keys) - 1)] + 1, -1)
+        at = np.flatnonzero(np.cumsum(changed[:-1]) > 0)
+        error[at] = key_error(frames, values, keys, tolerance, at)
+
+def linear_camera_keys(center, start_frame, num_frames, move_radius, rng=random):
+    # the original two-key path; plain Python so it works without numpy
+    frames = [start_frame, start_frame + num_frames]
+    return frames, random_control_points(center, move_radius, len(frames), rng)
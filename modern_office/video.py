@@ -0,0 +1,174 @@
+import json
+import os
+import re
+import shutil
+import struct
+import subprocess
+
+try:
+    import numpy as np
+except ImportError:  # decoded frames come back as bytes without it
+    np = None
+
+from .layout import pass_dir
+
+# Engine-free: packs a pass rendered as BMP intermediates into one video per scene with a local
+# ffmpeg, plus an index mapping sequencer frame numbers to video frames. Meant for the RGB pass,
+# whose frames are near duplicates under smooth camera motion; masks and normals stay images.
+FFMPEG = os.environ.get('MODERN_OFFICE_FFMPEG', 'ffmpeg')
+FFPROBE = os.environ.get('MODERN_OFFICE_FFPROBE', 'ffprobe')
+
+VIDEO_CODECS = {
+    # lossless and intra-only: every frame is a keyframe, a seek decodes a single frame
+    'ffv1': ['-c:v', 'ffv1', '-level', '3', '-g', '1', '-slices', '16', '-slicecrc', '1', '-pix_fmt', 'bgr0'],
+    # lossless RGB H.264, predicts across frames so smooth camera motion packs far tighter
+    'x264': ['-c:v', 'libx264rgb', '-qp', '0', '-preset', 'veryfast', '-g', '30', '-pix_fmt', 'rgb24'],
+    # near-lossless 4:4:4, an order of magnitude below the PNGs
+    'x264_crf': ['-c:v', 'libx264', '-crf', '12', '-preset', 'veryfast', '-g', '30', '-pix_fmt', 'yuv444p'],
+}
+VIDEO_EXTENSION = 'mkv'
+# only used for timestamps; the index maps video frames back to sequencer frame numbers
+NOMINAL_FRAME_RATE = 30
+
+# e.g. Image.FinalImage.0042.bmp
+BMP_FRAME_NUMBER_RE = re.compile(r'\.(\d+)\.bmp$')
+
+# video path -> VideoFrames, for read_frame
+_videos = {}
+
+
+def require_tool(tool):
+    if shutil.which(tool) is None:
+        raise FileNotFoundError(f"{tool} not found: install ffmpeg or point MODERN_OFFICE_FFMPEG/MODERN_OFFICE_FFPROBE at it")
+
+def video_path(pass_dir):
+    return os.path.join(pass_dir, f"{os.path.basename(os.path.normpath(pass_dir))}.{VIDEO_EXTENSION}")
+
+def index_path(video):
+    return f"{os.path.splitext(video)[0]}.index.json"
+
+def bmp_size(path):
+    with open(path, 'rb') as f:
+        width, height = struct.unpack('<ii', f.read(26)[18:26])
+    return width, abs(height)
+
+def count_packets(video):
+    output = subprocess.run([FFPROBE, '-v', 'error', '-select_streams', 'v:0', '-count_packets',
+                             '-show_entries', 'stream=nb_read_packets', '-of', 'csv=p=0', video],
+                            check=True, capture_output=True, text=True).stdout
+    return int(output.strip())
+
+
+def encode_pass_video(pass_dir, codec='x264', delete_frames=True):
+    # streams the pass's BMP frames through ffmpeg in frame number order; returns the video path
+    require_tool(FFMPEG)
+    # the frames are only deleted once ffprobe has counted them all in the video
+    require_tool(FFPROBE)
+    frames = sorted((int(m.group(1)), name) for name in os.listdir(pass_dir)
+                    for m in [BMP_FRAME_NUMBER_RE.search(name)] if m is not None)
+    if not frames:
+        raise ValueError(f"No frames to encode in {pass_dir}")
+    video = video_path(pass_dir)
+    partial = f"{video}.partial"
+    width, height = bmp_size(os.path.join(pass_dir, frames[0][1]))
+
+    command = [FFMPEG, '-hide_banner', '-loglevel', 'error', '-y', '-f', 'image2pipe',
+               '-framerate', str(NOMINAL_FRAME_RATE), '-c:v', 'bmp', '-i', '-',
+               *VIDEO_CODECS[codec], '-an', '-f', 'matroska', partial]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        for _, name in frames:
+            with open(os.path.join(pass_dir, name), 'rb') as f:
+                shutil.copyfileobj(f, process.stdin)
+    except BrokenPipeError:
+        pass  # ffmpeg exited early, its error is read below
+    _, stderr = process.communicate()
+    if process.returncode != 0:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise RuntimeError(f"ffmpeg failed on {pass_dir}: {stderr.decode(errors='replace').strip()}")
+
+    # frame-accurate: every frame made it into the stream, or the frames stay
+    packets = count_packets(partial)
+    if packets != len(frames):
+        os.remove(partial)
+        raise RuntimeError(f"{video}: {packets} video frames for {len(frames)} rendered frames")
+    os.replace(partial, video)
+    with open(index_path(video), 'w') as f:
+        json.dump({'video': os.path.basename(video), 'codec': codec, 'width': width, 'height': height,
+                   'frame_rate': NOMINAL_FRAME_RATE, 'frames': [number for number, _ in frames]}, f)
+    if delete_frames:
+        for _, name in frames:
+            os.remove(os.path.join(pass_dir, name))
+    return video
+
+def scan_video_frames(output_path, pass_name):
+    # manifest rows for a pass packed by encode_pass_video, paths as <video>#<frame number>
+    video = video_path(pass_dir(output_path, pass_name))
+    if not os.path.exists(index_path(video)):
+        return []
+    with open(index_path(video)) as f:
+        index = json.load(f)
+    return [(number, f"{pass_name}/{index['video']}#{number}", True) for number in index['frames']]
+
+
+# decoding, for training
+
+class VideoFrames:
+    # random access to the frames of one video by sequencer frame number
+    def __init__(self, video):
+        require_tool(FFMPEG)
+        self.video = video
+        with open(index_path(video)) as f:
+            self.index = json.load(f)
+        self.frame_numbers = self.index['frames']
+        self.positions = {number: i for i, number in enumerate(self.frame_numbers)}
+        self.frame_bytes = self.index['width'] * self.index['height'] * 3
+
+    def __len__(self):
+        return len(self.frame_numbers)
+
+    def to_image(self, data):
+        if np is None:
+            return data
+        return np.frombuffer(data, np.uint8).reshape(self.index['height'], self.index['width'], 3)
+
+    def decode(self, position, count):
+        # seek half a frame before the wanted one: ffmpeg drops every frame stamped before the seek
+        # point, so container timestamp rounding can't shift the result by a frame
+        seconds = max(0.0, (position - 0.5) / self.index['frame_rate'])
+        output = subprocess.run([FFMPEG, '-hide_banner', '-loglevel', 'error', '-ss', f"{seconds:.6f}",
+                                 '-i', self.video, '-frames:v', str(count), '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-'],
+                                check=True, capture_output=True).stdout
+        if len(output) != count * self.frame_bytes:
+            raise RuntimeError(f"{self.video}: decoded {len(output) // self.frame_bytes} of {count} frames")
+        return [self.to_image(output[i * self.frame_bytes:(i + 1) * self.frame_bytes]) for i in range(count)]
+
+    def read(self, frame_number):
+        # RGB as a (height, width, 3) uint8 array, or raw bytes without numpy
+        return self.decode(self.positions[frame_number], 1)[0]
+
+    def read_range(self, first_frame_number, count):
+        # consecutive video frames in one decode, far cheaper than reading them one by one
+        return self.decode(self.positions[first_frame_number], count)
+
+    def __iter__(self):
+        # every frame with its number, decoded in one pass
+        process = subprocess.Popen([FFMPEG, '-hide_banner', '-loglevel', 'error', '-i', self.video,
+                                    '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-'], stdout=subprocess.PIPE)
+        try:
+            for number in self.frame_numbers:
+                data = process.stdout.read(self.frame_bytes)
+                if len(data) != self.frame_bytes:
+                    raise RuntimeError(f"{self.video}: stream ended before frame {number}")
+                yield number, self.to_image(data)
+        finally:
+            process.stdout.close()
+            process.wait()
+
+def read_frame(path):
+    # a manifest path: <video>#<frame number>
+    video, frame_number = path.rsplit('#', 1)
+    if video not in _videos:
+        _videos[video] = VideoFrames(video)
+    return _videos[video].read(int(frame_number))
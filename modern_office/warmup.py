@@ -0,0 +1,155 @@
+import json
+import math
+import os
+import shutil
+import time
+
+from .animation_catalog import BAKED_CHARACTER_ROOT, default_catalog_path, load_catalog, filter_catalog
+from .assets import SURFACE_KEYWORDS, list_assets, find_relevant_assets, spawn_actor
+from .engine import unreal
+from .lighting import CUBEMAP_ROOT
+from .materials import surface_pool_path
+from .orchestrator import RenderOrchestrator, RetryPolicy
+from .sequencer import load_render_sequence, clean_sequencer, bind_camera_to_level_sequence
+from .stages import Scene, choose_camera_and_target
+
+WARMUP_PASS = 'rgb'
+WARMUP_MESH = '/Engine/BasicShapes/Sphere.Sphere'
+WARMUP_SPACING = 200.0
+# a single frame per render: the Movie Render Queue waits for outstanding shader jobs before it
+WARMUP_FRAME_STEP = 100000
+# assets spawned (or loaded) at once; each chunk is rendered, then destroyed and collected before
+# the next, so warming up a full catalog never holds more than this in memory
+WARMUP_CHUNK_SIZE = 48
+
+
+def collect_warmup_assets(stages):
+    # every distinct asset the configured stages can draw from; stages as (name, options) pairs
+    options = dict(stages)
+    assets = {'SkeletalMesh': [], 'MaterialInstanceConstant': [], 'TextureCube': []}
+    if 'random_character' in options:
+        catalog_path = default_catalog_path()
+        if os.path.exists(catalog_path):
+            catalog = filter_catalog(load_catalog(catalog_path), **(options['random_character'].get('catalog_filters') or {}))
+            assets['SkeletalMesh'] = sorted({entry['skeletal_mesh'] for entry in catalog})
+        else:
+            assets['SkeletalMesh'] = list_assets(BAKED_CHARACTER_ROOT, asset_class='SkeletalMesh')
+    if 'random_materials' in options:
+        for surface in options['random_materials'].get('surfaces') or SURFACE_KEYWORDS:
+            assets['MaterialInstanceConstant'] += list_assets(surface_pool_path(surface),
+                                                              asset_class='MaterialInstanceConstant')
+    if 'random_lighting' in options or 'random_cubemap' in options:
+        assets['TextureCube'] = list_assets(CUBEMAP_ROOT, asset_class='TextureCube')
+    return assets
+
+def warmup_chunks(assets, chunk_size=WARMUP_CHUNK_SIZE):
+    # (asset class, path) items in chunks of chunk_size; one chunk, maybe empty, at least
+    items = [(asset_class, path) for asset_class in ('SkeletalMesh', 'MaterialInstanceConstant', 'TextureCube')
+             for path in assets.get(asset_class, ())]
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)] or [[]]
+
+def grid_locations(center, count, spacing=WARMUP_SPACING):
+    columns = max(1, math.ceil(math.sqrt(count)))
+    return [center + unreal.Vector((i % columns - columns / 2) * spacing, (i // columns - columns / 2) * spacing, 0.0)
+            for i in range(count)]
+
+class ShaderWarmup:
+    # Spawns every distinct mesh and material the batch can draw next to a target point, chunk by
+    # chunk, and renders a frame of each chunk before the batch starts; the last chunk is rendered
+    # again. The first (cold) renders pay for shader compilation and DDC fetches, the last (warm)
+    # one does not; the difference is the time taken out of the first scenes of the batch.
+    def __init__(self, stages, output_root, resource_manager, report_path=None, pass_timeout=3600.0,
+                 chunk_size=WARMUP_CHUNK_SIZE):
+        self.assets = collect_warmup_assets(stages)
+        self.chunks = warmup_chunks(self.assets, chunk_size)
+        self.output_root = output_root
+        self.resource_manager = resource_manager
+        self.report_path = report_path
+        self.pass_timeout = pass_timeout
+        self.scene = None
+        self.orchestrator = None
+        self.load_seconds = 0.0
+        self.render_seconds = {}
+
+    def spawn_scene(self, chunk):
+        level_sequence = load_render_sequence()
+        clean_sequencer(level_sequence)
+        scene = Scene(level_sequence, find_relevant_assets(), self.output_root,
+                      resources=self.resource_manager.begin_scene())
+        scene.frame_step = WARMUP_FRAME_STEP
+        choose_camera_and_target(scene)
+        bind_camera_to_level_sequence(level_sequence, scene.camera)
+
+        started_at = time.monotonic()
+        locations = grid_locations(scene.location, len(chunk))
+        for (asset_class, path), location in zip(chunk, locations):
+            if asset_class == 'SkeletalMesh':
+                spawn_actor(path, location=location, resources=scene.resources)
+            elif asset_class == 'MaterialInstanceConstant':
+                actor = spawn_actor(WARMUP_MESH, location=location, resources=scene.resources)
+                actor.static_mesh_component.set_material(0, scene.resources.load_asset(path))
+            else:
+                # cubemaps only need their derived data built
+                scene.resources.load_asset(path)
+        self.load_seconds += time.monotonic() - started_at
+        return scene
+
+    def release_scene(self):
+        if self.scene is not None:
+            self.resource_manager.end_scene(self.scene)
+            self.scene = None
+            # the chunk's actors and assets are gone before the next one is spawned
+            self.resource_manager.collect()
+
+    def build_scene(self, scene_index):
+        # scenes 0 .. len(chunks) - 1 render a chunk each, cold; the last scene renders the last chunk warm
+        if scene_index < len(self.chunks) or self.scene is None:
+            self.release_scene()
+            self.scene = self.spawn_scene(self.chunks[min(scene_index, len(self.chunks) - 1)])
+        name = f"cold_{scene_index:03d}" if scene_index < len(self.chunks) else 'warm'
+        self.scene.output_path = os.path.join(self.output_root, name)
+        return self.scene
+
+    def make_orchestrator(self, executor, on_done):
+        orchestrator = RenderOrchestrator(executor, self.build_scene, len(self.chunks) + 1, [WARMUP_PASS],
+                                          default_timeout=self.pass_timeout, retry_policy=RetryPolicy(max_attempts=1))
+        orchestrator.add_hook('pass_finished', self.pass_finished)
+        orchestrator.add_hook('task_failed', self.task_failed)
+
+        def batch_finished(completed_scenes, failed_scenes):
+            self.finish()
+            on_done()
+        orchestrator.add_hook('batch_finished', batch_finished)
+        self.orchestrator = orchestrator
+        return orchestrator
+
+    def pass_finished(self, task):
+        self.render_seconds[task.scene_index] = self.orchestrator.clock() - task.started_at
+
+    def task_failed(self, task, message):
+        unreal.log_warning(f"Shader warm-up render failed, the batch starts anyway: {message}")
+
+    def report(self):
+        cold = [self.render_seconds[i] for i in range(len(self.chunks)) if i in self.render_seconds]
+        warm = self.render_seconds.get(len(self.chunks))
+        return {
+            'assets': {asset_class: len(paths) for asset_class, paths in self.assets.items()},
+            'chunks': len(self.chunks),
+            'load_seconds': round(self.load_seconds, 2),
+            'cold_render_seconds': cold,
+            'warm_render_seconds': warm,
+            # compile and DDC time that would otherwise have stalled the first scenes
+            'compile_seconds_removed': (sum(max(0.0, seconds - warm) for seconds in cold)
+                                        if cold and warm is not None else None),
+        }
+
+    def finish(self):
+        self.release_scene()
+        shutil.rmtree(self.output_root, ignore_errors=True)
+        report = self.report()
+        unreal.log(f"Shader warm-up: {report}")
+        if self.report_path is not None:
+            os.makedirs(os.path.dirname(self.report_path), exist_ok=True)
+            with open(self.report_path, 'w') as f:
+                json.dump(report, f, indent=2)
+        return report
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Engine-free unit tests of the core modules, run from the repo root:
+#   python -m pytest tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,19 @@
+from modern_office.coverage import CoverageSampler
+
+def test_forget_undoes_record():
+    sampler = CoverageSampler()
+    sampler.record(('alice', 'walk', 'cam_1', 'sky_1'))
+    before = ([dict(c) for c in sampler.counts], dict(sampler.pair_counts), sampler.scenes)
+    sampler.record(('alice', 'walk', 'cam_2', 'sky_2'))
+    sampler.forget(('alice', 'walk', 'cam_2', 'sky_2'))
+    assert ([dict(c) for c in sampler.counts], dict(sampler.pair_counts), sampler.scenes) == before
+
+def test_replanned_scene_counts_what_it_renders():
+    # e.g. plate_seed swapping the planned cubemap for its background's
+    sampler = CoverageSampler()
+    sampler.record(('alice', 'walk', 'cam_1', 'sky_1'))
+    sampler.forget(('alice', 'walk', 'cam_1', 'sky_1'))
+    sampler.record(('alice', 'walk', 'cam_1', 'sky_2'))
+    assert 'sky_1' not in sampler.counts[3]
+    assert sampler.score(('bob', 'run', 'cam_2', 'sky_1')) == (0, 0)
+    assert sampler.summary()['values'] == {'character': 1, 'animation': 1, 'camera': 1, 'cubemap': 1}
@@ -0,0 +1,146 @@
+from types import SimpleNamespace
+
+from modern_office.orchestrator import (CANCELLING, DONE, WAITING, RenderOrchestrator, RetryPolicy, SimulatedExecutor,
+                                        run_simulated)
+
+PASSES = ['rgb', 'normals', 'rgb_alpha']
+
+
+def make_orchestrator(executor, scene_count=2, max_attempts=2, **options):
+    orchestrator = RenderOrchestrator(executor, lambda index: SimpleNamespace(index=index), scene_count, PASSES,
+                                      retry_policy=RetryPolicy(max_attempts=max_attempts), clock=executor.clock,
+                                      **options)
+    events = []
+    orchestrator.add_hook('pass_finished', lambda task: events.append(('pass', task.scene_index, task.pass_name)))
+    orchestrator.add_hook('scene_finished', lambda index, scene: events.append(('scene', index)))
+    orchestrator.add_hook('task_failed', lambda task, message: events.append(('failed', task.scene_index, message)))
+    orchestrator.add_hook('batch_finished', lambda completed, failed: events.append(('batch', completed, failed)))
+    return orchestrator, events
+
+def started(executor):
+    return [(scene, pass_name, attempt) for scene, pass_name, attempt, _ in executor.started]
+
+def drive(orchestrator, executor, step=0.5):
+    # run_simulated for an orchestrator that is already started
+    for _ in range(10000):
+        if orchestrator.state == DONE:
+            return
+        executor.advance(step)
+        orchestrator.tick()
+    raise RuntimeError(f"did not finish, state {orchestrator.state}")
+
+def test_passes_render_in_order_scene_by_scene():
+    executor = SimulatedExecutor()
+    orchestrator, events = make_orchestrator(executor)
+    run_simulated(orchestrator, executor)
+    assert started(executor) == [(scene, pass_name, 1) for scene in range(2) for pass_name in PASSES]
+    assert events == ([('pass', 0, p) for p in PASSES] + [('scene', 0)]
+                      + [('pass', 1, p) for p in PASSES] + [('scene', 1)] + [('batch', [0, 1], [])])
+    assert orchestrator.state == DONE
+
+def test_failed_pass_is_retried_before_the_next_pass():
+    executor = SimulatedExecutor(outcomes={(0, 'normals'): ['error', 'ok']})
+    orchestrator, events = make_orchestrator(executor)
+    run_simulated(orchestrator, executor)
+    assert started(executor)[:4] == [(0, 'rgb', 1), (0, 'normals', 1), (0, 'normals', 2), (0, 'rgb_alpha', 1)]
+    assert events[-1] == ('batch', [0, 1], [])
+
+def test_scene_is_dropped_after_too_many_attempts():
+    executor = SimulatedExecutor(outcomes={(0, 'normals'): ['error', 'error']})
+    orchestrator, events = make_orchestrator(executor)
+    run_simulated(orchestrator, executor)
+    # rgb_alpha of scene 0 never renders, scene 1 still does
+    assert started(executor) == ([(0, 'rgb', 1), (0, 'normals', 1), (0, 'normals', 2)]
+                                 + [(1, pass_name, 1) for pass_name in PASSES])
+    assert ('failed', 0, 'simulated error in normals') in events
+    assert ('scene', 0) not in events
+    assert events[-1] == ('batch', [1], [0])
+
+def test_timed_out_pass_is_cancelled_and_retried():
+    executor = SimulatedExecutor(outcomes={(0, 'normals'): ['hang']})
+    orchestrator, events = make_orchestrator(executor, default_timeout=5.0)
+    run_simulated(orchestrator, executor)
+    assert [task.pass_name for task in executor.cancelled] == ['normals']
+    assert started(executor)[:3] == [(0, 'rgb', 1), (0, 'normals', 1), (0, 'normals', 2)]
+    assert events[-1] == ('batch', [0, 1], [])
+
+def test_timeout_without_retries_fails_the_scene():
+    executor = SimulatedExecutor(outcomes={(0, 'normals'): ['hang']})
+    orchestrator, events = make_orchestrator(executor, default_timeout=5.0, max_attempts=1)
+    run_simulated(orchestrator, executor)
+    assert ('failed', 0, 'normals pass timed out after 5.0s') in events
+    assert events[-1] == ('batch', [1], [0])
+
+def test_next_pass_waits_for_the_cancelled_pass_to_stop():
+    executor = SimulatedExecutor(outcomes={(0, 'normals'): ['hang']}, cancel_duration=3.0)
+    orchestrator, _ = make_orchestrator(executor, scene_count=1, default_timeout=5.0)
+    orchestrator.start()
+    while not executor.cancelled:
+        executor.advance(0.5)
+        orchestrator.tick()
+    cancelled_at = executor.now
+    assert orchestrator.state == CANCELLING
+    drive(orchestrator, executor)
+    retry_started_at = executor.started[2][3]
+    assert executor.started[2][:3] == (0, 'normals', 2)
+    assert retry_started_at >= cancelled_at + 3.0
+
+def test_cancel_that_never_reports_back_gives_up_after_cancel_timeout():
+    executor = SimulatedExecutor(outcomes={(0, 'normals'): ['hang']}, cancel_duration=None)
+    orchestrator, events = make_orchestrator(executor, scene_count=1, default_timeout=5.0, cancel_timeout=10.0)
+    run_simulated(orchestrator, executor)
+    cancelled_at = executor.started[1][3] + 5.0
+    assert executor.started[2][:3] == (0, 'normals', 2)
+    assert executor.started[2][3] > cancelled_at + 10.0
+    assert events[-1] == ('batch', [0], [])
+
+def test_late_callback_of_a_cancelled_attempt_does_not_finish_its_retry():
+    executor = SimulatedExecutor(outcomes={(0, 'rgb'): ['hang']}, cancel_duration=None)
+    orchestrator, events = make_orchestrator(executor, scene_count=1, default_timeout=5.0, cancel_timeout=1.0)
+    orchestrator.start()
+    late_finished = executor.running[1]
+    while len(executor.started) < 2:
+        executor.advance(0.5)
+        orchestrator.tick()
+    # the first attempt's session finally reports back while the retry renders
+    late_finished(True)
+    assert events == []
+    assert orchestrator.current_task.attempts == 2
+
+def test_gate_holds_off_the_next_scene_without_blocking():
+    executor = SimulatedExecutor()
+    orchestrator, events = make_orchestrator(executor)
+    open_gate = []
+    orchestrator.add_gate(lambda: bool(open_gate) or not orchestrator.completed_scenes)
+    orchestrator.start()
+    for _ in range(20):
+        executor.advance(0.5)
+        orchestrator.tick()
+    assert orchestrator.state == WAITING
+    assert len(executor.started) == len(PASSES)
+    open_gate.append(True)
+    drive(orchestrator, executor)
+    assert events[-1] == ('batch', [0, 1], [])
+
+def test_cancel_fails_the_current_scene_and_finishes_the_batch():
+    executor = SimulatedExecutor(cancel_duration=2.0)
+    orchestrator, events = make_orchestrator(executor, scene_count=3)
+    orchestrator.start()
+    executor.advance(1.0)
+    orchestrator.tick()
+    orchestrator.cancel()
+    assert orchestrator.state == CANCELLING
+    drive(orchestrator, executor)
+    assert started(executor) == [(0, 'rgb', 1), (0, 'normals', 1)]
+    assert events == [('pass', 0, 'rgb'), ('failed', 0, 'normals pass cancelled'), ('batch', [], [0])]
+
+def test_cancel_while_waiting_finishes_the_batch():
+    executor = SimulatedExecutor()
+    orchestrator, events = make_orchestrator(executor)
+    orchestrator.add_gate(lambda: False)
+    orchestrator.start()
+    assert orchestrator.state == WAITING
+    orchestrator.cancel()
+    assert orchestrator.state == DONE
+    assert executor.started == []
+    assert events == [('batch', [], [])]
@@ -0,0 +1,117 @@
+import os
+import threading
+
+import pytest
+
+from modern_office import storage
+from modern_office.storage import (MIN_CHUNK_SIZE, BackgroundUploader, LocalDiskSink, LocalObjectStore, NFSSink,
+                                   S3Sink)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(storage.time, 'sleep', lambda seconds: None)
+
+@pytest.fixture
+def scene_dir(tmp_path):
+    # one file above the multipart threshold, one below
+    scene = tmp_path / 'scene'
+    (scene / 'rgb').mkdir(parents=True)
+    (scene / 'rgb' / 'Image.FinalImage.0000.png').write_bytes(os.urandom(2 * MIN_CHUNK_SIZE + 1234))
+    (scene / 'metadata.json').write_bytes(b'{}')
+    return scene
+
+class FlakyStore(LocalObjectStore):
+    # upload_part fails the first failures calls
+    def __init__(self, root, failures):
+        super().__init__(root)
+        self.failures = failures
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if self.failures > 0:
+            self.failures -= 1
+            self.calls.append('upload_part_failed')
+            raise ConnectionError("connection reset")
+        return super().upload_part(Bucket, Key, UploadId, PartNumber, Body)
+
+def test_large_files_go_up_in_parts(tmp_path, scene_dir):
+    store = LocalObjectStore(str(tmp_path / 'store'))
+    sink = S3Sink('bucket', prefix='office', client=store, chunk_size=MIN_CHUNK_SIZE)
+    assert sink.put_scene(str(scene_dir), 'batch/scene') == 's3://bucket/office/batch/scene'
+    assert store.calls.count('upload_part') == 3
+    assert store.calls.count('put_object') == 1
+    image = 'office/batch/scene/rgb/Image.FinalImage.0000.png'
+    with open(store.path('bucket', image), 'rb') as f:
+        assert f.read() == (scene_dir / 'rgb' / 'Image.FinalImage.0000.png').read_bytes()
+    assert store.uploads == {}
+
+def test_nfs_sink_syncs_the_copies_it_writes(tmp_path, scene_dir, monkeypatch):
+    # like Windows, which refuses to fsync a handle opened read-only
+    fcntl = pytest.importorskip('fcntl')
+    synced = []
+    def fsync(fd):
+        if fcntl.fcntl(fd, fcntl.F_GETFL) & os.O_ACCMODE == os.O_RDONLY:
+            raise OSError(9, "Bad file descriptor")
+        synced.append(fd)
+    monkeypatch.setattr(storage.os, 'fsync', fsync)
+    destination = NFSSink(str(tmp_path / 'share')).put_scene(str(scene_dir), 'batch/scene')
+    assert destination == os.path.join(str(tmp_path / 'share'), 'batch/scene')
+    assert (tmp_path / 'share' / 'batch' / 'scene' / 'metadata.json').read_bytes() == b'{}'
+    assert len(synced) == 2
+    assert os.listdir(tmp_path / 'share' / '.incoming') == []
+
+def test_failed_part_is_retried(tmp_path, scene_dir):
+    store = FlakyStore(str(tmp_path / 'store'), failures=2)
+    sink = S3Sink('bucket', client=store, chunk_size=MIN_CHUNK_SIZE, part_attempts=3)
+    sink.put_scene(str(scene_dir), 'scene')
+    assert store.calls.count('upload_part_failed') == 2
+    assert 'complete_multipart_upload' in store.calls
+    assert 'abort_multipart_upload' not in store.calls
+
+def test_upload_is_aborted_when_a_part_keeps_failing(tmp_path, scene_dir):
+    store = FlakyStore(str(tmp_path / 'store'), failures=3)
+    sink = S3Sink('bucket', client=store, chunk_size=MIN_CHUNK_SIZE, part_attempts=3)
+    with pytest.raises(ConnectionError):
+        sink.put_file(str(scene_dir / 'rgb' / 'Image.FinalImage.0000.png'), 'scene/image.png')
+    assert store.calls[-1] == 'abort_multipart_upload'
+    assert 'complete_multipart_upload' not in store.calls
+    assert store.uploads == {}
+    assert not os.path.exists(store.path('bucket', 'scene/image.png'))
+
+def test_uploader_retries_scenes_and_records_failures(tmp_path, scene_dir):
+    class FailingSink(LocalDiskSink):
+        attempts = 0
+
+        def put_scene(self, local_dir, scene_key):
+            self.attempts += 1
+            if scene_key == 'broken' or self.attempts == 1:
+                raise OSError("share unavailable")
+            return super().put_scene(local_dir, scene_key)
+
+    sink = FailingSink(str(tmp_path / 'share'))
+    uploader = BackgroundUploader(sink, max_workers=1, max_attempts=3, delete_local=True)
+    assert uploader.submit(str(scene_dir), 'batch/scene').result() == str(tmp_path / 'share' / 'batch' / 'scene')
+    assert uploader.submit(str(tmp_path / 'missing'), 'broken').result() is None
+    uploader.close()
+    assert uploader.uploaded == [('batch/scene', str(tmp_path / 'share' / 'batch' / 'scene'))]
+    assert uploader.failed == [('broken', "OSError('share unavailable')")]
+    # uploaded, so the local copy is gone
+    assert not scene_dir.exists()
+    assert sink.attempts == 5
+
+def test_submit_does_not_block_when_the_sink_is_slow(tmp_path, scene_dir):
+    release = threading.Event()
+
+    class SlowSink(LocalDiskSink):
+        def put_scene(self, local_dir, scene_key):
+            release.wait(5)
+            return local_dir
+
+    uploader = BackgroundUploader(SlowSink(str(tmp_path)), max_workers=1, max_pending=2)
+    futures = [uploader.submit(str(scene_dir), f"scene_{i}") for i in range(5)]
+    # queued beyond max_pending without waiting; the pipeline holds off new scenes instead
+    assert uploader.backlogged()
+    release.set()
+    assert [future.result() for future in futures] == [str(scene_dir)] * 5
+    assert not uploader.backlogged()
+    uploader.close()